@@ -3,13 +3,21 @@ import re
 import string
 import json
 import time
+import hashlib
+import math
+import threading
+import contextlib
 import pandas as pd
+from collections import OrderedDict
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from Sastrawi.StopWordRemover.StopWordRemoverFactory import StopWordRemoverFactory
 from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
 from langdetect import detect, DetectorFactory
 from deep_translator import GoogleTranslator
+from kv_store import SqliteKVStore, text_hash
+from translation_utils import GoogleTranslateBackend, translate_texts
+from progress_utils import progress_registry
 
 # ========================================
 # KONFIGURASI
@@ -21,6 +29,18 @@ ANTONYM_JSON_PATH = "dict.json"
 POSITIVE_CSV = "Positive.csv"
 NEGATIVE_CSV = "Negative.csv"
 TYPO_JSON_PATH = "typo_dict.json"
+STEM_CACHE_PATH = "stem_cache.json"
+TRANSLATION_DB_PATH = "translation_cache.db"
+RECORD_CACHE_PATH = "preprocess_cache.db"
+
+# Naikkan setiap kali logika pipeline berubah (invalidasi record cache)
+PIPELINE_VERSION = "1"
+
+# Stem cache limit (jumlah kata unik)
+STEM_CACHE_MAX_SIZE = 200000
+
+# Batas cache teks di memori (deteksi bahasa, translasi); reuse lintas run lewat KV store di disk
+TEXT_CACHE_MAX_SIZE = 100000
 
 # Negation words
 NEGATION_WORDS = {"tidak", "bukan", "gak", "nggak", "kurang", "tak", "ga", "tdk"}
@@ -36,12 +56,131 @@ stemmer = stem_factory.create_stemmer()
 
 translator = GoogleTranslator(source="en", target="id")
 
-# Progress state
-progress_state = {"current": 0, "total": 0, "status": "idle"}
+# Backend translasi batch (bisa diganti, mis. StubTranslateBackend untuk offline/testing)
+translation_backend = GoogleTranslateBackend(source="en", target="id")
+# Cache translasi persisten (key = SHA-256 teks penuh)
+translation_store = SqliteKVStore(TRANSLATION_DB_PATH, table="translations_en_id")
+
+class LRUCache:
+    """Bounded (LRU) text -> value cache, thread-safe.
+
+    Dipakai untuk cache per teks supaya memori tetap datar di stream mode
+    (dict biasa tumbuh dengan setiap teks unik).
+    """
+
+    def __init__(self, max_size=TEXT_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, default)
+            if key in self._data:
+                self._data.move_to_end(key)
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key, self)
+        if value is self:
+            raise KeyError(key)
+        return value
+
+    def _put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._put(key, value)
+
+    def update(self, items):
+        """items: dict atau iterable of (key, value)"""
+        items = items.items() if hasattr(items, "items") else items
+        with self._lock:
+            for key, value in items:
+                self._put(key, value)
+
+    def add(self, key):
+        self[key] = True
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
 
 # Caches
-translation_cache = {}
-lang_detection_cache = {}
+translation_cache = LRUCache()
+lang_detection_cache = LRUCache()
+# Teks yang gagal diterjemahkan (hasilnya tidak boleh masuk record cache)
+translation_failures = LRUCache()
+
+# ========================================
+# TRACING & STEP TIMING
+# ========================================
+# Default: TIDAK ada print per baris. Set PREPROCESS_TRACE_ROWS=N (atau
+# trace_rows=N di preprocess_comments_large) untuk trace detail N baris pertama.
+TRACE_ROWS = int(os.getenv("PREPROCESS_TRACE_ROWS", "0"))
+
+_trace_state = threading.local()
+
+def _tracing() -> bool:
+    return getattr(_trace_state, "enabled", False)
+
+def _trace(message: str):
+    """Print only while the current thread is processing a sampled row"""
+    if _tracing():
+        print(message)
+
+
+class StepTimer:
+    """Thread-safe per-step timing counters (calls + total seconds)"""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def add_many(self, timings: dict, count=1):
+        """Merge {step: seconds} measured over `count` rows"""
+        with self._lock:
+            for step, seconds in timings.items():
+                stat = self._stats.setdefault(step, [0, 0.0])
+                stat[0] += count
+                stat[1] += seconds
+
+    def merge(self, stats: dict):
+        """Merge a snapshot from another process"""
+        with self._lock:
+            for step, (count, seconds) in stats.items():
+                stat = self._stats.setdefault(step, [0, 0.0])
+                stat[0] += count
+                stat[1] += seconds
+
+    def drain(self) -> dict:
+        """Return and reset the current counters"""
+        with self._lock:
+            stats, self._stats = self._stats, {}
+        return stats
+
+    def summary(self, stats=None) -> dict:
+        stats = self._stats if stats is None else stats
+        return {
+            step: {
+                "rows": count,
+                "total_seconds": round(seconds, 4),
+                "avg_ms": round(seconds * 1000 / count, 4) if count else 0.0
+            }
+            for step, (count, seconds) in stats.items()
+        }
+
+step_timer = StepTimer()
 
 # ========================================
 # LOAD WORD LISTS
@@ -304,60 +443,186 @@ def load_typo_dict(json_path=TYPO_JSON_PATH):
 
 TYPO_MAP = load_typo_dict()
 
+# ========================================
+# LANGUAGE DETECTION VOCAB (tier 1 heuristic)
+# ========================================
+# Kosakata Indonesia yang sudah ada: lexicon, typo dict, kata negasi, stopword Sastrawi
+ID_VOCAB = frozenset(
+    set(positive_words) | set(negative_words) | set(NEGATION_WORDS)
+    | {k.lower() for k in TYPO_MAP}
+    | {w for v in TYPO_MAP.values() if v for w in str(v).lower().split()}
+    | set(stop_factory.get_stop_words())
+)
+# Function words Inggris: kalau ada, teks dianggap ambigu -> langdetect
+EN_FUNCTION_WORDS = frozenset({
+    "the", "is", "are", "was", "were", "this", "that", "and", "you", "your", "it",
+    "of", "to", "for", "with", "not", "very", "so", "but", "have", "has", "what",
+    "my", "me", "be", "in", "on", "at", "i", "a", "an", "we", "they", "he", "she",
+    "will", "would", "can", "just", "really", "good", "bad", "like", "love", "great"
+})
+# Minimal rasio token yang dikenal sebagai Indonesia
+ID_VOCAB_RATIO = 0.5
+
+# ========================================
+# STEM CACHE
+# ========================================
+class StemCache:
+    """Bounded (LRU) word -> stem cache with hit/miss counters.
+
+    Komentar YouTube sangat Zipfian, jadi kata yang sama di-stem jutaan kali.
+    Cache ini bisa disimpan ke disk agar run berikutnya langsung "warm".
+    """
+
+    def __init__(self, max_size=STEM_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self.track_new = False  # True di worker process (lihat drain_new)
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._new = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _put(self, word, stem):
+        self._data[word] = stem
+        self._data.move_to_end(word)
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def stem(self, word: str) -> str:
+        """Return cached stem of `word`, stemming it on a miss"""
+        with self._lock:
+            cached = self._data.get(word)
+            if cached is not None:
+                self._data.move_to_end(word)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        try:
+            result = stemmer.stem(word)
+        except Exception:
+            result = word
+
+        with self._lock:
+            self._put(word, result)
+            if self.track_new:
+                self._new[word] = result
+        return result
+
+    def update(self, mapping: dict):
+        """Merge word -> stem entries (e.g. from worker processes)"""
+        with self._lock:
+            for word, stem in mapping.items():
+                self._put(word, stem)
+
+    def drain_new(self) -> dict:
+        """Return and forget the entries added since the last drain"""
+        with self._lock:
+            new, self._new = self._new, {}
+        return new
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def load(self, path=STEM_CACHE_PATH) -> int:
+        """Load cache entries from JSON file, returns number of entries loaded"""
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.update(data)
+            print(f"[INFO] Loaded {len(data)} cached stems from {path}")
+            return len(data)
+        except Exception as e:
+            print(f"[WARN] Could not load stem cache: {e}")
+            return 0
+
+    def save(self, path=STEM_CACHE_PATH) -> bool:
+        """Persist cache to JSON (oldest -> newest, so LRU order survives)"""
+        if not path:
+            return False
+        try:
+            with self._lock:
+                data = dict(self._data)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            print(f"[INFO] Saved {len(data)} cached stems to {path}")
+            return True
+        except Exception as e:
+            print(f"[WARN] Could not save stem cache: {e}")
+            return False
+
+stem_cache = StemCache()
+
 # ========================================
 # TEXT PROCESSING FUNCTIONS
 # ========================================
+# Emoji ranges (dipakai di clean_text)
+EMOJI_RANGES = (
+    "\U0001F600-\U0001F64F"
+    "\U0001F300-\U0001F5FF"
+    "\U0001F680-\U0001F6FF"
+    "\U0001F700-\U0001F77F"
+    "\U0001F780-\U0001F7FF"
+    "\U0001F800-\U0001F8FF"
+    "\U0001F900-\U0001F9FF"
+    "\U0001FA00-\U0001FA6F"
+    "\U0001FA70-\U0001FAFF"
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+)
+
+# Precompiled patterns - compiled sekali saat import, bukan per komentar.
+# URL, mention, angka dan emoji dihapus dalam SATU pass regex. Mention berhenti
+# sebelum URL yang valid supaya hasilnya sama dengan urutan lama (URL dihapus dulu).
+REMOVE_PATTERN = re.compile(
+    r"http\S+|www\.\S+|@(?:(?!http\S|www\.\S)\w)+|\d+|[" + EMOJI_RANGES + r"]+",
+    flags=re.UNICODE
+)
+REPEATED_CHAR_PATTERN = re.compile(r'([a-zA-Z])\1{1,}\b')
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
 def reduce_repeated_characters(text: str) -> str:
     """Remove repeated characters at word endings
     Example: 'bagusss' -> 'bagus'
     """
-    return re.sub(r'([a-zA-Z])\1{1,}\b', r'\1', text)
+    return REPEATED_CHAR_PATTERN.sub(r'\1', text)
 
 def clean_text(text: str) -> str:
-    """Clean and normalize text"""
+    """Clean and normalize text
+    lower -> hapus URL/mention/angka/emoji (1 pass) -> hapus tanda baca
+    -> normalisasi spasi -> kurangi huruf berulang
+    """
     if text is None:
         return ""
     
-    text = str(text).lower()
-    
-    # Remove URLs
-    text = re.sub(r"http\S+|www\.\S+", "", text)
-    
-    # Remove mentions
-    text = re.sub(r"@\w+", "", text)
-    
-    # Remove punctuation
-    text = text.translate(str.maketrans("", "", string.punctuation))
-    
-    # Remove numbers
-    text = re.sub(r"\d+", "", text)
-    
-    # Remove emojis
-    emoji_pattern = re.compile(
-        "[" 
-        "\U0001F600-\U0001F64F"
-        "\U0001F300-\U0001F5FF"
-        "\U0001F680-\U0001F6FF"
-        "\U0001F700-\U0001F77F"
-        "\U0001F780-\U0001F7FF"
-        "\U0001F800-\U0001F8FF"
-        "\U0001F900-\U0001F9FF"
-        "\U0001FA00-\U0001FA6F"
-        "\U0001FA70-\U0001FAFF"
-        "\U00002702-\U000027B0"
-        "\U000024C2-\U0001F251"
-        "]+",
-        flags=re.UNICODE
-    )
-    text = emoji_pattern.sub(r"", text)
-    
-    # Normalize whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-    
-    # Reduce repeated characters
-    text = reduce_repeated_characters(text)
-    
-    return text
+    text = REMOVE_PATTERN.sub("", str(text).lower())
+    text = text.translate(PUNCTUATION_TABLE)
+    text = " ".join(text.split())
+    return REPEATED_CHAR_PATTERN.sub(r"\1", text)
+
+def clean_text_series(texts: pd.Series) -> pd.Series:
+    """Batch version of clean_text for a whole pandas Series.
+    NaN/None menjadi string kosong.
+    """
+    texts = texts.fillna("").astype(str).str.lower()
+    texts = texts.str.replace(REMOVE_PATTERN, "", regex=True)
+    texts = texts.str.translate(PUNCTUATION_TABLE)
+    texts = texts.str.split().str.join(" ")
+    return texts.str.replace(REPEATED_CHAR_PATTERN, r"\1", regex=True)
 
 def normalize_typo(text: str, typo_map=TYPO_MAP) -> str:
     """Normalize typo words to correct form"""
@@ -366,66 +631,200 @@ def normalize_typo(text: str, typo_map=TYPO_MAP) -> str:
     
     words = text.split()
     normalized = []
-    corrections_count = 0
     
     for word in words:
         corrected = typo_map.get(word.lower())
         if corrected:
             normalized.append(corrected)
-            corrections_count += 1
-            if corrections_count <= 5:  # Limit logging
-                print(f"[DEBUG] Typo corrected: '{word}' -> '{corrected}'")
+            _trace(f"[DEBUG] Typo corrected: '{word}' -> '{corrected}'")
         else:
             normalized.append(word)
     
     return " ".join(normalized)
 
-def detect_language_fast(text: str) -> str:
-    """Detect language with caching"""
-    if not text or len(text.strip()) < 3:
-        return "id"
-    
-    cache_key = text[:200]
-    if cache_key in lang_detection_cache:
-        return lang_detection_cache[cache_key]
-    
+def normalize_typo_series(texts: pd.Series, typo_map=TYPO_MAP) -> pd.Series:
+    """Vectorized normalize_typo for a Series"""
+    return _map_tokens(texts, {k.lower(): v for k, v in typo_map.items() if v})
+
+class LanguageTierCounter:
+    """Counts how many rows each detection tier resolved (thread-safe)"""
+
+    TIERS = ("cache", "short", "heuristic", "langdetect")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.TIERS, 0)
+
+    def add(self, tier, count=1):
+        with self._lock:
+            self._counts[tier] += count
+
+    def merge(self, counts):
+        with self._lock:
+            for tier, count in counts.items():
+                self._counts[tier] = self._counts.get(tier, 0) + count
+
+    def drain(self):
+        with self._lock:
+            counts = self._counts
+            self._counts = dict.fromkeys(self.TIERS, 0)
+        return counts
+
+def _heuristic_language(text: str):
+    """Tier 1: 'id' kalau mayoritas token ada di ID_VOCAB dan tidak ada
+    function word Inggris; None = ambigu"""
+    tokens = text.split()
+    if not tokens or any(token in EN_FUNCTION_WORDS for token in tokens):
+        return None
+    known = sum(token in ID_VOCAB for token in tokens)
+    return "id" if known / len(tokens) >= ID_VOCAB_RATIO else None
+
+def _langdetect(text: str) -> str:
+    """Tier 2: langdetect (lambat)"""
     try:
         lang = detect(text)
-        lang_detection_cache[cache_key] = lang
-        print(f"[DEBUG] Detected language '{lang}' for: {text[:50]}...")
+        _trace(f"[DEBUG] Detected language '{lang}' for: {text[:50]}...")
         return lang
     except Exception as e:
-        print(f"[DEBUG] Language detection failed: {e}")
-        lang_detection_cache[cache_key] = "id"
+        _trace(f"[DEBUG] Language detection failed: {e}")
         return "id"
 
+def _detect_language_tier(text: str):
+    """Return (tier, lang): short -> cache -> heuristic -> langdetect"""
+    if not text or len(text.strip()) < 3:
+        return "short", "id"
+    
+    cached = lang_detection_cache.get(text)
+    if cached is not None:
+        return "cache", cached
+    
+    lang = _heuristic_language(text)
+    tier = "heuristic"
+    if lang is None:
+        lang = _langdetect(text)
+        tier = "langdetect"
+    lang_detection_cache[text] = lang
+    return tier, lang
+
+def detect_language_fast(text: str, tiers=None) -> str:
+    """Detect language with caching: short -> heuristic -> langdetect
+
+    tiers: LanguageTierCounter yang ditambah (None = tidak dihitung). Di dalam
+    run, tier sudah dihitung per baris oleh detect_language_series (translate
+    stage), jadi path per baris tidak menghitung lagi.
+    """
+    tier, lang = _detect_language_tier(text)
+    if tiers is not None:
+        tiers.add(tier)
+    return lang
+
+def detect_language_series(texts: pd.Series, tiers=None) -> pd.Series:
+    """Vectorized tiered detection for a Series (per unique text).
+    tiers: LanguageTierCounter yang ditambah per baris (setiap baris tepat
+    sekali, dengan tier teks uniknya); None = tidak dihitung
+
+    Tier 0 (teks pendek) dan tier 1 (rasio kosakata Indonesia via explode/isin)
+    dihitung sebagai operasi kolom; hanya sisanya yang masuk langdetect.
+    """
+    texts = texts.fillna("").astype(str)
+    unique = pd.Series(texts.unique())
+    langs = pd.Series(None, index=unique.index, dtype=object)
+    
+    cached = unique.map(lang_detection_cache.get)
+    hit = cached.notna()
+    langs[hit] = cached[hit]
+    
+    short = ~hit & (unique.str.strip().str.len() < 3)
+    langs[short] = "id"
+    
+    pending = ~hit & ~short
+    tokens = unique[pending].str.split().explode()
+    if len(tokens):
+        ratio = tokens.isin(ID_VOCAB).groupby(level=0).mean()
+        has_en = tokens.isin(EN_FUNCTION_WORDS).groupby(level=0).any()
+        heuristic = ratio[(ratio >= ID_VOCAB_RATIO) & ~has_en].index
+    else:
+        heuristic = pd.Index([])
+    langs[heuristic] = "id"
+    
+    ambiguous = pending & langs.isna()
+    langs[ambiguous] = unique[ambiguous].map(_langdetect)
+    
+    lang_detection_cache.update(zip(unique[pending], langs[pending]))
+    if tiers is not None:
+        tier = pd.Series("heuristic", index=unique.index, dtype=object)
+        tier[hit] = "cache"
+        tier[short] = "short"
+        tier[ambiguous] = "langdetect"
+        row_tiers = texts.map(dict(zip(unique, tier))).value_counts()
+        tiers.merge({name: int(count) for name, count in row_tiers.items()})
+    return texts.map(dict(zip(unique, langs)))
+
+def set_translation_backend(backend):
+    """Ganti backend translasi (harus punya translate_batch(list) -> list)"""
+    global translation_backend
+    translation_backend = backend
+    translation_cache.clear()
+
 def translate_text_cached(text: str, source_lang: str) -> str:
-    """Translate English text to Indonesian with caching"""
+    """Translate English text to Indonesian with caching (memory -> disk -> backend)"""
     if not text or not text.strip() or source_lang != "en":
         return text
     
-    cache_key = text[:200]
-    if cache_key in translation_cache:
-        print(f"[DEBUG] Using cached translation")
-        return translation_cache[cache_key]
+    cached = translation_cache.get(text)
+    if cached is not None:
+        _trace(f"[DEBUG] Using cached translation")
+        return cached
+    
+    key = text_hash(text)
+    stored = translation_store.get(key)
+    if stored is not None:
+        _trace(f"[DEBUG] Using stored translation")
+        translation_cache[text] = stored
+        return stored
     
     try:
-        print(f"[DEBUG] Translating: {text[:50]}...")
-        result = translator.translate(text)
-        print(f"[DEBUG] Translation result: {result[:50]}...")
-        translation_cache[cache_key] = result
+        _trace(f"[DEBUG] Translating: {text[:50]}...")
+        result = translation_backend.translate_batch([text])[0]
+        _trace(f"[DEBUG] Translation result: {result[:50]}...")
+        translation_cache[text] = result
+        translation_store.put(key, result)
         return result
     except Exception as e:
         print(f"[WARN] Translation failed: {e}")
-        translation_cache[cache_key] = text
+        # gagal: cache di memori saja, run berikutnya dicoba lagi
+        translation_cache[text] = text
+        translation_failures.add(text)
         return text
 
-def detect_and_translate(text: str) -> str:
+def translate_stage(texts: pd.Series, max_workers=4, batch_size=50, tiers=None) -> pd.Series:
+    """Batch translation stage for a whole Series.
+
+    Deteksi bahasa per teks unik (tier dihitung per baris di `tiers`), lalu
+    semua teks 'en' diterjemahkan sekaligus
+    lewat translate_texts (dedup + batch + retry + cache on-disk). Hasilnya juga
+    mengisi translation_cache, jadi detect_and_translate per baris langsung hit.
+    """
+    langs = detect_language_series(texts, tiers)
+    english = pd.unique(texts[langs == "en"]).tolist()
+    mapping, stats = translate_texts(
+        english, translation_backend, translation_store,
+        batch_size=batch_size, max_workers=max_workers
+    )
+    translation_cache.update(mapping)
+    translation_failures.update((text, True) for text in stats["failed_texts"])
+    if english:
+        print(f"[INFO] Translation stage: {stats['unique']} unique EN texts | "
+              f"cached {stats['cached']} | translated {stats['translated']} | "
+              f"failed {stats['failed']} | batches {stats['batches']}")
+    return texts.map(lambda text: mapping.get(text, text))
+
+def detect_and_translate(text: str, tiers=None) -> str:
     """Detect language and translate if needed"""
     if not text or not text.strip():
         return text
     
-    lang = detect_language_fast(text)
+    lang = detect_language_fast(text, tiers)
     
     if lang == "en":
         return translate_text_cached(text, lang)
@@ -449,10 +848,7 @@ def stemming_tokens(tokens: list) -> list:
         if word in positive_words or word in negative_words:
             stemmed.append(word)
         else:
-            try:
-                stemmed.append(stemmer.stem(word))
-            except Exception:
-                stemmed.append(word)
+            stemmed.append(stem_cache.stem(word))
     return stemmed
 
 def replace_negation_with_antonym(text: str, antonym_map=ANTONYM_MAP) -> str:
@@ -477,15 +873,11 @@ def replace_negation_with_antonym(text: str, antonym_map=ANTONYM_MAP) -> str:
             
             # Check stemmed version if no direct match
             if not antonym:
-                try:
-                    next_stem = stemmer.stem(next_word)
-                    antonym = antonym_map.get(next_stem)
-                except Exception:
-                    pass
+                antonym = antonym_map.get(stem_cache.stem(next_word))
             
             if antonym:
                 result.append(antonym)
-                print(f"[DEBUG] Negation handled: '{word} {next_word}' -> '{antonym}'")
+                _trace(f"[DEBUG] Negation handled: '{word} {next_word}' -> '{antonym}'")
                 i += 2
                 continue
         
@@ -497,15 +889,27 @@ def replace_negation_with_antonym(text: str, antonym_map=ANTONYM_MAP) -> str:
 # ========================================
 # MAIN PROCESSING FUNCTION
 # ========================================
-def process_single_comment(row, index, skip_translation=False):
-    """Process a single comment through all preprocessing steps"""
+def process_single_comment(row, index, skip_translation=False, trace=None, timer=None, tiers=None):
+    """Process a single comment through all preprocessing steps
+
+    Tidak ada print per baris kecuali baris ini termasuk sampel trace
+    (index < TRACE_ROWS atau trace=True). Waktu tiap step dicatat di `timer`
+    (None = step_timer global) dan tier deteksi bahasa di `tiers` (None = tidak
+    dihitung; di preprocess_comments_large tier sudah dihitung oleh translate stage).
+    """
+    if trace is None:
+        trace = index < TRACE_ROWS
+    _trace_state.enabled = trace
+    timings = {}
+    clock = time.perf_counter
+    
     try:
         comment = str(row.get("comment", "")).strip()
         row_id = row.get("id", index + 1)
         
-        print(f"\n{'='*60}")
-        print(f"[DEBUG] Processing row {index} (ID: {row_id})")
-        print(f"[DEBUG] Original: {comment[:100]}...")
+        _trace(f"\n{'='*60}")
+        _trace(f"[DEBUG] Processing row {index} (ID: {row_id})")
+        _trace(f"[DEBUG] Original: {comment[:100]}...")
         
         if not comment:
             return {
@@ -523,44 +927,56 @@ def process_single_comment(row, index, skip_translation=False):
             }
         
         # Step 1: Clean text
+        t0 = clock()
         clean = clean_text(comment)
-        print(f"[STEP 1] After cleaning: {clean}")
+        t1 = clock()
+        timings["clean"] = t1 - t0
+        _trace(f"[STEP 1] After cleaning: {clean}")
         
         # Step 2: Normalize typo
         typo_normalized = normalize_typo(clean)
-        print(f"[STEP 2] After typo normalization: {typo_normalized}")
+        t0 = clock()
+        timings["typo"] = t0 - t1
+        _trace(f"[STEP 2] After typo normalization: {typo_normalized}")
         
         # Step 3: Translate
         if skip_translation:
             translated = typo_normalized
-            print(f"[STEP 3] Translation skipped")
+            _trace(f"[STEP 3] Translation skipped")
         else:
-            translated = detect_and_translate(typo_normalized)
-            print(f"[STEP 3] After translation: {translated}")
+            translated = detect_and_translate(typo_normalized, tiers)
+            _trace(f"[STEP 3] After translation: {translated}")
+        t1 = clock()
+        timings["translate"] = t1 - t0
         
         # Step 4: Handle negation
         negation_handled = replace_negation_with_antonym(translated)
-        print(f"[STEP 4] After negation handling: {negation_handled}")
+        t0 = clock()
+        timings["negation"] = t0 - t1
+        _trace(f"[STEP 4] After negation handling: {negation_handled}")
         
         # Step 5: Remove stopwords
         no_stop = remove_stopwords(negation_handled)
-        print(f"[STEP 5] After stopword removal: {no_stop}")
+        t1 = clock()
+        timings["stopword"] = t1 - t0
+        _trace(f"[STEP 5] After stopword removal: {no_stop}")
         
         # Step 6: Tokenize
         tokens = tokenize(no_stop)
-        print(f"[STEP 6] After tokenization: {tokens}")
+        _trace(f"[STEP 6] After tokenization: {tokens}")
         
         # Step 7: Stemming
         stemmed_tokens = stemming_tokens(tokens)
-        print(f"[STEP 7] After stemming: {stemmed_tokens}")
+        timings["stem"] = clock() - t1
+        _trace(f"[STEP 7] After stemming: {stemmed_tokens}")
         
         # Final result
         stemmed_text = " ".join(stemmed_tokens)
         word_count = len(stemmed_tokens)
         final_text = stemmed_text
         
-        print(f"[FINAL] Result: {final_text}")
-        print(f"[FINAL] Word count: {word_count}")
+        _trace(f"[FINAL] Result: {final_text}")
+        _trace(f"[FINAL] Word count: {word_count}")
         
         return {
             "id": row_id,
@@ -592,8 +1008,368 @@ def process_single_comment(row, index, skip_translation=False):
             "tokens": [],
             "stemmed": "",
             "wordCount": 0,
-            "finalText": ""
+            "finalText": "",
+            "error": True  # fallback: tidak masuk record cache, tidak ditulis ke output
         }
+    finally:
+        _trace_state.enabled = False
+        if timings:
+            (step_timer if timer is None else timer).add_many(timings)
+
+
+# ========================================
+# INFERENCE PREPROCESSING (prediksi)
+# ========================================
+# LRU hasil preprocess_for_prediction (teks yang sama sering diprediksi ulang)
+PREDICTION_CACHE_SIZE = 4096
+_prediction_cache = OrderedDict()
+_prediction_cache_lock = threading.Lock()
+PREDICTION_STEPS = ("cleanText", "typoNormalized", "translated", "negationHandled", "noStopword", "finalText")
+
+
+def preprocess_for_prediction(text, translate=False, return_steps=False):
+    """Preprocess satu teks untuk prediksi; hasil = finalText seperti saat training.
+
+    Step sama dengan process_single_comment (clean, typo, negation, stopword,
+    stemming) memakai kamus, stopword remover dan stem cache yang sudah ada di
+    memori, tanpa trace/timer per baris. Translasi (request jaringan) mati
+    secara default; translate=True memakai detect_and_translate + cache-nya.
+    return_steps=True -> dict hasil per step (kolom sama dengan output training)
+    """
+    comment = str(text if text is not None else "").strip()
+    key = (comment, bool(translate))
+    with _prediction_cache_lock:
+        steps = _prediction_cache.get(key)
+        if steps is not None:
+            _prediction_cache.move_to_end(key)
+    
+    if steps is None:
+        steps = dict.fromkeys(PREDICTION_STEPS, "")
+        if comment:
+            steps["cleanText"] = clean_text(comment)
+            steps["typoNormalized"] = normalize_typo(steps["cleanText"])
+            steps["translated"] = (
+                detect_and_translate(steps["typoNormalized"]) if translate else steps["typoNormalized"]
+            )
+            steps["negationHandled"] = replace_negation_with_antonym(steps["translated"])
+            steps["noStopword"] = remove_stopwords(steps["negationHandled"])
+            steps["finalText"] = " ".join(stemming_tokens(tokenize(steps["noStopword"])))
+        with _prediction_cache_lock:
+            _prediction_cache[key] = steps
+            if len(_prediction_cache) > PREDICTION_CACHE_SIZE:
+                _prediction_cache.popitem(last=False)
+    
+    return dict(steps) if return_steps else steps["finalText"]
+
+
+# ========================================
+# VECTORIZED (SERIES-LEVEL) PIPELINE
+# ========================================
+def _map_unique(texts: pd.Series, func) -> pd.Series:
+    """Per-row fallback: apply `func` once per unique text, then map back"""
+    uniques = pd.unique(texts)
+    return texts.map(dict(zip(uniques, (func(t) for t in uniques))))
+
+
+def _map_tokens(texts: pd.Series, mapping: dict) -> pd.Series:
+    """Split texts into tokens, replace tokens found in `mapping` in one
+    vectorized pass, and join them back. Empty texts stay empty.
+    """
+    tokens = texts.str.split().explode().dropna()
+    if tokens.empty:
+        return pd.Series("", index=texts.index, dtype=object)
+    mapped = tokens.map(mapping).fillna(tokens)
+    joined = mapped.groupby(level=0, sort=False).agg(" ".join)
+    return joined.reindex(texts.index, fill_value="")
+
+
+def _stem_mapping(texts: pd.Series) -> dict:
+    """Stem every unique token of `texts` once (sentiment words kept as-is)"""
+    vocabulary = pd.unique(texts.str.split().explode().dropna())
+    return {
+        word: word if word in positive_words or word in negative_words else stem_cache.stem(word)
+        for word in vocabulary
+    }
+
+
+def preprocess_series(
+    comments: pd.Series, skip_translation=False, ids=None, trace_rows=None, timer=None, tiers=None
+) -> pd.DataFrame:
+    """Batch version of process_single_comment for a whole Series.
+
+    clean_text, typo normalization, tokenization and stemming run as column
+    operations (.str methods + token-level mapping over unique vocabulary).
+    Translation, negation handling and Sastrawi's stopword remover stay
+    per-row because they depend on word order; they run once per *unique*
+    text. Output columns match process_single_comment.
+    timer: StepTimer run ini (None = step_timer global)
+    tiers: LanguageTierCounter run ini, satu hitungan per baris (None = tidak dihitung)
+    """
+    comments = comments.fillna("").astype(str).str.strip().reset_index(drop=True)
+    if ids is None:
+        ids = pd.Series(range(1, len(comments) + 1))
+    else:
+        ids = pd.Series(ids).reset_index(drop=True)
+    
+    timings = {}
+    clock = time.perf_counter
+    
+    # Step 1: Clean text
+    t0 = clock()
+    clean = clean_text_series(comments)
+    t1 = clock()
+    timings["clean"] = t1 - t0
+    
+    # Step 2: Normalize typo (vectorized token mapping)
+    typo_normalized = normalize_typo_series(clean)
+    t0 = clock()
+    timings["typo"] = t0 - t1
+    
+    # Step 3: Translate (batch stage, per unique EN text)
+    if skip_translation:
+        translated = typo_normalized
+    else:
+        translated = translate_stage(typo_normalized, tiers=tiers)
+    t1 = clock()
+    timings["translate"] = t1 - t0
+    
+    # Step 4: Handle negation (per unique text, depends on word pairs)
+    negation_handled = _map_unique(translated, replace_negation_with_antonym)
+    t0 = clock()
+    timings["negation"] = t0 - t1
+    
+    # Step 5: Remove stopwords (per unique text, keeps Sastrawi semantics)
+    no_stop = _map_unique(negation_handled, remove_stopwords)
+    t1 = clock()
+    timings["stopword"] = t1 - t0
+    
+    # Step 6: Tokenize
+    tokens = no_stop.str.split()
+    
+    # Step 7: Stemming (each unique word stemmed once)
+    stemmed = _map_tokens(no_stop, _stem_mapping(no_stop))
+    timings["stem"] = clock() - t1
+    (step_timer if timer is None else timer).add_many(timings, count=len(comments))
+    
+    out = pd.DataFrame({
+        "id": ids,
+        "comment": comments,
+        "cleanText": clean,
+        "typoNormalized": typo_normalized,
+        "translated": translated,
+        "negationHandled": negation_handled,
+        "noStopword": no_stop,
+        "tokens": tokens,
+        "stemmed": stemmed,
+        "wordCount": tokens.str.len(),
+        "finalText": stemmed
+    })
+    
+    # Komentar kosong -> semua kolom kosong (sama dengan process_single_comment)
+    empty = comments == ""
+    if empty.any():
+        text_cols = ["cleanText", "typoNormalized", "translated", "negationHandled", "noStopword", "stemmed", "finalText"]
+        out.loc[empty, text_cols] = ""
+        out.loc[empty, "wordCount"] = 0
+        out.loc[empty, "tokens"] = pd.Series([[] for _ in range(int(empty.sum()))], index=out.index[empty])
+    
+    # Trace sampel baris (kolom per step), default mati
+    if trace_rows is None:
+        trace_rows = TRACE_ROWS
+    for record in out.head(trace_rows).to_dict("records"):
+        print(f"\n{'='*60}")
+        for column, value in record.items():
+            print(f"[TRACE] {column}: {value}")
+    return out
+
+
+# ========================================
+# PROCESS POOL WORKERS
+# ========================================
+def _init_process_worker(stem_cache_path=None):
+    """Initializer for process-pool workers.
+
+    Dictionaries, word lists and the Sastrawi stemmer are built at module
+    import time, so each worker process pays that cost exactly once here
+    instead of once per row. The stem cache starts warm from disk.
+    """
+    DetectorFactory.seed = 0
+    stem_cache.load(stem_cache_path)
+    stem_cache.track_new = True
+    print(f"[INFO] Worker {os.getpid()} ready "
+          f"(typo={len(TYPO_MAP)}, antonym={len(ANTONYM_MAP)}, "
+          f"lexicon={len(positive_words) + len(negative_words)})")
+
+
+def _process_chunk(records, start_index, skip_translation=False, lang_hints=None, trace_rows=0):
+    """Process a contiguous chunk of rows inside a worker process.
+    lang_hints: {text: lang} already detected in the main process.
+    trace_rows: rows with index < trace_rows are traced.
+    Returns (results, new_stems, step_stats, tier_counts); results keep the order of `records`.
+    """
+    if lang_hints:
+        lang_detection_cache.update(lang_hints)
+    timer = StepTimer()
+    results = [
+        process_single_comment(row, start_index + offset, skip_translation, start_index + offset < trace_rows, timer)
+        for offset, row in enumerate(records)
+    ]
+    return results, stem_cache.drain_new(), timer.drain()
+
+
+def _report_progress(completed, total, start_time, batch_size, last_reported):
+    """Print progress line every `batch_size` rows, returns last reported count"""
+    if completed - last_reported >= batch_size or completed == total:
+        elapsed = time.time() - start_time
+        rate = completed / elapsed if elapsed > 0 else 0
+        eta = (total - completed) / rate if rate > 0 else 0
+        print(f"Progress: {completed}/{total} | Speed: {rate:.1f} items/sec | ETA: {int(eta)}s")
+        return completed
+    return last_reported
+
+
+def _iter_frame_results(
+    df, start_index, executor, use_processes, skip_translation, chunk_size, normalized=None, trace_rows=0,
+    timer=None
+):
+    """Run one DataFrame through the executor.
+    normalized: typo-normalized texts of `df` (dipakai untuk lang_hints ke worker).
+    trace_rows: rows with index < trace_rows are traced (per run, not global).
+    timer: StepTimer run ini; timing dari worker di-merge ke sini.
+    Tier bahasa tidak dihitung di sini (sudah per baris di translate stage).
+    Yields (results, rows_done) per finished task, always in input order.
+    """
+    if use_processes:
+        records = df.to_dict("records")
+        futures = []
+        for offset in range(0, len(records), chunk_size):
+            chunk = records[offset:offset + chunk_size]
+            start = start_index + offset
+            lang_hints = None
+            if normalized is not None:
+                lang_hints = {
+                    text: lang
+                    for text, lang in (
+                        (text, lang_detection_cache.get(text))
+                        for text in normalized.iloc[offset:offset + chunk_size]
+                    )
+                    if lang is not None
+                }
+            futures.append((start, chunk, executor.submit(
+                _process_chunk, chunk, start, skip_translation, lang_hints, trace_rows
+            )))
+        
+        # collect in submission order -> output keeps input order
+        for start, chunk, future in futures:
+            try:
+                chunk_results, new_stems, step_stats = future.result()
+                stem_cache.update(new_stems)
+                timer.merge(step_stats)
+            except Exception as e:
+                print(f"[ERROR] Chunk starting at row {start} failed in worker: {e}. Retrying in main process.")
+                chunk_results = [
+                    process_single_comment(
+                        row, start + offset, skip_translation, start + offset < trace_rows, timer
+                    )
+                    for offset, row in enumerate(chunk)
+                ]
+            yield chunk_results, len(chunk)
+    else:
+        futures = []
+        for i, (_, row) in enumerate(df.iterrows()):
+            index = start_index + i
+            futures.append(executor.submit(
+                process_single_comment, row, index, skip_translation, index < trace_rows, timer
+            ))
+        
+        for future in futures:
+            try:
+                result = future.result(timeout=60)
+            except Exception as e:
+                print(f"[ERROR] Task failed: {e}")
+                result = None
+            yield ([result] if result else []), 1
+
+
+def _count_csv_rows(path, chunk_rows):
+    """Count data rows without holding the file in memory (quoted newlines aware)"""
+    total = 0
+    for chunk in pd.read_csv(path, usecols=[0], chunksize=chunk_rows):
+        total += len(chunk)
+    return total
+
+
+# ========================================
+# RECORD CACHE (hasil preprocessing lintas run)
+# ========================================
+def dictionary_fingerprint() -> str:
+    """Hash of the dictionary files + PIPELINE_VERSION.
+
+    Berubah otomatis kalau typo_dict.json, Positive.csv, Negative.csv atau
+    kamus antonim diedit, sehingga record cache lama tidak dipakai lagi.
+    """
+    digest = hashlib.sha256(f"pipeline={PIPELINE_VERSION}".encode("utf-8"))
+    for path in (TYPO_JSON_PATH, POSITIVE_CSV, NEGATIVE_CSV, ANTONYM_JSON_PATH):
+        digest.update(f"|{path}:".encode("utf-8"))
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        else:
+            digest.update(b"missing")
+    return digest.hexdigest()
+
+
+class RecordCache:
+    """Content-addressed cache of process_single_comment output records.
+
+    Key = SHA-256(skip_translation + teks komentar). Fingerprint kamus disimpan
+    di tabel meta; kalau berbeda, semua record lama dihapus.
+    """
+
+    def __init__(self, path=RECORD_CACHE_PATH, fingerprint=None):
+        self.records = SqliteKVStore(path, table="records")
+        self.meta = SqliteKVStore(path, table="meta")
+        self.fingerprint = fingerprint or dictionary_fingerprint()
+        if self.meta.get("fingerprint") != self.fingerprint:
+            if len(self.records):
+                print(f"[INFO] Dictionaries or pipeline changed, clearing record cache {path}")
+            self.records.clear()
+            self.meta.put("fingerprint", self.fingerprint)
+
+    @staticmethod
+    def key(comment: str, skip_translation: bool) -> str:
+        return text_hash(f"{int(bool(skip_translation))}\x00{comment}")
+
+    def lookup(self, comments: pd.Series, skip_translation: bool):
+        """Return (keys, {position: record}) for the cached comments"""
+        keys = [self.key(comment, skip_translation) for comment in comments]
+        stored = self.records.get_many(set(keys))
+        hits = {pos: json.loads(stored[key]) for pos, key in enumerate(keys) if key in stored}
+        return keys, hits
+
+    def store(self, items):
+        """items: iterable of (key, record); record 'id' is not stored"""
+        rows = []
+        for key, record in items:
+            # finalText kosong (komentar habis setelah cleaning) tetap di-cache
+            if record.get("error"):
+                continue  # processing gagal (mis. error langdetect/Sastrawi), coba lagi di run berikutnya
+            if record.get("typoNormalized") in translation_failures:
+                continue  # translasi gagal, coba lagi di run berikutnya
+            value = {k: v for k, v in record.items() if k != "id"}
+            rows.append((key, json.dumps(value, ensure_ascii=False)))
+        self.records.put_many(rows)
+        return len(rows)
+
+
+def _default_output_path(input_path):
+    """GetComments_20251226_112400.csv → GetProcessed_20251226_112400.csv"""
+    if "_" in input_path and input_path.startswith("GetComments_"):
+        timestamp = input_path.replace("GetComments_", "").replace(".csv", "")
+    else:
+        # Fallback: generate new timestamp
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f"GetProcessed_{timestamp}.csv"
 
 
 # PreProcessing.py - Update function preprocess_comments_large
@@ -603,78 +1379,230 @@ def preprocess_comments_large(
     output_path=None,  # ✅ NEW: Custom output path
     num_workers=8,
     batch_size=100,
-    skip_translation=False
+    skip_translation=False,
+    use_processes=False,
+    chunk_size=None,
+    stem_cache_path=STEM_CACHE_PATH,
+    stream=False,
+    stream_chunk_rows=5000,
+    vectorized=False,
+    trace_rows=None,
+    record_cache_path=RECORD_CACHE_PATH,
+    progress_callback=None
 ):
-    global progress_state
+    """Preprocess a comments CSV in parallel.
+
+    use_processes=False -> ThreadPoolExecutor, one task per row (default)
+    use_processes=True  -> ProcessPoolExecutor, contiguous chunks of
+                           `chunk_size` rows per task (bypasses the GIL)
+    stem_cache_path     -> JSON file for the persistent stem cache
+                           (None = in-memory only)
+    stream=True         -> read the CSV `stream_chunk_rows` rows at a time and
+                           append each processed chunk to the output file;
+                           memory stays flat and "data" is not returned
+    vectorized=True     -> run each frame through preprocess_series (column
+                           operations) in this process instead of the pool
+    trace_rows=N        -> verbose per-step trace for the first N rows only
+                           (default: PREPROCESS_TRACE_ROWS env, 0 = no per-row I/O)
+    record_cache_path   -> SQLite file caching finished records across runs;
+                           only uncached comments are processed (None = off)
+    progress_callback   -> called as progress_callback(completed, total) after
+                           every finished task; an exception raised by it
+                           (e.g. JobCancelled) stops the run and drops queued tasks.
+                           None = the run registers itself in progress_registry
+    """
     print(f"[INFO] Start preprocessing from {input_path}")
     start_time = time.time()
     
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"Input file not found: {input_path}")
     
-    df = pd.read_csv(input_path)
-    df["comment"] = df["comment"].fillna("")
-    total = len(df)
+    # ✅ Generate output path dengan timestamp jika tidak disediakan
+    if output_path is None:
+        output_path = _default_output_path(input_path)
+    
+    if stream:
+        total = _count_csv_rows(input_path, stream_chunk_rows)
+        frames = pd.read_csv(input_path, chunksize=stream_chunk_rows)
+    else:
+        df = pd.read_csv(input_path)
+        total = len(df)
+        frames = [df]
+    
+    own_run = progress_callback is None
+    if own_run:
+        run_id = progress_registry.start(stage="preprocess", total=total)
+        progress_callback = progress_registry.callback(run_id, "preprocess")
+    progress_callback(0, total)
+    mode = "vectorized" if vectorized else ("process" if use_processes else "thread")
+    print(f"[INFO] Total comments: {total} | Workers: {num_workers} ({mode}) | "
+          f"SkipTranslation: {skip_translation} | Stream: {stream}")
     
-    progress_state = {"current": 0, "total": total, "status": "processing"}
-    print(f"[INFO] Total comments: {total} | Workers: {num_workers} | SkipTranslation: {skip_translation}")
+    # trace_rows hanya berlaku untuk run ini (tidak mengubah TRACE_ROWS global)
+    trace_rows = TRACE_ROWS if trace_rows is None else max(0, int(trace_rows))
+    # Timer & tier counter per run (run lain bisa berjalan bersamaan lewat job queue)
+    timer = StepTimer()
+    tiers = LanguageTierCounter()
+    
+    if stem_cache_path and len(stem_cache) == 0:
+        stem_cache.load(stem_cache_path)
+    
+    record_cache = RecordCache(record_cache_path) if record_cache_path else None
+    record_hits = 0
+    record_stored = 0
     
     results = []
+    completed = 0
+    written = 0
+    last_reported = 0
     
-    # parallel processing
-    with ThreadPoolExecutor(max_workers=num_workers) as executor:
-        futures = []
-        for i, (_, row) in enumerate(df.iterrows()):
-            futures.append(executor.submit(process_single_comment, row, i, skip_translation))
-        
-        completed = 0
-        for future in futures:
-            try:
-                result = future.result(timeout=60)
-            except Exception as e:
-                print(f"[ERROR] Task failed: {e}")
-                result = None
+    if vectorized:
+        executor = contextlib.nullcontext()
+    elif use_processes:
+        executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_process_worker,
+            initargs=(stem_cache_path,)
+        )
+    else:
+        executor = ThreadPoolExecutor(max_workers=num_workers)
+    
+    with executor:
+        start_index = 0
+        for frame in frames:
+            frame["comment"] = frame["comment"].fillna("")
+            if "id" not in frame.columns:
+                # id default = nomor baris (sama dengan process_single_comment)
+                frame.insert(0, "id", range(start_index + 1, start_index + len(frame) + 1))
+            frame_results = [] if stream else results
             
-            if result:
-                results.append(result)
+            # Record cache: hanya komentar yang belum pernah diproses yang dikerjakan
+            slots, work = None, frame
+            if record_cache is not None:
+                keys, slots = record_cache.lookup(frame["comment"].astype(str).str.strip(), skip_translation)
+                frame_ids = frame["id"].tolist()
+                for pos, record in slots.items():
+                    slots[pos] = {"id": frame_ids[pos], **record}
+                misses = [pos for pos in range(len(frame)) if pos not in slots]
+                work = frame.iloc[misses]
+                record_hits += len(slots)
+                completed += len(slots)
+                if slots:
+                    progress_callback(completed, total)
             
-            completed += 1
-            progress_state["current"] = completed
+            # contiguous chunks, a few per worker so slow chunks don't stall the pool
+            frame_chunk_size = chunk_size or max(1, math.ceil(len(work) / (max(1, num_workers) * 4)))
             
-            if completed % batch_size == 0 or completed == total:
-                elapsed = time.time() - start_time
-                rate = completed / elapsed if elapsed > 0 else 0
-                eta = (total - completed) / rate if rate > 0 else 0
-                print(f"Progress: {completed}/{total} | Speed: {rate:.1f} items/sec | ETA: {int(eta)}s")
-    
-    # sort by id
-    results.sort(key=lambda x: x["id"])
-    df_out = pd.DataFrame(results)
+            if len(work) == 0:
+                tasks = []
+            elif vectorized:
+                frame_out = preprocess_series(
+                    work["comment"], skip_translation, work["id"], trace_rows=max(0, trace_rows - start_index),
+                    timer=timer, tiers=tiers
+                )
+                tasks = [(frame_out.to_dict("records"), len(work))]
+            else:
+                normalized = None
+                if not skip_translation:
+                    # batch translation stage dulu; step 3 per baris lalu hit cache (memori / disk)
+                    normalized = normalize_typo_series(clean_text_series(work["comment"].astype(str).str.strip()))
+                    translate_stage(normalized, tiers=tiers)
+                tasks = _iter_frame_results(
+                    work, start_index, executor, use_processes, skip_translation, frame_chunk_size, normalized,
+                    trace_rows, timer
+                )
+            
+            pointer = 0
+            new_records = []
+            for task_results, rows_done in tasks:
+                if slots is None:
+                    frame_results.extend(task_results)
+                else:
+                    # task results are in input order; failed rows come back empty
+                    if len(task_results) == rows_done:
+                        for pos, record in zip(misses[pointer:pointer + rows_done], task_results):
+                            slots[pos] = record
+                            new_records.append((keys[pos], record))
+                    pointer += rows_done
+                completed += rows_done
+                last_reported = _report_progress(completed, total, start_time, batch_size, last_reported)
+                try:
+                    progress_callback(completed, total)
+                except BaseException:
+                    # dihentikan dari luar (mis. job di-cancel): task yang belum jalan dibuang
+                    if not vectorized:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+            
+            if slots is not None:
+                frame_results.extend(slots[pos] for pos in sorted(slots))
+                record_stored += record_cache.store(new_records)
+            
+            if stream and frame_results:
+                # append chunk; header only for the first written chunk
+                pd.DataFrame(frame_results).drop(columns="error", errors="ignore").to_csv(
+                    output_path,
+                    mode="a" if written else "w",
+                    header=not written,
+                    index=False,
+                    encoding="utf-8"
+                )
+                written += len(frame_results)
+            
+            start_index += len(frame)
     
-    # ✅ Generate output path dengan timestamp jika tidak disediakan
-    if output_path is None:
-        # GetComments_20251226_112400.csv → GetProcessed_20251226_112400.csv
-        if "_" in input_path and input_path.startswith("GetComments_"):
-            timestamp = input_path.replace("GetComments_", "").replace(".csv", "")
-            output_path = f"GetProcessed_{timestamp}.csv"
-        else:
-            # Fallback: generate new timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_path = f"GetProcessed_{timestamp}.csv"
+    if not stream:
+        # sort by id
+        results.sort(key=lambda x: x["id"])
+        pd.DataFrame(results).drop(columns="error", errors="ignore").to_csv(output_path, index=False, encoding="utf-8")
+        written = len(results)
+    elif written == 0:
+        pd.DataFrame().to_csv(output_path, index=False, encoding="utf-8")
     
-    df_out.to_csv(output_path, index=False, encoding="utf-8")
+    stem_cache.save(stem_cache_path)
     
     elapsed = time.time() - start_time
-    progress_state["status"] = "done"
+    if own_run:
+        progress_registry.finish(run_id)
+    cache_stats = stem_cache.stats()
+    step_timings = timer.summary(timer.drain())
+    tier_counts = tiers.drain()
     
     print("\n" + "="*60)
     print("✓ Preprocessing FINISHED")
     print(f"Total comments: {total}")
     print(f"Time elapsed: {elapsed:.2f} seconds")
+    print(f"Stem cache: {cache_stats['size']} words | hit rate (main process): {cache_stats['hit_rate']:.2%}")
+    print("Language detection tiers: " + " | ".join(f"{tier}={count}" for tier, count in tier_counts.items()))
+    if record_cache is not None:
+        print(f"Record cache: {record_hits} hits | {record_stored} new records stored")
+    for step, stat in step_timings.items():
+        print(f"  {step:<10} {stat['total_seconds']:>10.3f}s | {stat['avg_ms']:.3f} ms/row")
     print(f"Output saved: {output_path}")
     print("="*60)
     
-    return {"file": output_path, "data": results, "time_elapsed": elapsed}
+    return {
+        "file": output_path,
+        "data": results,
+        "total_written": written,
+        "time_elapsed": elapsed,
+        "stem_cache": cache_stats,
+        "step_timings": step_timings,
+        "language_tiers": tier_counts,
+        "record_cache": {"hits": record_hits, "stored": record_stored}
+    }
 
 def get_progress():
-    return progress_state
\ No newline at end of file
+    """Progress run preprocessing terbaru (format lama untuk endpoint /progress)"""
+    run = progress_registry.latest(stage="preprocess")
+    if run is None:
+        return {"current": 0, "total": 0, "status": "idle", "percentage": 0}
+    return {
+        "run_id": run["run_id"],
+        "current": run["current"],
+        "total": run["total"],
+        "status": "processing" if run["status"] == "running" else run["status"],
+        "percentage": run["percentage"],
+        "rate_per_sec": run["rate_per_sec"],
+        "eta_seconds": run["eta_seconds"]
+    }
\ No newline at end of file
@@ -3,7 +3,11 @@ import numpy as np
 from collections import Counter
 import joblib
 from sklearn.decomposition import PCA
+from sklearn.metrics import pairwise_distances_chunked
+from sklearn.metrics.pairwise import euclidean_distances
 import os
+import threading
+from collections import OrderedDict
 
 # Import untuk balancing menggunakan imbalanced-learn
 try:
@@ -14,6 +18,201 @@ except ImportError:
     IMBLEARN_AVAILABLE = False
     print("Warning: imbalanced-learn not installed. Install with: pip install imbalanced-learn")
 
+# Approximate nearest neighbour (opsional)
+try:
+    from pynndescent import NNDescent
+    PYNNDESCENT_AVAILABLE = True
+except ImportError:
+    PYNNDESCENT_AVAILABLE = False
+
+# Jumlah tetangga per sampel yang disimpan di neighbour graph
+NEIGHBOR_GRAPH_K = int(os.getenv("NEIGHBOR_GRAPH_K", "10"))
+# "exact" (brute force euclidean di CSR) atau "approximate" (pynndescent)
+NEIGHBOR_GRAPH_METHOD = os.getenv("NEIGHBOR_GRAPH_METHOD", "exact")
+# Jumlah graph yang disimpan di memori
+NEIGHBOR_GRAPH_CACHE_SIZE = 4
+# Memori kerja per chunk jarak (MB) saat build exact
+NEIGHBOR_GRAPH_WORKING_MEMORY = 256
+
+
+# ============================================================
+# NEIGHBOUR GRAPH (TOMEK LINKS)
+# ============================================================
+# TomekLinks hanya butuh 1-NN tiap sampel di dalam data train. Graph top-K
+# tetangga (jarak euclidean, sama dengan TomekLinks) dihitung sekali per matrix
+# TF-IDF; 1-NN di subset train mana pun dibaca dari graph dengan menyaring
+# tetangga yang ikut subset tsb. Sampel yang tetangganya di graph tidak cukup
+# dihitung ulang langsung (brute force ke subset).
+# Seperti TomekLinks (kneighbors(X)[:, 1]): urutan (jarak, index) termasuk diri
+# sendiri di jarak 0, dan 1-NN = elemen kedua -> duplikat persis ikut konsisten.
+# Beda dengan TomekLinks hanya mungkin di tie jarak lain (mis. baris TF-IDF
+# kosong), yang urutannya di sklearn tidak ditentukan.
+
+class NeighborGraph:
+    """K+1 tetangga terdekat (termasuk diri sendiri) untuk setiap baris matrix"""
+
+    def __init__(self, indices, distances, method="exact"):
+        self.indices = indices  # (n, K+1) int32, urut (jarak, index) naik
+        self.distances = distances  # (n, K+1) float32
+        self.method = method
+
+    @property
+    def n_samples(self):
+        return self.indices.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.indices.nbytes + self.distances.nbytes
+
+
+def _exact_neighbor_graph(X, n_neighbors):
+    n = X.shape[0]
+    k = min(n_neighbors + 1, n)
+    
+    def reduce_func(D_chunk, start):
+        rows = np.arange(D_chunk.shape[0])
+        D_chunk[rows, start + rows] = 0.0
+        kth = np.partition(D_chunk, k - 1, axis=1)[:, k - 1]
+        indices = np.empty((len(rows), k), dtype=np.int32)
+        distances = np.empty((len(rows), k), dtype=np.float32)
+        for row in rows:
+            # kandidat < jarak ke-K + yang sama dengan jarak ke-K (index terkecil dulu),
+            # urut (jarak, index) supaya tie deterministik
+            closer = np.flatnonzero(D_chunk[row] < kth[row])
+            tied = np.flatnonzero(D_chunk[row] == kth[row])[:k - len(closer)]
+            candidates = np.concatenate((closer, tied))
+            order = np.lexsort((candidates, D_chunk[row, candidates]))
+            indices[row] = candidates[order]
+            distances[row] = D_chunk[row, candidates[order]]
+        return indices, distances
+    
+    chunks = list(pairwise_distances_chunked(
+        X, reduce_func=reduce_func, metric="euclidean",
+        working_memory=NEIGHBOR_GRAPH_WORKING_MEMORY
+    ))
+    return np.vstack([c[0] for c in chunks]), np.vstack([c[1] for c in chunks])
+
+
+def _approximate_neighbor_graph(X, n_neighbors, random_state=42):
+    n = X.shape[0]
+    k = min(n_neighbors + 1, n)
+    index = NNDescent(X, metric="euclidean", n_neighbors=k, random_state=random_state)
+    all_indices, all_distances = index.neighbor_graph
+    indices = np.empty((n, k), dtype=np.int32)
+    distances = np.zeros((n, k), dtype=np.float32)
+    for row in range(n):
+        # diri sendiri selalu di depan (jarak 0)
+        keep = all_indices[row] != row
+        indices[row] = np.concatenate(([row], all_indices[row][keep]))[:k]
+        distances[row, 1:] = all_distances[row][keep][:k - 1]
+    return indices, distances
+
+
+def build_neighbor_graph(X, n_neighbors=NEIGHBOR_GRAPH_K, method=NEIGHBOR_GRAPH_METHOD):
+    """
+    Hitung neighbour graph untuk matrix X (CSR)
+    
+    Parameters:
+    - n_neighbors: jumlah tetangga per sampel
+    - method: "exact" atau "approximate" (butuh pynndescent, fallback ke exact)
+    """
+    import time
+    start = time.time()
+    if X.shape[0] < 2:
+        raise ValueError("Neighbour graph needs at least 2 samples")
+    if method == "approximate" and not PYNNDESCENT_AVAILABLE:
+        print("[WARN] pynndescent not installed, neighbour graph uses exact search")
+        method = "exact"
+    if method == "approximate":
+        indices, distances = _approximate_neighbor_graph(X, n_neighbors)
+    else:
+        indices, distances = _exact_neighbor_graph(X, n_neighbors)
+    print(f"[INFO] Neighbour graph built ({method}, {X.shape[0]} x {indices.shape[1] - 1}) in {time.time() - start:.2f}s")
+    return NeighborGraph(indices, distances, method)
+
+
+_graph_cache = OrderedDict()  # (path, mtime_ns, shape, K, method) -> NeighborGraph
+_graph_cache_lock = threading.Lock()
+_graph_build_locks = {}
+
+
+def get_neighbor_graph(X, matrix_path=None, n_neighbors=NEIGHBOR_GRAPH_K, method=NEIGHBOR_GRAPH_METHOD):
+    """
+    Neighbour graph untuk X, di-cache per file matrix TF-IDF (dibangun ulang jika mtime berubah).
+    matrix_path=None -> dihitung tanpa cache
+    """
+    if not matrix_path or not os.path.exists(matrix_path):
+        return build_neighbor_graph(X, n_neighbors, method)
+    path = os.path.normpath(matrix_path)
+    key = (path, os.stat(path).st_mtime_ns, X.shape, n_neighbors, method)
+    with _graph_cache_lock:
+        if key in _graph_cache:
+            _graph_cache.move_to_end(key)
+            return _graph_cache[key]
+        build_lock = _graph_build_locks.setdefault(key, threading.Lock())
+    # satu thread yang build per matrix, request lain menunggu hasilnya
+    with build_lock:
+        with _graph_cache_lock:
+            if key in _graph_cache:
+                _graph_cache.move_to_end(key)
+                return _graph_cache[key]
+        graph = build_neighbor_graph(X, n_neighbors, method)
+        with _graph_cache_lock:
+            # graph lama dari file yang sama (mtime berbeda) tidak terpakai lagi
+            for old_key in [k for k in _graph_cache if k[0] == path and k[1] != key[1]]:
+                del _graph_cache[old_key]
+            _graph_cache[key] = graph
+            while len(_graph_cache) > NEIGHBOR_GRAPH_CACHE_SIZE:
+                _graph_cache.popitem(last=False)
+            _graph_build_locks.pop(key, None)
+        return graph
+
+
+def tomek_links_mask(graph, X, y, rows=None):
+    """
+    Mask Tomek links (sampling_strategy='all') untuk subset X[rows], y[rows]
+    memakai neighbour graph; hasil sama dengan TomekLinks pada subset tsb.
+    Return: bool array sepanjang rows, True = sampel bagian dari Tomek link
+    """
+    n = graph.n_samples
+    y = np.asarray(y)
+    rows = np.arange(n) if rows is None else np.asarray(rows)
+    m = len(rows)
+    if m < 2:
+        return np.zeros(m, dtype=bool)
+    
+    in_rows = np.zeros(n, dtype=bool)
+    in_rows[rows] = True
+    candidates = graph.indices[rows]
+    hit_count = np.cumsum(in_rows[candidates], axis=1)
+    second = (hit_count == 2).argmax(axis=1)
+    nn = candidates[np.arange(m), second].astype(np.int64)
+    
+    # kurang dari 2 tetangga graph di dalam subset -> cari langsung di subset
+    missing = np.flatnonzero(hit_count[:, -1] < 2)
+    if len(missing):
+        subset = np.sort(rows)
+        D = euclidean_distances(X[rows[missing]], X[subset])
+        D[subset[None, :] == rows[missing][:, None]] = 0.0
+        nn[missing] = subset[np.argsort(D, axis=1, kind="stable")[:, 1]]
+    
+    position = np.full(n, -1, dtype=np.int64)
+    position[rows] = np.arange(m)
+    nn_local = position[nn]
+    y_rows = y[rows]
+    return (y_rows != y_rows[nn_local]) & (nn_local[nn_local] == np.arange(m))
+
+
+def _take(y, indices):
+    return y.iloc[indices] if hasattr(y, "iloc") else np.asarray(y)[indices]
+
+
+def apply_tomek_links(X, y, graph, rows=None):
+    """TomekLinks(sampling_strategy='all').fit_resample(X[rows], y[rows]) via neighbour graph"""
+    rows = np.arange(X.shape[0]) if rows is None else np.asarray(rows)
+    keep = rows[~tomek_links_mask(graph, X, y, rows)]
+    return X[keep], _take(y, keep)
+
 
 def load_full_data():
     """
@@ -113,7 +312,7 @@ def create_balancing_pipeline(random_state=42):
     return balancing_pipeline
 
 
-def apply_balancing_to_data(X, y, random_state=42):
+def apply_balancing_to_data(X, y, random_state=42, graph=None):
     """
     Terapkan balancing (Tomek Links + Random Undersampling) pada data
     
@@ -121,6 +320,7 @@ def apply_balancing_to_data(X, y, random_state=42):
     - X: Feature matrix (TF-IDF)
     - y: Labels
     - random_state: Random seed
+    - graph: NeighborGraph untuk X (opsional, Tomek links tanpa nearest-neighbour search ulang)
     
     Returns:
     - X_balanced, y_balanced
@@ -128,6 +328,11 @@ def apply_balancing_to_data(X, y, random_state=42):
     if not IMBLEARN_AVAILABLE:
         raise ImportError("imbalanced-learn package is required. Install with: pip install imbalanced-learn")
     
+    if graph is not None:
+        X_tomek, y_tomek = apply_tomek_links(X, y, graph)
+        rus = RandomUnderSampler(random_state=random_state)
+        return rus.fit_resample(X_tomek, y_tomek)
+    
     pipeline = create_balancing_pipeline(random_state)
     X_balanced, y_balanced = pipeline.fit_resample(X, y)
     
@@ -157,8 +362,9 @@ def get_balancing_info():
     
     if IMBLEARN_AVAILABLE:
         try:
-            # Simulasi balancing untuk info
-            X_balanced, y_balanced = apply_balancing_to_data(X, y)
+            # Simulasi balancing untuk info (graph di-cache per tfidf_matrix.pkl)
+            graph = get_neighbor_graph(X, "tfidf_matrix.pkl")
+            X_balanced, y_balanced = apply_balancing_to_data(X, y, graph=graph)
             balanced_dist = Counter(y_balanced)
             balanced_count = len(y_balanced)
             
@@ -189,7 +395,8 @@ def get_visualization_points(mode="original", sample_size=2000):
     
     if mode == "balanced" and IMBLEARN_AVAILABLE:
         try:
-            X, y = apply_balancing_to_data(X, y)
+            graph = get_neighbor_graph(X, "tfidf_matrix.pkl")
+            X, y = apply_balancing_to_data(X, y, graph=graph)
         except Exception as e:
             return {"error": f"Gagal balancing: {str(e)}"}
     
@@ -175,6 +175,76 @@ class TrainingHistory(Base):
     tfidf_model = relationship("TFIDFModel", foreign_keys=[tfidf_model_id], backref="training_history")
     labeled_data = relationship("LabeledData", foreign_keys=[labeled_data_id], backref="training_history")
 
+# ====================================
+# 7. COMMENT INDEX TABLE (Deduplikasi komentar lintas crawl/import)
+# ====================================
+class CommentIndex(Base):
+    __tablename__ = "comment_index"
+
+    id = Column(Integer, primary_key=True, index=True)
+    comment_id = Column(String(100), unique=True, index=True, nullable=True)  # YouTube comment ID
+    text_hash = Column(String(64), index=True, nullable=False)  # SHA-256 teks komentar
+    video_id = Column(String(50), index=True, nullable=True)
+    source_file = Column(String(255))  # File tempat komentar pertama kali muncul
+    first_seen = Column(DateTime, default=datetime.utcnow)
+
+# ====================================
+# 8. BACKGROUND JOB TABLE (Job queue untuk endpoint yang berat)
+# ====================================
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), index=True)  # "preprocess", "auto-label", "tfidf", "train", ...
+    status = Column(String(20), default="queued", index=True)  # queued, running, completed, failed, cancelled
+    stage = Column(String(50), nullable=True)  # Stage yang sedang berjalan
+    progress_current = Column(Integer, default=0)
+    progress_total = Column(Integer, default=0)
+    message = Column(Text, nullable=True)
+    params = Column(Text, nullable=True)  # Request config (JSON)
+    result = Column(Text, nullable=True)  # Response endpoint (JSON)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, default=False)
+
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    creator = relationship("User", foreign_keys=[created_by], backref="background_jobs")
+
+# ====================================
+# 9. SWEEP RESULT TABLE (Memo hasil CV per konfigurasi hyperparameter)
+# ====================================
+class SweepResult(Base):
+    __tablename__ = "sweep_results"
+
+    id = Column(Integer, primary_key=True, index=True)
+    dataset_hash = Column(String(64), index=True)  # SHA-1 isi file labeled
+    dataset_name = Column(String(255))
+    config_key = Column(String(255), index=True)  # JSON kanonik {alpha, max_features, ngram_range, min_df, max_df}
+    n_splits = Column(Integer, default=10)
+    random_state = Column(Integer, default=42)
+
+    # CV metrics (macro, skala 0-1)
+    accuracy = Column(Float)
+    precision_score = Column(Float)
+    recall_score = Column(Float)
+    f1_score = Column(Float)
+    std_accuracy = Column(Float, nullable=True)
+    n_features = Column(Integer, nullable=True)  # Jumlah fitur TF-IDF hasil konfigurasi
+
+    # Diisi jika konfigurasi ini terpilih sebagai model terbaik sebuah sweep
+    training_history_id = Column(Integer, ForeignKey("training_history.id"), nullable=True)
+
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    creator = relationship("User", foreign_keys=[created_by], backref="sweep_results")
+    training_history = relationship("TrainingHistory", foreign_keys=[training_history_id])
+
 # ====================================
 # Database Initialization
 # ====================================
@@ -0,0 +1,176 @@
+# dedup_utils.py
+"""
+Index komentar lintas crawl/import (tabel comment_index) untuk mencegah
+komentar yang sama diproses ulang (preprocessing, labelling, TF-IDF).
+
+Kunci dedup per baris:
+- comment_id YouTube jika ada (hasil crawl)
+- jika tidak ada: (video_id, text_hash) bila video_id ada, selain itu text_hash
+  (file import lama tanpa comment_id)
+
+Mode:
+- "skip": baris duplikat dibuang dari DataFrame
+- "link": semua baris dipertahankan, kolom `duplicate_of` berisi file tempat
+  komentar pertama kali muncul (kosong untuk komentar baru)
+- "off" : tidak ada dedup
+
+Match yang source_file-nya file itu sendiri (crawl di-resume / output_file
+yang sama) bukan duplikat: baris lama file tersebut tetap dipertahankan.
+"""
+
+import hashlib
+import pandas as pd
+from sqlalchemy.exc import IntegrityError
+from database import CommentIndex
+
+# Batas jumlah parameter per query IN (...)
+_QUERY_CHUNK = 500
+
+DEDUP_MODES = ("skip", "link", "off")
+
+
+def comment_text_hash(text) -> str:
+    """SHA-256 dari teks komentar (spasi dinormalisasi)"""
+    normalized = " ".join(str(text).split()) if text is not None else ""
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _column(df, name):
+    if name in df.columns:
+        return df[name].astype(object).where(df[name].notna(), None)
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+
+def _chunks(values):
+    values = list(values)
+    for i in range(0, len(values), _QUERY_CHUNK):
+        yield values[i:i + _QUERY_CHUNK]
+
+
+def _known_comment_ids(db, comment_ids):
+    known = {}
+    for chunk in _chunks(set(comment_ids)):
+        rows = (
+            db.query(CommentIndex.comment_id, CommentIndex.source_file)
+            .filter(CommentIndex.comment_id.in_(chunk))
+            .all()
+        )
+        known.update(rows)
+    return known
+
+
+def _known_text_hashes(db, hashes):
+    known = {}
+    for chunk in _chunks(set(hashes)):
+        rows = (
+            db.query(CommentIndex.text_hash, CommentIndex.video_id, CommentIndex.source_file)
+            .filter(CommentIndex.text_hash.in_(chunk))
+            .all()
+        )
+        for text_hash, video_id, source_file in rows:
+            known.setdefault((video_id, text_hash), source_file)
+            known.setdefault((None, text_hash), source_file)
+    return known
+
+
+def _register(db, entries):
+    """Simpan entri baru ke comment_index.
+    Return comment_id yang ternyata sudah didaftarkan request lain secara bersamaan.
+    """
+    try:
+        db.bulk_save_objects(entries)
+        db.commit()
+        return set()
+    except IntegrityError:
+        db.rollback()
+    # insert bersamaan untuk comment_id yang sama: ulangi per baris
+    lost = set()
+    for entry in entries:
+        db.add(entry)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            lost.add(entry.comment_id)
+    return lost
+
+
+def dedup_comments(df: pd.DataFrame, db, source_file: str, mode: str = "skip", text_column: str = "comment"):
+    """
+    Cocokkan df dengan comment_index lalu daftarkan komentar baru.
+    Return: (df_hasil, stats)
+    """
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode '{mode}', expected one of {DEDUP_MODES}")
+    stats = {"mode": mode, "total": len(df), "duplicates": 0, "new": len(df)}
+    if mode == "off" or len(df) == 0:
+        return df, stats
+
+    comment_ids = _column(df, "comment_id")
+    video_ids = _column(df, "video_id")
+    hashes = df[text_column].fillna("").map(comment_text_hash)
+    has_id = comment_ids.notna()
+
+    known_ids = _known_comment_ids(db, comment_ids[has_id])
+    known_hashes = _known_text_hashes(db, hashes[~has_id])
+
+    duplicate_of = []
+    seen_in_batch = set()
+    new_entries = []
+    new_positions = {}
+    for position, (comment_id, video_id, text_hash) in enumerate(zip(comment_ids, video_ids, hashes)):
+        key = ("id", comment_id) if comment_id is not None else ("text", video_id, text_hash)
+        if comment_id is not None:
+            first = known_ids.get(comment_id)
+        else:
+            first = known_hashes.get((video_id, text_hash))
+        registered = first == source_file
+        if registered:
+            first = None  # baris file ini sendiri dari run sebelumnya
+        if first is None and key in seen_in_batch:
+            first = source_file
+        duplicate_of.append(first)
+        if first is None:
+            seen_in_batch.add(key)
+            if not registered:
+                new_positions[comment_id] = position
+                new_entries.append(CommentIndex(
+                    comment_id=comment_id,
+                    text_hash=text_hash,
+                    video_id=video_id,
+                    source_file=source_file
+                ))
+
+    if new_entries:
+        lost = _register(db, new_entries)
+        # kalah race: komentar sudah didaftarkan file lain -> duplikat
+        for comment_id, first in _known_comment_ids(db, lost).items():
+            duplicate_of[new_positions[comment_id]] = first
+
+    duplicate_of = pd.Series(duplicate_of, index=df.index, dtype=object)
+    is_duplicate = duplicate_of.notna()
+    stats["duplicates"] = int(is_duplicate.sum())
+    stats["new"] = len(df) - stats["duplicates"]
+
+    if mode == "skip":
+        df = df[~is_duplicate]
+    else:
+        df = df.copy()
+        df["duplicate_of"] = duplicate_of
+    print(f"[INFO] Dedup ({mode}) {source_file}: {stats['duplicates']} duplicates, {stats['new']} new comments")
+    return df, stats
+
+
+def dedup_file(path: str, db, mode: str = "skip", text_column: str = "comment", output_path: str = None):
+    """dedup_comments untuk file CSV.
+    Jika ada perubahan, hasil ditulis ke output_path (None = file ditulis ulang);
+    stats["file"] = file yang berisi hasil dedup.
+    """
+    df = pd.read_csv(path)
+    result, stats = dedup_comments(df, db, path, mode, text_column)
+    stats["file"] = path
+    if mode == "link" or (mode == "skip" and stats["duplicates"]):
+        stats["file"] = output_path or path
+        result.to_csv(stats["file"], index=False, encoding="utf-8")
+    stats["rows"] = len(result)
+    return result, stats
@@ -0,0 +1,213 @@
+# job_queue.py
+"""
+Job queue untuk endpoint pipeline yang berat (preprocess, auto-label, tfidf, training).
+
+Endpoint men-submit fungsi sinkron ke thread pool dan langsung mengembalikan
+job ID. Status, stage, progress dan hasil disimpan di tabel background_jobs,
+jadi bisa di-poll (/jobs/{id}) dan tetap terbaca setelah request selesai.
+Cancel bersifat kooperatif: fungsi job memanggil job.update()/check_cancelled()
+di titik aman, yang melempar JobCancelled jika cancel diminta.
+"""
+
+import os
+import json
+import time
+import threading
+import traceback
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from database import SessionLocal, BackgroundJob, User
+from progress_utils import progress_registry, ProgressTracker
+
+# Jumlah job yang berjalan bersamaan
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Interval minimum antar update progress ke database (detik)
+PROGRESS_WRITE_INTERVAL = 0.5
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobCancelled(BaseException):
+    """Dilempar di dalam job ketika cancel diminta.
+    Turunan BaseException supaya tidak tertangkap `except Exception` di body endpoint.
+    """
+
+
+class JobContext(ProgressTracker):
+    """Handle yang diteruskan ke fungsi job untuk lapor progress dan cek cancel.
+    Progress juga masuk ke progress_registry dengan run_id "job-<id>".
+    """
+
+    def __init__(self, manager, job_id, owner=None):
+        super().__init__(progress_registry, job_run_id(job_id), owner)
+        self.manager = manager
+        self.job_id = job_id
+        self.cancel_event = manager._cancel_event(job_id)
+        self._last_write = 0.0
+        self._stage = None
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.job_id} cancelled")
+
+    def update(self, stage=None, current=None, total=None, message=None, force=False):
+        """Simpan progress (di-throttle kecuali stage berganti / force) lalu cek cancel"""
+        self.check_cancelled()
+        super().update(stage, current, total, message)
+        now = time.monotonic()
+        stage_changed = stage is not None and stage != self._stage
+        if not (force or stage_changed or now - self._last_write >= PROGRESS_WRITE_INTERVAL):
+            return
+        self._last_write = now
+        if stage is not None:
+            self._stage = stage
+        fields = {"stage": stage, "progress_current": current, "progress_total": total, "message": message}
+        self.manager._update(self.job_id, **{k: v for k, v in fields.items() if v is not None})
+
+
+def job_run_id(job_id):
+    """run_id progress_registry untuk sebuah job"""
+    return f"job-{job_id}"
+
+
+class JobManager:
+    """Thread pool + state job di database"""
+
+    def __init__(self, max_workers=JOB_WORKERS, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._cancel_events = {}
+        self._lock = threading.Lock()
+
+    def _cancel_event(self, job_id):
+        with self._lock:
+            return self._cancel_events.setdefault(job_id, threading.Event())
+
+    def _update(self, job_id, **fields):
+        db = self.session_factory()
+        try:
+            db.query(BackgroundJob).filter(BackgroundJob.id == job_id).update(fields)
+            db.commit()
+        finally:
+            db.close()
+
+    def submit(self, job_type, user_id, func, *args, params=None):
+        """Simpan job (queued) lalu jalankan func(*args, current_user=, db=, job=) di pool"""
+        db = self.session_factory()
+        try:
+            job = BackgroundJob(
+                job_type=job_type,
+                status="queued",
+                params=json.dumps(jsonable_encoder(params)) if params is not None else None,
+                created_by=user_id
+            )
+            db.add(job)
+            db.commit()
+            job_id = job.id
+        finally:
+            db.close()
+        self._cancel_event(job_id)
+        self.executor.submit(self._run, job_id, user_id, func, args)
+        print(f"[INFO] Job {job_id} ({job_type}) queued")
+        return job_id
+
+    def _run(self, job_id, user_id, func, args):
+        ctx = JobContext(self, job_id, user_id)
+        if ctx.cancel_event.is_set():
+            self._update(job_id, status="cancelled", finished_at=datetime.utcnow())
+            ctx.finish("cancelled")
+            return
+        self._update(job_id, status="running", started_at=datetime.utcnow())
+        db = self.session_factory()
+        try:
+            current_user = db.query(User).filter(User.id == user_id).first()
+            result = func(*args, current_user=current_user, db=db, job=ctx)
+            self._update(
+                job_id,
+                status="completed",
+                result=json.dumps(jsonable_encoder(result)),
+                finished_at=datetime.utcnow()
+            )
+            ctx.finish("done")
+            print(f"[INFO] Job {job_id} completed")
+        except JobCancelled:
+            db.rollback()
+            self._update(job_id, status="cancelled", finished_at=datetime.utcnow())
+            ctx.finish("cancelled")
+            print(f"[INFO] Job {job_id} cancelled")
+        except HTTPException as e:
+            db.rollback()
+            self._update(job_id, status="failed", error=str(e.detail), finished_at=datetime.utcnow())
+            ctx.finish("failed", str(e.detail))
+            print(f"[WARN] Job {job_id} failed: {e.detail}")
+        except Exception as e:
+            db.rollback()
+            self._update(job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+            ctx.finish("failed", str(e))
+            print(f"[ERROR] Job {job_id} failed: {e}")
+            traceback.print_exc()
+        finally:
+            db.close()
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+
+    def cancel(self, job_id):
+        """Minta cancel; job queued langsung dibatalkan, job running berhenti di checkpoint berikutnya"""
+        self._update(job_id, cancel_requested=True)
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+
+    def recover_interrupted(self):
+        """Job yang masih queued/running saat server mati ditandai failed"""
+        db = self.session_factory()
+        try:
+            count = (
+                db.query(BackgroundJob)
+                .filter(BackgroundJob.status.in_(["queued", "running"]))
+                .update(
+                    {"status": "failed", "error": "Server restarted before the job finished",
+                     "finished_at": datetime.utcnow()},
+                    synchronize_session=False
+                )
+            )
+            db.commit()
+            if count:
+                print(f"[WARN] Marked {count} interrupted job(s) as failed")
+        finally:
+            db.close()
+
+
+def job_to_dict(job: BackgroundJob, include_result=True):
+    """Serialisasi BackgroundJob untuk response API"""
+    data = {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "run_id": job_run_id(job.id),
+        "status": job.status,
+        "stage": job.stage,
+        "progress": {
+            "current": job.progress_current or 0,
+            "total": job.progress_total or 0,
+            "percentage": round((job.progress_current or 0) * 100 / job.progress_total, 2)
+            if job.progress_total else (100.0 if job.status == "completed" else 0.0)
+        },
+        "message": job.message,
+        "error": job.error,
+        "cancel_requested": bool(job.cancel_requested),
+        "created_by": job.created_by,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+    if include_result:
+        data["params"] = json.loads(job.params) if job.params else None
+        data["result"] = json.loads(job.result) if job.result else None
+    return data
+
+
+job_manager = JobManager()
@@ -0,0 +1,103 @@
+# kv_store.py
+"""
+Key-value store persisten sederhana berbasis SQLite (stdlib, tanpa dependency).
+Dipakai untuk cache lintas run, misalnya hasil terjemahan.
+
+Aman dipakai dari banyak thread (satu koneksi + lock) dan dari banyak proses
+(setiap proses membuka koneksinya sendiri, SQLite yang mengatur locking).
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+
+# SQLite membatasi jumlah parameter per query
+_SQL_CHUNK = 500
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 hex digest of the full text (dipakai sebagai key cache)"""
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+
+
+class SqliteKVStore:
+    """Persistent string -> string mapping stored in a SQLite file"""
+
+    def __init__(self, path, table="kv"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._pid = None
+        self._conn = None
+
+    def _connection(self):
+        # Koneksi dibuat ulang setelah fork (koneksi SQLite tidak boleh dibagi antar proses)
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                f"(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else default
+
+    def get_many(self, keys) -> dict:
+        """Return {key: value} for the keys that exist"""
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            for i in range(0, len(keys), _SQL_CHUNK):
+                chunk = keys[i:i + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def put_many(self, items):
+        """Insert/replace many entries in one transaction"""
+        items = list(items.items()) if isinstance(items, dict) else list(items)
+        if not items:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)", items
+            )
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"DELETE FROM {self.table}")
+            conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
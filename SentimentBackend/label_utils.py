@@ -6,6 +6,7 @@ Menyimpan Get_Labelling.csv yang berisi kolom negationHandled juga.
 """
 
 import os
+import numpy as np
 import pandas as pd
 
 # ---------- Load lexicon ----------
@@ -25,20 +26,87 @@ def load_lexicon_file(filename):
 positive_words = load_lexicon_file("Positive.csv")
 negative_words = load_lexicon_file("Negative.csv")
 
-# ---------- Labeling function ----------
-def label_text(text: str):
+# ---------- Lexicon matcher (Aho-Corasick) ----------
+class LexiconMatcher:
     """
-    Hitung sentimen berdasarkan kehadiran kata dari positive_words dan negative_words.
-    Mengembalikan tuple (sentiment, confidence).
+    Automaton Aho-Corasick untuk positive_words + negative_words.
+
+    Semantik sama persis dengan loop lama `sum(1 for word in words if word in text)`:
+    setiap entri lexicon dihitung sekali jika muncul sebagai substring, dan entri
+    yang duplikat di file dihitung sesuai jumlah kemunculannya di list.
+    Waktu scoring sebanding dengan panjang teks, bukan ukuran lexicon.
     """
-    if not isinstance(text, str):
-        text = str(text) if text is not None else ""
 
-    text = text.lower()
+    def __init__(self, positive, negative):
+        weights = {}
+        for word in positive:
+            if word:
+                weights.setdefault(word, [0, 0])[0] += 1
+        for word in negative:
+            if word:
+                weights.setdefault(word, [0, 0])[1] += 1
+        self.patterns = list(weights)
+        self.weights = [tuple(weights[word]) for word in self.patterns]
+
+        # trie
+        self._goto = [{}]
+        self._out = [[]]
+        for pid, word in enumerate(self.patterns):
+            state = 0
+            for ch in word:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(pid)
+
+        # failure links (BFS), output digabung dengan output state fail
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
 
-    pos_score = sum(1 for word in positive_words if word in text)
-    neg_score = sum(1 for word in negative_words if word in text)
+    def matches(self, text: str) -> set:
+        """Return ids of lexicon entries that occur in `text`"""
+        goto, fail = self._goto, self._fail
+        visited = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if state:
+                visited.add(state)
+        found = set()
+        for state in visited:
+            found.update(self._out[state])
+        return found
 
+    def score(self, text: str):
+        """Return (pos_score, neg_score) for a lowercased text"""
+        pos_score = neg_score = 0
+        for pid in self.matches(text):
+            pos, neg = self.weights[pid]
+            pos_score += pos
+            neg_score += neg
+        return pos_score, neg_score
+
+
+lexicon_matcher = LexiconMatcher(positive_words, negative_words)
+
+# ---------- Labeling function ----------
+def _sentiment_from_scores(pos_score, neg_score):
+    """Aturan sentimen + confidence dari skor lexicon."""
     if pos_score > neg_score:
         sentiment = "Positif"
     elif neg_score > pos_score:
@@ -60,6 +128,48 @@ def label_text(text: str):
 
     return sentiment, confidence
 
+def label_text(text: str):
+    """
+    Hitung sentimen berdasarkan kehadiran kata dari positive_words dan negative_words.
+    Mengembalikan tuple (sentiment, confidence).
+    """
+    if not isinstance(text, str):
+        text = str(text) if text is not None else ""
+
+    return _sentiment_from_scores(*lexicon_matcher.score(text.lower()))
+
+def score_texts(texts):
+    """
+    Skor lexicon untuk satu kolom teks sekaligus (setiap teks unik di-scan sekali).
+    Mengembalikan DataFrame dengan kolom pos_score dan neg_score (index sama dengan input).
+    """
+    texts = pd.Series(texts)
+    lowered = texts.fillna("").astype(str).str.lower()
+    unique = lowered.unique()
+    scores = dict(zip(unique, map(lexicon_matcher.score, unique)))
+    pairs = lowered.map(scores)
+    return pd.DataFrame(pairs.tolist(), index=texts.index, columns=["pos_score", "neg_score"])
+
+def label_texts(texts):
+    """
+    Batch version of label_text untuk satu kolom: aturan sentimen/confidence
+    dihitung dengan perbandingan NumPy atas seluruh kolom.
+    Mengembalikan DataFrame dengan kolom sentiment dan confidence.
+    """
+    scores = score_texts(texts)
+    pos = scores["pos_score"].to_numpy()
+    neg = scores["neg_score"].to_numpy()
+    total = pos + neg
+    diff = np.abs(pos - neg)
+
+    sentiment = np.select([pos > neg, neg > pos], ["Positif", "Negatif"], default="Netral")
+    confidence = np.select(
+        [total == 0, (diff >= 2) & (total >= 3), (diff >= 1) | (total >= 2)],
+        ["Low", "High", "Medium"],
+        default="Low"
+    )
+    return pd.DataFrame({"sentiment": sentiment, "confidence": confidence}, index=scores.index)
+
 def get_latest_preprocessed(data_dir="./"):
     """
     Ambil file preprocessing terbaru (GetProcessed.csv).
@@ -294,32 +404,14 @@ def auto_label_and_save(input_file=None, output_file=None, data_dir="./"):
         text_col = "negationHandled" if "negationHandled" in df.columns else "finalText"
         print(f"[INFO] Auto-labelling uses column: {text_col}")
         
-        # Labelling process
-        sentiments = []
-        confidences = []
-        
-        for _, row in df.iterrows():
-            text_to_label = ""
-            
-            # prefer negationHandled if available and not empty
-            if pd.notna(row.get("negationHandled", "")) and str(row.get("negationHandled", "")).strip():
-                text_to_label = str(row.get("negationHandled", ""))
-            elif pd.notna(row.get("finalText", "")) and str(row.get("finalText", "")).strip():
-                text_to_label = str(row.get("finalText", ""))
-            else:
-                text_to_label = str(row.get("comment", ""))
-            
-            if not text_to_label:
-                sentiments.append("Netral")
-                confidences.append("Low")
-                continue
-            
-            sentiment, confidence = label_text(text_to_label)
-            sentiments.append(sentiment)
-            confidences.append(confidence)
-        
-        df["sentiment"] = sentiments
-        df["confidence"] = confidences
+        # Labelling process (columnar): negationHandled -> finalText -> comment
+        text_to_label = df["negationHandled"].where(
+            df["negationHandled"] != "",
+            df["finalText"].where(df["finalText"] != "", df["comment"].astype(str))
+        )
+        labels = label_texts(text_to_label)
+        df["sentiment"] = labels["sentiment"]
+        df["confidence"] = labels["confidence"]
         df["labelMethod"] = "Auto"
         
         # ✅ Save dengan output_file yang sudah di-generate
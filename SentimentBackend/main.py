@@ -2,10 +2,14 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from typing import Optional
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, Tuple, Union
 import pandas as pd
 import os
+import re
+import json
+import asyncio
 import uvicorn
 import joblib
 from datetime import datetime
@@ -14,8 +18,8 @@ from database import PreprocessedData, Dataset, User
 from collections import Counter
 import time
 from naive_bayes_utils import verify_tfidf_in_likelihood
-from PreProcessing import preprocess_comments_large, get_progress
-from get_comments import get_youtube_comments
+from PreProcessing import preprocess_comments_large, get_progress, preprocess_for_prediction
+from get_comments import get_youtube_comments, _load_checkpoint, CHECKPOINT_SUFFIX
 from label_utils import label_text, get_latest_preprocessed, auto_label_and_save
 from balancing_utils import (
     get_balancing_info,
@@ -24,6 +28,7 @@ from balancing_utils import (
 )
 from naive_bayes_utils import (
     train_naive_bayes_with_cv,
+    train_both_approaches_with_cv,
     predict_new_text,
     get_model_info,
     compare_approaches,
@@ -44,13 +49,21 @@ from database import (
     Base, 
     engine, 
     get_db, 
+    SessionLocal,
     TrainingHistory, 
     User,
     Dataset,              # ✅ Add this
     PreprocessedData,     # ✅ Add this
     LabeledData,          # ✅ Add this (yang error)
-    TFIDFModel            # ✅ Add this
+    TFIDFModel,           # ✅ Add this
+    BackgroundJob,
+    SweepResult
 )
+from job_queue import job_manager, job_to_dict, job_run_id, FINISHED_STATUSES
+from progress_utils import progress_registry, FINISHED_STATUSES as RUN_FINISHED_STATUSES
+from model_registry import model_registry
+from prediction_utils import iter_predictions, detect_text_column
+import sweep_utils
 from sqlalchemy.orm import Session
 
 # Initialize FastAPI
@@ -86,12 +99,25 @@ class YouTubeRequest(BaseModel):
     video_url: str = None  # ✅ Optional untuk single URL
     video_urls: List[str] = None  # ✅ NEW: untuk multiple URLs
     max_results: int = 100
+    parallel: bool = False  # ✅ Crawl video + reply thread secara paralel (batch mode)
+    max_workers: int = 4  # ✅ Jumlah video yang di-crawl bersamaan
+    stream: bool = False  # ✅ Append per halaman + checkpoint (bisa di-resume)
+    output_file: Optional[str] = None  # ✅ File crawl yang terputus untuk di-resume (nama GetComments_*.csv, tanpa path)
+    incremental: bool = False  # ✅ Hanya ambil komentar baru untuk video yang sudah pernah di-crawl
+    dedup_mode: str = "skip"  # ✅ "skip" | "link" | "off" (cek comment_index lintas crawl)
+    run_id: Optional[str] = None  # ✅ ID progress (GET /progress/{run_id}); default: dibuat otomatis
 
 class PreprocessConfig(BaseModel):
     input_file: str  # ✅ Pakai underscore
     num_cores: int = 8
     batch_size: int = 100
     skip_translation: bool = False
+    use_processes: bool = False  # ✅ Process pool (multi-core) instead of threads
+    stream: bool = False  # ✅ Chunked read/append, bounded memory for big files
+    vectorized: bool = False  # ✅ Series-level (pandas) pipeline
+    trace_rows: Optional[int] = None  # ✅ Verbose trace for N first rows (default: off)
+    background: bool = False  # ✅ Jalankan sebagai background job (poll /jobs/{job_id})
+    run_id: Optional[str] = None  # ✅ ID progress (GET /progress/{run_id}); default: dibuat otomatis
 
 
 class PredictWithModelRequest(BaseModel):
@@ -101,6 +127,8 @@ class PredictWithModelRequest(BaseModel):
     
 class AutoLabelConfig(BaseModel):
     input_file: str  # ✅ File GetProcessed yang dipilih
+    background: bool = False  # ✅ Jalankan sebagai background job (poll /jobs/{job_id})
+    run_id: Optional[str] = None  # ✅ ID progress (GET /progress/{run_id}); default: dibuat otomatis
 
 class TrainConfig(BaseModel):
     approach: str = "both"  # "both", "balancing", "non-balancing"
@@ -108,6 +136,10 @@ class TrainConfig(BaseModel):
     output_prefix: str = "final"
     n_splits: int = 10
     random_state: int = 42
+    alpha: float = 1.0  # ✅ Laplace smoothing MultinomialNB (lihat /sweep untuk mencari nilai terbaik)
+    n_jobs: int = -1  # ✅ Fold CV paralel (-1 = semua core, 1 = berurutan)
+    background: bool = False  # ✅ Jalankan sebagai background job (poll /jobs/{job_id})
+    run_id: Optional[str] = None  # ✅ ID progress (GET /progress/{run_id}); default: dibuat otomatis
 
 class TrainRequest(BaseModel):
     labeled_file: str  # ✅ File labeled yang dipilih (GetLabelling_TIMESTAMP.csv)
@@ -116,14 +148,49 @@ class TrainRequest(BaseModel):
     output_prefix: str = "final"
     n_splits: int = 10
     random_state: int = 42
+    alpha: float = 1.0  # ✅ Laplace smoothing MultinomialNB (lihat /sweep untuk mencari nilai terbaik)
+    n_jobs: int = -1  # ✅ Fold CV paralel (-1 = semua core, 1 = berurutan)
+    background: bool = False  # ✅ Jalankan sebagai background job (poll /jobs/{job_id})
+    run_id: Optional[str] = None  # ✅ ID progress (GET /progress/{run_id}); default: dibuat otomatis
 
 class PredictRequest(BaseModel):
     text: str
     model_name: Optional[str] = "final"
 
+class BatchPredictRequest(BaseModel):
+    texts: Optional[List[str]] = None  # ✅ Daftar teks, atau
+    input_file: Optional[str] = None  # ✅ File CSV dataset (mis. GetComments_TIMESTAMP.csv)
+    text_column: Optional[str] = None  # ✅ Default: deteksi otomatis
+    model_id: Optional[int] = None  # ✅ TrainingHistory.id; default: model terbaru untuk `approach`
+    approach: str = "non-balancing"
+    preprocess: bool = True  # ✅ False jika teks sudah hasil preprocessing (finalText)
+    translate: bool = False
+    chunk_size: int = 5000
+
 class TFIDFRequest(BaseModel):
     input_file: str  # ✅ File yang dipilih user (GetLabelling_TIMESTAMP.csv)
     max_features: Optional[int] = 5000
+    ngram_range: Tuple[int, int] = (1, 2)  # ✅ (min_n, max_n)
+    min_df: Union[int, float] = 2  # ✅ int = jumlah dokumen, float = proporsi
+    max_df: Union[int, float] = 0.95  # ✅ int = jumlah dokumen, float = proporsi
+    background: bool = False  # ✅ Jalankan sebagai background job (poll /jobs/{job_id})
+    run_id: Optional[str] = None  # ✅ ID progress (GET /progress/{run_id}); default: dibuat otomatis
+
+class SweepRequest(BaseModel):
+    labeled_file: str  # ✅ File labeled (GetLabelling_TIMESTAMP.csv)
+    alphas: List[float] = [0.1, 0.5, 1.0, 2.0]
+    max_features: List[Optional[int]] = [5000]
+    ngram_ranges: List[Tuple[int, int]] = [(1, 1), (1, 2)]
+    min_df: List[Union[int, float]] = [2]
+    max_df: List[Union[int, float]] = [0.95]
+    n_splits: int = 10
+    random_state: int = 42
+    metric: str = "f1_score"  # ✅ accuracy / precision / recall / f1_score (macro)
+    train_best: bool = True  # ✅ Simpan model konfigurasi terbaik ke TrainingHistory
+    output_prefix: str = "sweep"  # ✅ Hanya huruf, angka, _ dan - (bagian nama file di models/)
+    n_jobs: int = -1  # ✅ Konfigurasi TF-IDF dievaluasi paralel (-1 = semua core)
+    background: bool = False  # ✅ Jalankan sebagai background job (poll /jobs/{job_id})
+    run_id: Optional[str] = None  # ✅ ID progress (GET /progress/{run_id}); default: dibuat otomatis
 
 class CompareRequest(BaseModel):
     dataset_name: str = "Get_Labelling.csv"
@@ -182,6 +249,63 @@ async def check_progress():
     }
 
 
+# Interval cek perubahan progress untuk SSE, dan interval keep-alive (detik)
+PROGRESS_STREAM_INTERVAL = 0.5
+PROGRESS_KEEPALIVE_SECONDS = 15
+# Berapa lama stream menunggu run_id yang belum terdaftar (run belum mulai / job masih queued)
+PROGRESS_WAIT_SECONDS = 60
+
+
+@app.get("/progress/{run_id}")
+async def check_run_progress(run_id: str, current_user: User = Depends(get_current_user)):
+    """Progress satu run milik user: stage, rows, throughput, ETA, riwayat stage"""
+    run = progress_registry.get(run_id, owner=current_user.id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Run not found: {run_id}")
+    return run
+
+
+async def _progress_events(run_id: str, owner: int):
+    version = None
+    waited = 0.0
+    idle = 0.0
+    while True:
+        run = progress_registry.get(run_id, owner=owner)
+        if run is None:
+            if waited >= PROGRESS_WAIT_SECONDS:
+                yield f"event: error\ndata: {json.dumps({'detail': f'Run not found: {run_id}'})}\n\n"
+                return
+            waited += PROGRESS_STREAM_INTERVAL
+        elif run["version"] != version:
+            version = run["version"]
+            idle = 0.0
+            yield f"data: {json.dumps(run)}\n\n"
+            if run["status"] in RUN_FINISHED_STATUSES:
+                return
+        else:
+            idle += PROGRESS_STREAM_INTERVAL
+            if idle >= PROGRESS_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+        await asyncio.sleep(PROGRESS_STREAM_INTERVAL)
+
+
+@app.get("/progress/{run_id}/stream")
+async def stream_run_progress(run_id: str, current_user: User = Depends(get_current_user)):
+    """
+    Server-Sent Events: satu event per perubahan progress, selesai saat run done/failed/cancelled.
+    Frontend: fetch() dengan header Authorization lalu baca body sebagai stream
+    (EventSource tidak bisa mengirim token), tidak perlu polling.
+    run_id boleh dibuat client sebelum request dikirim (field run_id di request body).
+    Hanya run milik user sendiri yang di-stream.
+    """
+    return StreamingResponse(
+        _progress_events(run_id, current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/predict")
 async def predict_sentiment(request: PredictRequest):
     """
@@ -226,6 +350,162 @@ async def download_file(filename: str):
 from database import Dataset
 import datetime
 
+def _dedup_crawl_result(result: dict, mode: str, db: Session):
+    """Cek file hasil crawl terhadap comment_index; count diperbarui (mode skip)"""
+    from dedup_utils import dedup_file
+    
+    if mode == "off" or not os.path.exists(result.get("file", "")):
+        return None
+    _, stats = dedup_file(result["file"], db, mode)
+    result["count"] = stats["rows"]
+    return stats
+
+# output_file dari client hanya boleh nama file crawl di direktori data (tanpa path)
+CRAWL_OUTPUT_PATTERN = re.compile(r"GetComments_[A-Za-z0-9_-]+\.csv")
+
+def _crawl_output_file(output_file: Optional[str]):
+    """Validasi output_file untuk resume crawl; None = nama file baru dibuat otomatis"""
+    if output_file is None:
+        return None
+    if not CRAWL_OUTPUT_PATTERN.fullmatch(output_file):
+        raise HTTPException(
+            status_code=400,
+            detail="output_file must be a GetComments_*.csv file name without directories"
+        )
+    return output_file
+
+def _owned_crawl_dataset(filename: str, current_user: User, db: Session):
+    """Dataset milik user untuk file crawl (resume); 403 jika file milik user lain"""
+    dataset = db.query(Dataset)\
+        .filter(Dataset.filename == filename, Dataset.uploaded_by == current_user.id)\
+        .first()
+    if dataset is None and db.query(Dataset).filter(Dataset.filename == filename).first():
+        raise HTTPException(
+            status_code=403,
+            detail="You don't have permission to resume this crawl"
+        )
+    return dataset
+
+def _check_crawl_output(filename: str, current_user: User, db: Session):
+    """Tolak output_file milik user lain, dan file yang sudah ada tanpa checkpoint
+    (crawl baru ke file itu akan menimpanya)"""
+    _owned_crawl_dataset(filename, current_user, db)
+    checkpoint = _load_checkpoint(filename + CHECKPOINT_SUFFIX)
+    if checkpoint and checkpoint.get("output") == filename:
+        if checkpoint.get("owner") != current_user.id:
+            raise HTTPException(
+                status_code=403,
+                detail="You don't have permission to resume this crawl"
+            )
+    elif os.path.exists(filename):
+        raise HTTPException(
+            status_code=409,
+            detail=f"{filename} already exists and has no checkpoint to resume; choose another output_file"
+        )
+
+def _latest_crawl_dataset(url: str, current_user: User, db: Session):
+    """Dataset youtube terbaru milik user yang video_url-nya (daftar dipisah koma) memuat url persis"""
+    candidates = (
+        db.query(Dataset)
+        .filter(
+            Dataset.uploaded_by == current_user.id,
+            Dataset.source == "youtube",
+            Dataset.status == "active",
+            Dataset.video_url.contains(url)
+        )
+        .order_by(Dataset.upload_date.desc())
+    )
+    for dataset in candidates:
+        if url in [u.strip() for u in dataset.video_url.split(",")]:
+            return dataset
+    return None
+
+def _incremental_crawl(request: YouTubeRequest, current_user: User, db: Session, job=None):
+    """
+    Incremental re-crawl: cari Dataset terbaru milik user per video_url, ambil hanya
+    komentar yang lebih baru dan append ke file dataset tersebut.
+    Return None jika belum ada dataset untuk URL mana pun (crawl biasa).
+    """
+    from get_comments import update_comments_file
+    
+    urls = request.video_urls if request.video_urls else ([request.video_url] if request.video_url else [])
+    
+    # Kelompokkan URL per dataset (dataset batch menyimpan beberapa URL)
+    by_dataset = {}
+    not_found = []
+    for url in urls:
+        dataset = _latest_crawl_dataset(url, current_user, db)
+        if dataset and os.path.exists(dataset.filename):
+            by_dataset.setdefault(dataset.id, (dataset, []))[1].append(url)
+        else:
+            not_found.append(url)
+    
+    if not by_dataset:
+        print(f"[INFO] No existing dataset for {urls}, running full crawl")
+        return None
+    
+    updates = []
+    for dataset, dataset_urls in by_dataset.values():
+        result = update_comments_file(
+            dataset.filename,
+            dataset_urls,
+            max_new_per_video=request.max_results,
+            reply_workers=4 if request.parallel else 1,
+            progress_callback=job.callback("crawl") if job else None
+        )
+        if result["new_count"] and request.dedup_mode != "off":
+            # daftarkan komentar baru ke comment_index
+            from dedup_utils import dedup_comments
+            dedup_comments(pd.read_csv(dataset.filename).tail(result["new_count"]), db, dataset.filename, "link")
+        dataset.total_rows = result["total"]
+        dataset.file_size_mb = round(os.path.getsize(dataset.filename) / (1024*1024), 2)
+        db.commit()
+        updates.append({
+            "dataset_id": dataset.id,
+            "file": dataset.filename,
+            "new_count": result["new_count"],
+            "total_rows": result["total"],
+            "videos": result["videos"],
+            "comments": result["comments"]
+        })
+    
+    new_total = sum(u["new_count"] for u in updates)
+    return {
+        "status": "success",
+        "message": f"Incremental crawl: {new_total} new comments appended to {len(updates)} dataset(s)",
+        "count": new_total,
+        "updates": updates,
+        "not_found": not_found,
+        "crawled_by": current_user.username
+    }
+
+def _crawl_not_found(incremental_result: dict, request: YouTubeRequest, current_user: User, db: Session, job=None):
+    """Full crawl untuk URL incremental yang belum punya dataset; hasil digabung ke incremental_result"""
+    full_request = request.model_copy(update={
+        "incremental": False,
+        "video_url": None,
+        "video_urls": incremental_result["not_found"],
+        "output_file": None
+    })
+    try:
+        crawl = _get_comments_job(full_request, current_user, db, job)
+    except HTTPException as e:
+        # update incremental sudah tersimpan; laporkan URL yang gagal di-crawl
+        incremental_result["status"] = "partial"
+        incremental_result["message"] += f"; full crawl of {len(incremental_result['not_found'])} new URL(s) failed: {e.detail}"
+        incremental_result["crawl_error"] = e.detail
+        return
+    incremental_result["count"] += crawl["count"]
+    incremental_result["message"] += f"; full crawl of {len(incremental_result['not_found'])} new URL(s): {crawl['count']} comments"
+    incremental_result["crawled"] = {
+        "dataset_id": crawl["dataset_id"],
+        "file": crawl["file"],
+        "count": crawl["count"],
+        "video_urls": incremental_result["not_found"],
+        "failed_videos": crawl["failed_videos"],
+        "dedup": crawl["dedup"]
+    }
+
 @app.post("/get-comments")
 async def get_comments(
     request: YouTubeRequest,
@@ -234,9 +514,27 @@ async def get_comments(
 ):
     """
     Crawl YouTube comments - ADMIN ONLY
-    Supports single URL or multiple URLs
+    Supports single URL or multiple URLs (progress: GET /progress/{run_id})
     """
+    return await _run_tracked(_get_comments_job, request, current_user, db)
+
+
+def _get_comments_job(request: YouTubeRequest, current_user: User, db: Session, job=None):
     try:
+        output_file = _crawl_output_file(request.output_file)
+        if output_file:
+            # ✅ Resume/overwrite hanya untuk file crawl milik sendiri (cek sebelum append)
+            _check_crawl_output(output_file, current_user, db)
+        
+        # ✅ Incremental: update dataset yang sudah ada untuk URL yang pernah di-crawl
+        if request.incremental:
+            incremental_result = _incremental_crawl(request, current_user, db, job)
+            if incremental_result is not None:
+                if incremental_result["not_found"]:
+                    # URL yang belum pernah di-crawl -> crawl biasa ke dataset baru
+                    _crawl_not_found(incremental_result, request, current_user, db, job)
+                return incremental_result
+        
         # ✅ Check: single URL atau multiple URLs?
         if request.video_urls and len(request.video_urls) > 0:
             # BATCH MODE: Multiple URLs → 1 file
@@ -244,12 +542,21 @@ async def get_comments(
             
             result = get_youtube_comments_batch(
                 video_urls=request.video_urls,
-                max_results_per_video=request.max_results
+                max_results_per_video=request.max_results,
+                parallel=request.parallel,
+                max_workers=request.max_workers,
+                stream=request.stream,
+                output_file=output_file,
+                progress_callback=job.callback("crawl") if job else None,
+                owner=current_user.id
             )
             
             if not result.get("success", False):
                 raise HTTPException(status_code=400, detail=result.get("message"))
             
+            # ✅ Dedup lintas crawl (comment_index)
+            dedup_stats = _dedup_crawl_result(result, request.dedup_mode, db)
+            
             # Save metadata ke database
             file_size = 0
             if os.path.exists(result["file"]):
@@ -258,17 +565,22 @@ async def get_comments(
             # Gabungkan semua video URLs
             video_urls_str = ", ".join(result["video_urls"])
             
-            dataset = Dataset(
-                filename=result["file"],
-                source="youtube",
-                video_url=video_urls_str,  # ✅ Simpan semua URLs
-                total_rows=result.get("count", 0),
-                file_size_mb=file_size,
-                uploaded_by=current_user.id,
-                description=f"Batch crawl: {result['successful_videos']} videos, {result['count']} comments"
-            )
-            
-            db.add(dataset)
+            # ✅ Resume crawl -> update dataset yang sudah ada
+            dataset = _owned_crawl_dataset(result["file"], current_user, db)
+            if dataset:
+                dataset.total_rows = result.get("count", 0)
+                dataset.file_size_mb = file_size
+            else:
+                dataset = Dataset(
+                    filename=result["file"],
+                    source="youtube",
+                    video_url=video_urls_str,  # ✅ Simpan semua URLs
+                    total_rows=result.get("count", 0),
+                    file_size_mb=file_size,
+                    uploaded_by=current_user.id,
+                    description=f"Batch crawl: {result['successful_videos']} videos, {result['count']} comments"
+                )
+                db.add(dataset)
             db.commit()
             db.refresh(dataset)
             
@@ -280,6 +592,7 @@ async def get_comments(
                 "dataset_id": dataset.id,
                 "successful_videos": result["successful_videos"],
                 "failed_videos": result["failed_videos"],
+                "dedup": dedup_stats,
                 "crawled_by": current_user.username,
                 "comments": result.get("comments", [])
             }
@@ -290,28 +603,40 @@ async def get_comments(
             
             result = get_youtube_comments(
                 video_url=request.video_url,
-                max_results=request.max_results
+                max_results=request.max_results,
+                stream=request.stream,
+                output_file=output_file,
+                progress_callback=job.callback("crawl") if job else None,
+                owner=current_user.id
             )
             
             if not result.get("success", False):
                 raise HTTPException(status_code=400, detail=result.get("message"))
             
+            # ✅ Dedup lintas crawl (comment_index)
+            dedup_stats = _dedup_crawl_result(result, request.dedup_mode, db)
+            
             # Save metadata ke database
             file_size = 0
             if os.path.exists(result["file"]):
                 file_size = round(os.path.getsize(result["file"]) / (1024*1024), 2)
             
-            dataset = Dataset(
-                filename=result["file"],
-                source="youtube",
-                video_url=request.video_url,
-                total_rows=result.get("count", 0),
-                file_size_mb=file_size,
-                uploaded_by=current_user.id,
-                description=f"Single crawl: {result['count']} comments"
-            )
-            
-            db.add(dataset)
+            # ✅ Resume crawl -> update dataset yang sudah ada
+            dataset = _owned_crawl_dataset(result["file"], current_user, db)
+            if dataset:
+                dataset.total_rows = result.get("count", 0)
+                dataset.file_size_mb = file_size
+            else:
+                dataset = Dataset(
+                    filename=result["file"],
+                    source="youtube",
+                    video_url=request.video_url,
+                    total_rows=result.get("count", 0),
+                    file_size_mb=file_size,
+                    uploaded_by=current_user.id,
+                    description=f"Single crawl: {result['count']} comments"
+                )
+                db.add(dataset)
             db.commit()
             db.refresh(dataset)
             
@@ -321,6 +646,7 @@ async def get_comments(
                 "file": result["file"],
                 "count": result["count"],
                 "dataset_id": dataset.id,
+                "dedup": dedup_stats,
                 "crawled_by": current_user.username,
                 "comments": result.get("comments", [])
             }
@@ -398,6 +724,11 @@ async def run_preprocessing(
     current_user: User = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
+    """Preprocess data (background=True → job queue, poll GET /jobs/{job_id})"""
+    return await _run_or_queue("preprocess", _run_preprocessing_job, config, current_user, db)
+
+
+def _run_preprocessing_job(config: PreprocessConfig, current_user: User, db: Session, job=None):
     """Preprocess data - only user's own datasets"""
     try:
         # ✅ UBAH: config.inputfile → config.input_file
@@ -439,11 +770,18 @@ async def run_preprocessing(
             output_path=outputfile,
             num_workers=config.num_cores,        # ✅ UBAH
             batch_size=config.batch_size,        # ✅ UBAH
-            skip_translation=config.skip_translation  # ✅ UBAH
+            skip_translation=config.skip_translation,  # ✅ UBAH
+            use_processes=config.use_processes,
+            stream=config.stream,
+            vectorized=config.vectorized,
+            trace_rows=config.trace_rows,
+            progress_callback=job.callback("preprocess") if job else None
         )
         
         # Count processed rows
-        if os.path.exists(outputfile):
+        if "total_written" in result:
+            totalprocessed = result["total_written"]
+        elif os.path.exists(outputfile):
             import pandas as pd
             df = pd.read_csv(outputfile)
             totalprocessed = len(df)
@@ -567,6 +905,11 @@ async def auto_label_dataset(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """Auto-label preprocessed data (background=True → job queue)"""
+    return await _run_or_queue("auto-label", _auto_label_dataset_job, config, current_user, db)
+
+
+def _auto_label_dataset_job(config: AutoLabelConfig, current_user: User, db: Session, job=None):
     try:
         # 1. Cek file fisik ada
         if not os.path.exists(config.input_file):
@@ -625,6 +968,8 @@ async def auto_label_dataset(
             output_file = f"GetLabelling{timestamp}.csv"
         
         # Run auto-labeling
+        if job:
+            job.update("labelling", 0, 1, force=True)
         result = auto_label_and_save(
             input_file=config.input_file,
             output_file=output_file,
@@ -801,6 +1146,11 @@ async def generate_tfidf(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """Generate TF-IDF features (background=True → job queue)"""
+    return await _run_or_queue("tfidf", _generate_tfidf_job, request, current_user, db)
+
+
+def _generate_tfidf_job(request: TFIDFRequest, current_user: User, db: Session, job=None):
     """
     Generate TF-IDF features - ADMIN ONLY
     """
@@ -914,19 +1264,27 @@ async def generate_tfidf(
         # Create TF-IDF vectorizer
         vectorizer = TfidfVectorizer(
             max_features=request.max_features,
-            ngram_range=(1, 2),
-            min_df=2,
-            max_df=0.95,
+            ngram_range=tuple(request.ngram_range),
+            min_df=request.min_df,
+            max_df=request.max_df,
             lowercase=True,
             strip_accents='unicode'
         )
         
         # Fit and transform
+        if job:
+            job.update("vectorizing", 0, len(df), force=True)
         print(f"Fitting TF-IDF on {len(df)} documents...")
-        tfidf_matrix = vectorizer.fit_transform(df[text_column])
+        try:
+            tfidf_matrix = vectorizer.fit_transform(df[text_column])
+        except ValueError as e:
+            # ngram_range / min_df / max_df tidak valid untuk dataset ini
+            raise HTTPException(status_code=400, detail=f"Invalid TF-IDF parameters: {e}")
         print(f"TF-IDF matrix shape: {tfidf_matrix.shape}")
         
         # Save vectorizer and matrix
+        if job:
+            job.update("saving", len(df), len(df), force=True)
         os.makedirs('models', exist_ok=True)
         joblib.dump(vectorizer, vectorizer_output)
         joblib.dump(tfidf_matrix, matrix_output)
@@ -1207,6 +1565,11 @@ async def train_naive_bayes(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """Train Naive Bayes with K-Fold CV (background=True → job queue)"""
+    return await _run_or_queue("train", _train_naive_bayes_job, config, current_user, db)
+
+
+def _train_naive_bayes_job(config: TrainConfig, current_user: User, db: Session, job=None):
     """
     Train Naive Bayes with K-Fold Cross Validation - ADMIN ONLY
     """
@@ -1223,9 +1586,11 @@ async def train_naive_bayes(
         # ✅ PERBAIKAN: Tambahkan pengecekan result None
         result = train_naive_bayes_with_cv(
             k=config.n_splits,
-            alpha=1.0,
+            alpha=config.alpha,
             random_state=config.random_state,
-            use_balancing=use_balancing
+            use_balancing=use_balancing,
+            progress_callback=job.callback("cross-validation") if job else None,
+            n_jobs=config.n_jobs
         )
         
         # ✅ CEK jika result None
@@ -1407,6 +1772,11 @@ async def train_both_approaches(
     current_user: User = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
+    """Train both approaches (background=True → job queue)"""
+    return await _run_or_queue("train-both", _train_both_approaches_job, config, current_user, db)
+
+
+def _train_both_approaches_job(config: TrainRequest, current_user: User, db: Session, job=None):
     """Train model - only user's own labeled data"""
     try:
         # ✅ Validasi: labeled data harus milik user
@@ -1444,47 +1814,27 @@ async def train_both_approaches(
         print(f"   N-Splits: {config.n_splits}")
         print(f"{'='*80}\n")
         
-        # 1. Train NON-BALANCING
-        print("\n" + "="*80)
-        print("📊 STEP 1: Training NON-BALANCING Model")
-        print("="*80)
-        
-        result_non_balanced = train_naive_bayes_with_cv(
+        # 1. Train NON-BALANCING + BALANCING dalam satu pass CV
+        #    (data di-load sekali, split fold sama untuk kedua approach)
+        result_both = train_both_approaches_with_cv(
             k=config.n_splits,
-            alpha=1.0,
+            alpha=config.alpha,
             random_state=config.random_state,
-            use_balancing=False,
             dataset_filename=config.labeled_file,  # ✅ Pass custom files
             tfidf_matrix_filename=config.tfidf_matrix_file,  # ✅ Pass custom files
-            output_prefix=config.output_prefix
+            output_prefix=config.output_prefix,
+            progress_callback=job.callback("cross-validation") if job else None,
+            n_jobs=config.n_jobs
         )
         
-        if "error" in result_non_balanced:
+        if "error" in result_both:
             raise HTTPException(
                 status_code=500,
-                detail=f"Non-balancing training failed: {result_non_balanced['error']}"
+                detail=f"Training failed: {result_both['error']}"
             )
         
-        # 2. Train BALANCING
-        print("\n" + "="*80)
-        print("⚖️ STEP 2: Training BALANCING Model")
-        print("="*80)
-        
-        result_balanced = train_naive_bayes_with_cv(
-            k=config.n_splits,
-            alpha=1.0,
-            random_state=config.random_state,
-            use_balancing=True,
-            dataset_filename=config.labeled_file,  # ✅ Pass custom files
-            tfidf_matrix_filename=config.tfidf_matrix_file,  # ✅ Pass custom files
-            output_prefix=config.output_prefix
-        )
-        
-        if "error" in result_balanced:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Balancing training failed: {result_balanced['error']}"
-            )
+        result_non_balanced = result_both["non_balancing"]
+        result_balanced = result_both["balancing"]
         
         total_time = time.time() - total_start
         
@@ -1498,8 +1848,7 @@ async def train_both_approaches(
         f1_diff = balanced_metrics["f1_score"] - non_balanced_metrics["f1_score"]
         
         # 4. Data info
-        df = pd.read_csv(config.labeled_file)
-        total_samples = len(df)
+        total_samples = result_both["data_info"]["total_samples"]
         train_samples = int(total_samples * (config.n_splits - 1) / config.n_splits)
         test_samples = int(total_samples / config.n_splits)
         session_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -1709,6 +2058,128 @@ async def get_processed_file(current_user: dict = Depends(get_current_user)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
     
+# =========================
+# MODEL REGISTRY (cache model untuk endpoint prediksi)
+# =========================
+
+@app.on_event("startup")
+def warm_model_registry():
+    """Load vectorizer + model terbaru ke cache (MODEL_WARM_LOAD=0 untuk mematikan)"""
+    if os.getenv("MODEL_WARM_LOAD", "1") == "0":
+        return
+    db = SessionLocal()
+    try:
+        loaded = model_registry.warm_load(db)
+        print(f"[INFO] Model registry warm-loaded {loaded} file(s)")
+    except Exception as e:
+        print(f"[WARN] Model registry warm-load failed: {e}")
+    finally:
+        db.close()
+
+
+@app.get("/model-cache")
+async def model_cache_stats(current_user: User = Depends(get_current_user)):
+    """Isi model registry: file yang di-cache, ukuran, hit/miss"""
+    return model_registry.stats()
+
+
+def _user_owns_file(filename: str, current_user: User, db: Session) -> bool:
+    """File tercatat sebagai dataset / hasil preprocessing / hasil labelling milik user"""
+    return any(
+        db.query(model).filter(column == filename, owner == current_user.id).first() is not None
+        for model, column, owner in (
+            (Dataset, Dataset.filename, Dataset.uploaded_by),
+            (PreprocessedData, PreprocessedData.output_filename, PreprocessedData.processed_by),
+            (LabeledData, LabeledData.output_filename, LabeledData.labeled_by),
+        )
+    )
+
+@app.post("/predict-batch")
+async def predict_batch(
+    request: BatchPredictRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Batch prediction (list teks atau file dataset), hasil di-stream sebagai NDJSON:
+    satu baris "meta", satu baris per teks ("prediction"), lalu satu baris "summary".
+    """
+    if not request.texts and not request.input_file:
+        raise HTTPException(status_code=400, detail="Either texts or input_file must be provided")
+    if request.chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be >= 1")
+    
+    if request.model_id is not None:
+        training_record = db.query(TrainingHistory).filter(TrainingHistory.id == request.model_id).first()
+    else:
+        training_record = db.query(TrainingHistory).filter(
+            TrainingHistory.approach == request.approach
+        ).order_by(TrainingHistory.timestamp.desc()).first()
+    if not training_record:
+        raise HTTPException(status_code=404, detail="Model not found")
+    
+    try:
+        vectorizer, model = model_registry.get_pair(training_record)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError:
+        raise HTTPException(status_code=500, detail="Invalid model format")
+    
+    if request.input_file:
+        # ✅ Hanya file dataset milik user (Dataset / PreprocessedData / LabeledData)
+        if not _user_owns_file(request.input_file, current_user, db):
+            raise HTTPException(status_code=403, detail="You don't have permission to use this file")
+        if not os.path.exists(request.input_file):
+            raise HTTPException(status_code=404, detail=f"Input file not found: {request.input_file}")
+        columns = pd.read_csv(request.input_file, nrows=0).columns
+        text_column = request.text_column or detect_text_column(columns, request.preprocess)
+        if text_column not in columns:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No valid text column found. Available: {columns.tolist()}"
+            )
+        texts = (
+            chunk[text_column]
+            for chunk in pd.read_csv(request.input_file, usecols=[text_column], chunksize=request.chunk_size)
+        )
+    else:
+        text_column = None
+        texts = request.texts
+    
+    def generate():
+        start = time.time()
+        counts = Counter()
+        total = 0
+        yield json.dumps({
+            "type": "meta",
+            "model_id": training_record.id,
+            "approach": training_record.approach,
+            "model_path": training_record.model_path,
+            "input_file": request.input_file,
+            "text_column": text_column,
+            "classes": [str(c) for c in model.classes_]
+        }) + "\n"
+        try:
+            for records in iter_predictions(
+                texts, vectorizer, model, request.preprocess, request.translate, request.chunk_size
+            ):
+                counts.update(record["predicted_sentiment"] for record in records)
+                total += len(records)
+                yield "".join(json.dumps({"type": "prediction", **record}) + "\n" for record in records)
+        except Exception as e:
+            print(f"[ERROR] Batch prediction failed after {total} rows: {e}")
+            yield json.dumps({"type": "error", "detail": str(e), "rows_done": total}) + "\n"
+            return
+        yield json.dumps({
+            "type": "summary",
+            "total": total,
+            "counts": dict(counts),
+            "time_seconds": round(time.time() - start, 3)
+        }) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 # Di bagian PUBLIC ENDPOINTS, tambahkan setelah endpoint /predict
 @app.post("/predict-both")
 async def predict_both_models(
@@ -1717,12 +2188,6 @@ async def predict_both_models(
 ):
 
     try:
-        try:
-            from PreProcessing import preprocess_for_prediction
-        except ImportError:
-            def preprocess_for_prediction(text):
-                return text.lower().strip()
-        
         # Preprocessing text
         processed_text = preprocess_for_prediction(request.text)
         
@@ -1734,7 +2199,7 @@ async def predict_both_models(
                 detail="TF-IDF vectorizer not found. Please run TF-IDF generation first."
             )
         
-        tfidf_vectorizer = joblib.load(vectorizer_path)
+        tfidf_vectorizer = model_registry.get_vectorizer(vectorizer_path)
         X_new = tfidf_vectorizer.transform([processed_text])
         
         results = {}
@@ -1752,27 +2217,8 @@ async def predict_both_models(
             
             if os.path.exists(model_path):
                 try:
-                    # Load model
-                    loaded_obj = joblib.load(model_path)
-                    
-                    if isinstance(loaded_obj, dict):
-                        print("⚠️ Loaded object is a dict, extracting 'model' key...")
-                        
-                        # Coba ambil model dari dictionary
-                        if 'model' in loaded_obj:
-                            model_nb = loaded_obj['model']
-                        elif 'final_model' in loaded_obj:
-                            model_nb = loaded_obj['final_model']
-                        elif 'classifier' in loaded_obj:
-                            model_nb = loaded_obj['classifier']
-                        else:
-                            raise ValueError(f"Dictionary keys: {list(loaded_obj.keys())}. No 'model' key found.")
-                    else:
-                        # Jika langsung model, langsung pakai
-                        model_nb = loaded_obj
-                    
-                    if not hasattr(model_nb, 'predict'):
-                        raise ValueError(f"Object type: {type(model_nb)}. Not a valid sklearn model.")
+                    # Load model (cached)
+                    model_nb = model_registry.get_model(model_path)
                     
                     # Predict
                     pred_nb = model_nb.predict(X_new)[0]
@@ -1825,27 +2271,8 @@ async def predict_both_models(
             
             if os.path.exists(model_path):
                 try:
-                    # Load model
-                    loaded_obj = joblib.load(model_path)
-                    
-                    # ✅ CEK: Apakah loaded_obj adalah dict atau model?
-                    if isinstance(loaded_obj, dict):
-                        print("⚠️ Loaded object is a dict, extracting 'model' key...")
-                        
-                        if 'model' in loaded_obj:
-                            model_b = loaded_obj['model']
-                        elif 'final_model' in loaded_obj:
-                            model_b = loaded_obj['final_model']
-                        elif 'classifier' in loaded_obj:
-                            model_b = loaded_obj['classifier']
-                        else:
-                            raise ValueError(f"Dictionary keys: {list(loaded_obj.keys())}. No 'model' key found.")
-                    else:
-                        model_b = loaded_obj
-                    
-                    # Validasi
-                    if not hasattr(model_b, 'predict'):
-                        raise ValueError(f"Object type: {type(model_b)}. Not a valid sklearn model.")
+                    # Load model (cached)
+                    model_b = model_registry.get_model(model_path)
                     
                     # Predict
                     pred_b = model_b.predict(X_new)[0]
@@ -1919,7 +2346,7 @@ def detect_negation(text):
 # NEGATION HANDLING UTILITIES
 # =========================
 
-def predict_with_negation_handling(text, model, vectorizer):
+def predict_with_negation_handling(text, model, vectorizer, negation_text=None):
     """
     Handle negation at SENTENCE LEVEL (not word level)
     
@@ -1928,6 +2355,9 @@ def predict_with_negation_handling(text, model, vectorizer):
     2. Predict sentiment of WHOLE SENTENCE
     3. Apply rule-based flip if negation detected
     
+    negation_text: teks untuk deteksi negasi (default: text). Dipakai saat text
+    sudah melalui stopword removal, yang ikut membuang kata negasi.
+    
     PENTING: Model dilatih untuk prediksi KALIMAT, bukan kata tunggal!
     """
     NEGATION_WORDS = {
@@ -1935,7 +2365,7 @@ def predict_with_negation_handling(text, model, vectorizer):
         'tak', 'tiada', 'enggak', 'nggak', 'gak'
     }
     
-    words = text.lower().split()
+    words = (negation_text if negation_text is not None else text).lower().split()
     has_negation = any(word in NEGATION_WORDS for word in words)
     
     # ========================================
@@ -2074,16 +2504,12 @@ async def predict_both_with_negation(
         if not os.path.exists(vectorizer_path):
             raise HTTPException(status_code=404, detail="Vectorizer not found")
         
-        vectorizer = joblib.load(vectorizer_path)
+        vectorizer = model_registry.get_vectorizer(vectorizer_path)
         
-        # Preprocess text
-        try:
-            from PreProcessing import preprocess_for_prediction
-        except ImportError:
-            def preprocess_for_prediction(text):
-                return text.lower().strip()
-        
-        preprocessed = preprocess_for_prediction(request.text)
+        # Preprocess text (negasi yang tidak punya antonim dicek sebelum stopword removal)
+        steps = preprocess_for_prediction(request.text, return_steps=True)
+        preprocessed = steps["finalText"]
+        negation_text = steps["negationHandled"]
         
         results = {}
         
@@ -2096,11 +2522,10 @@ async def predict_both_with_negation(
         
         if training_nb and os.path.exists(training_nb.model_path):
             try:
-                model_obj = joblib.load(training_nb.model_path)
-                model = model_obj.get('model') if isinstance(model_obj, dict) else model_obj
+                model = model_registry.get_model(training_nb.model_path)
                 
                 # ✅ PREDICT WITH NEGATION HANDLING
-                result_nb = predict_with_negation_handling(preprocessed, model, vectorizer)
+                result_nb = predict_with_negation_handling(preprocessed, model, vectorizer, negation_text)
                 
                 results["non_balancing"] = {
                     "predicted_sentiment": result_nb['prediction'],
@@ -2133,11 +2558,10 @@ async def predict_both_with_negation(
         
         if training_b and os.path.exists(training_b.model_path):
             try:
-                model_obj = joblib.load(training_b.model_path)
-                model = model_obj.get('model') if isinstance(model_obj, dict) else model_obj
+                model = model_registry.get_model(training_b.model_path)
                 
                 # ✅ PREDICT WITH NEGATION HANDLING
-                result_b = predict_with_negation_handling(preprocessed, model, vectorizer)
+                result_b = predict_with_negation_handling(preprocessed, model, vectorizer, negation_text)
                 
                 results["balancing"] = {
                     "predicted_sentiment": result_b['prediction'],
@@ -2495,12 +2919,6 @@ async def predict_compare_models(
         print(f"  - Non-Balanced: {non_balanced_model.model_path}")
         
         # 4. Preprocess text
-        try:
-            from PreProcessing import preprocess_for_prediction
-        except ImportError:
-            def preprocess_for_prediction(text):
-                return text.lower().strip()
-        
         processed_text = preprocess_for_prediction(request.text)
         print(f"[DEBUG] Preprocessed text: {processed_text[:50]}...")
         
@@ -2518,7 +2936,7 @@ async def predict_compare_models(
                 detail=f"TF-IDF vectorizer not found: {vectorizer_path}"
             )
         
-        tfidf_vectorizer = joblib.load(vectorizer_path)
+        tfidf_vectorizer = model_registry.get_vectorizer(vectorizer_path)
         X_new = tfidf_vectorizer.transform([processed_text])
         
         # 6. Helper function untuk predict dengan single model
@@ -2533,16 +2951,8 @@ async def predict_compare_models(
                     detail=f"Model file not found: {model_path}"
                 )
             
-            # Load model
-            loaded_obj = joblib.load(model_path)
-            
-            if isinstance(loaded_obj, dict):
-                model = loaded_obj.get("model") or loaded_obj.get("final_model") or loaded_obj.get("classifier")
-            else:
-                model = loaded_obj
-            
-            if not hasattr(model, 'predict'):
-                raise ValueError(f"Invalid model format: {type(model)}")
+            # Load model (cached)
+            model = model_registry.get_model(model_path)
             
             # Predict
             prediction = model.predict(X_new)[0]
@@ -2653,6 +3063,7 @@ async def import_comments_file(
     filename: str,
     video_url: str = None,
     description: str = None,
+    dedup_mode: str = "link",  # ✅ "link" | "skip" | "off" (cek comment_index)
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -2692,13 +3103,30 @@ async def import_comments_file(
                 detail=f"CSV must have 'comment' column. Found columns: {list(df.columns)}"
             )
         
+        # ✅ 3b. Dedup terhadap comment_index (komentar yang sudah pernah di-crawl/import)
+        # File sumber user tidak diubah; hasil dedup ditulis ke salinan <nama>_dedup_<timestamp>.csv
+        dedup_stats = None
+        dataset_file = filename
+        if dedup_mode != "off":
+            from dedup_utils import dedup_file, DEDUP_MODES
+            if dedup_mode not in DEDUP_MODES:
+                raise HTTPException(status_code=400, detail=f"dedup_mode must be one of {DEDUP_MODES}")
+            root, ext = os.path.splitext(filename)
+            dedup_copy = f"{root}_dedup_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext or '.csv'}"
+            df, dedup_stats = dedup_file(
+                filename, db, dedup_mode, text_column=comment_column, output_path=dedup_copy
+            )
+            dataset_file = dedup_stats["file"]
+        
         # 4. Hitung statistik
         total_rows = len(df)
-        file_size_mb = round(os.path.getsize(filename) / (1024*1024), 2)
+        file_size_mb = round(os.path.getsize(dataset_file) / (1024*1024), 2)
         
         print(f"\n{'='*60}")
         print(f"📥 IMPORTING DATASET:")
         print(f"  File: {filename}")
+        if dataset_file != filename:
+            print(f"  Dedup copy: {dataset_file}")
         print(f"  Rows: {total_rows:,}")
         print(f"  Size: {file_size_mb} MB")
         print(f"  Columns: {list(df.columns)}")
@@ -2708,7 +3136,7 @@ async def import_comments_file(
         
         # 5. Simpan metadata ke database
         dataset = Dataset(
-            filename=filename,
+            filename=dataset_file,
             source="manual_import",  # atau "upload", "csv"
             video_url=video_url,
             total_rows=total_rows,
@@ -2729,11 +3157,13 @@ async def import_comments_file(
             "status": "success",
             "message": f"Successfully imported {filename}",
             "dataset_id": dataset.id,
-            "filename": filename,
+            "filename": dataset_file,
+            "source_file": filename,
             "total_rows": total_rows,
             "file_size_mb": file_size_mb,
             "columns": list(df.columns),
             "comment_column": comment_column,
+            "dedup": dedup_stats,
             "video_url": video_url,
             "uploaded_by": current_user.username,
             "upload_date": dataset.upload_date.isoformat()
@@ -2855,12 +3285,6 @@ async def predict_with_model(
             )
         
         # 2. Preprocess text
-        try:
-            from PreProcessing import preprocess_for_prediction
-        except ImportError:
-            def preprocess_for_prediction(text):
-                return text.lower().strip()
-        
         processed_text = preprocess_for_prediction(request.text)
         
         # 3. Load TF-IDF vectorizer (find matching vectorizer)
@@ -2876,18 +3300,13 @@ async def predict_with_model(
                 detail=f"TF-IDF vectorizer not found: {vectorizer_path}"
             )
         
-        tfidf_vectorizer = joblib.load(vectorizer_path)
+        tfidf_vectorizer = model_registry.get_vectorizer(vectorizer_path)
         X_new = tfidf_vectorizer.transform([processed_text])
         
-        # 4. Load model and predict
-        loaded_obj = joblib.load(model_path)
-        
-        if isinstance(loaded_obj, dict):
-            model = loaded_obj.get('model') or loaded_obj.get('final_model') or loaded_obj.get('classifier')
-        else:
-            model = loaded_obj
-        
-        if not hasattr(model, 'predict'):
+        # 4. Load model (cached) and predict
+        try:
+            model = model_registry.get_model(model_path)
+        except ValueError:
             raise HTTPException(
                 status_code=500,
                 detail="Invalid model format"
@@ -3031,6 +3450,325 @@ async def delete_training_history(
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+# =========================
+# HYPERPARAMETER SWEEP (alpha + TF-IDF)
+# =========================
+
+@app.post("/sweep")
+async def sweep_hyperparameters(
+    config: SweepRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Grid search alpha / max_features / ngram_range / min_df / max_df (background=True → job queue)"""
+    return await _run_or_queue("sweep", _sweep_job, config, current_user, db)
+
+
+def _sweep_labeled_data(labeled_file: str, current_user: User, db: Session):
+    """LabeledData untuk file sweep; 403 jika milik user lain, 404 jika file tidak ada"""
+    labeled = db.query(LabeledData).filter(
+        LabeledData.output_filename == labeled_file
+    ).order_by(LabeledData.labeled_at.desc()).first()
+    if labeled and labeled.labeled_by != current_user.id:
+        raise HTTPException(status_code=403, detail="You don't have permission to train with this data")
+    if not os.path.exists(labeled_file):
+        raise HTTPException(status_code=404, detail=f"Labeled file not found: {labeled_file}")
+    return labeled
+
+def _sweep_job(config: SweepRequest, current_user: User, db: Session, job=None):
+    """
+    Evaluasi grid dengan closed-form CV (non-balancing). Konfigurasi yang sudah
+    ada di sweep_results untuk isi dataset yang sama tidak dihitung ulang.
+    Konfigurasi terbaik di-train di seluruh data dan dicatat di TrainingHistory.
+    """
+    start_time = time.time()
+    
+    if config.metric not in sweep_utils.SWEEP_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {list(sweep_utils.SWEEP_METRICS)}")
+    if not sweep_utils.OUTPUT_PREFIX_PATTERN.fullmatch(config.output_prefix):
+        raise HTTPException(status_code=400, detail="output_prefix may only contain letters, digits, '_' and '-'")
+    labeled = _sweep_labeled_data(config.labeled_file, current_user, db)
+    
+    try:
+        vectorizer_configs, alphas = sweep_utils.build_grid(
+            config.alphas, config.max_features, config.ngram_ranges, config.min_df, config.max_df
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    data = sweep_utils.load_labeled_texts(config.labeled_file)
+    if "error" in data:
+        raise HTTPException(status_code=400, detail=data["error"])
+    
+    # 1. Memo: konfigurasi yang sudah pernah dievaluasi untuk dataset + setup CV ini
+    dataset_hash = sweep_utils.file_hash(config.labeled_file)
+    memo = sweep_utils.load_memoized(db, dataset_hash, config.n_splits, config.random_state, current_user.id)
+    grid_keys = [
+        sweep_utils.config_key({**vectorizer_config, "alpha": alpha})
+        for vectorizer_config in vectorizer_configs for alpha in alphas
+    ]
+    cached_keys = [key for key in grid_keys if key in memo]
+    
+    print(f"\n{'='*80}")
+    print(f"🔎 HYPERPARAMETER SWEEP")
+    print(f"{'='*80}")
+    print(f"   Labeled file: {config.labeled_file} ({len(data['texts'])} samples)")
+    print(f"   Grid: {len(vectorizer_configs)} TF-IDF config(s) x {len(alphas)} alpha(s) = {len(grid_keys)}")
+    print(f"   Cached: {len(cached_keys)}")
+    
+    # 2. Evaluasi konfigurasi yang belum ada di memo
+    if job:
+        # total sama dengan yang dilaporkan run_sweep (konfigurasi vectorizer yang belum di-memo)
+        pending = sweep_utils.pending_configs(vectorizer_configs, alphas, cached_keys)
+        job.update("sweep", 0, len(pending), force=True)
+    new_results = sweep_utils.run_sweep(
+        data["texts"], data["labels"], vectorizer_configs, alphas,
+        n_splits=config.n_splits,
+        random_state=config.random_state,
+        n_jobs=config.n_jobs,
+        skip_keys=cached_keys,
+        progress_callback=job.callback("sweep") if job else None
+    )
+    saved = sweep_utils.save_results(
+        db, new_results, dataset_hash, config.labeled_file,
+        config.n_splits, config.random_state, current_user.id
+    )
+    rows = {**memo, **saved}
+    
+    results = []
+    for result in new_results:
+        result["cached"] = False
+        results.append(result)
+    for key in cached_keys:
+        result = sweep_utils.memo_to_result(memo[key], current_user.id)
+        result["cached"] = True
+        results.append(result)
+    errors = [result for result in results if "error" in result]
+    ranked = sweep_utils.rank_results(results, config.metric)
+    if not ranked:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No valid configuration in grid: {errors[0]['error'] if errors else 'empty grid'}"
+        )
+    best = ranked[0]
+    print(f"   Best ({config.metric}={best[config.metric]:.4f}): {best['config']}")
+    
+    # 3. Train konfigurasi terbaik + catat di TFIDFModel / TrainingHistory
+    best_model = None
+    if config.train_best:
+        if job:
+            job.update("training-best", 0, 1, force=True)
+        session_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        trained = sweep_utils.train_best_config(
+            data["texts"], data["labels"], best["config"],
+            n_splits=config.n_splits,
+            random_state=config.random_state,
+            output_prefix=config.output_prefix,
+            timestamp=session_timestamp
+        )
+        cv = trained["cv"]
+        total_samples = len(data["texts"])
+        
+        tfidf_model = TFIDFModel(
+            labeled_data_id=labeled.id if labeled else None,
+            input_filename=config.labeled_file,
+            vectorizer_path=trained["vectorizer_path"],
+            matrix_path=trained["matrix_path"],
+            max_features=best["config"]["max_features"],
+            matrix_shape_rows=trained["matrix_shape"][0],
+            matrix_shape_cols=trained["matrix_shape"][1],
+            vocabulary_size=trained["vocabulary_size"],
+            created_by=current_user.id
+        )
+        db.add(tfidf_model)
+        db.flush()
+        
+        training_record = TrainingHistory(
+            tfidf_model_id=tfidf_model.id,
+            labeled_data_id=labeled.id if labeled else None,
+            dataset_name=config.labeled_file,
+            model_path=trained["model_path"],
+            algorithm="Multinomial Naive Bayes",
+            approach="non-balancing",
+            n_splits=config.n_splits,
+            random_state=config.random_state,
+            accuracy=cv["accuracy"],
+            precision_score=cv["precision"],
+            recall_score=cv["recall"],
+            f1_score=cv["f1_score"],
+            confusion_matrix=str(cv["confusion_matrix"]),
+            training_time_seconds=time.time() - start_time,
+            total_samples=total_samples,
+            train_samples=int(total_samples * (config.n_splits - 1) / config.n_splits),
+            test_samples=int(total_samples / config.n_splits),
+            session_key=f"sweep_{session_timestamp}",
+            trained_by=current_user.id
+        )
+        db.add(training_record)
+        db.flush()
+        
+        best_row = rows.get(sweep_utils.config_key(best["config"]))
+        if best_row is not None:
+            # metrics boleh dari memo user lain, link model hanya di baris milik sendiri
+            best_row = sweep_utils.own_result(db, best_row, current_user.id)
+            best_row.training_history_id = training_record.id
+        db.commit()
+        best["training_history_id"] = training_record.id
+        print(f"✅ TrainingHistory saved: {training_record.id}")
+        
+        best_model = {
+            "history_id": training_record.id,
+            "tfidf_model_id": tfidf_model.id,
+            "model_path": trained["model_path"],
+            "vectorizer_path": trained["vectorizer_path"],
+            "matrix_path": trained["matrix_path"],
+            "confusion_matrix": cv["confusion_matrix"],
+            "class_names": cv["class_names"]
+        }
+    
+    total_time = time.time() - start_time
+    print(f"   Sweep time: {total_time:.2f} seconds")
+    print(f"{'='*80}\n")
+    
+    return {
+        "status": "success",
+        "message": f"Sweep completed: {len(new_results)} evaluated, {len(cached_keys)} from cache",
+        "labeled_file": config.labeled_file,
+        "metric": config.metric,
+        "grid_size": len(grid_keys),
+        "evaluated": len(new_results),
+        "cached": len(cached_keys),
+        "best": best,
+        "best_model": best_model,
+        "results": ranked,
+        "errors": errors,
+        "config": {
+            "n_splits": config.n_splits,
+            "random_state": config.random_state,
+            "approach": "non-balancing"
+        },
+        "sweep_time_seconds": round(total_time, 2),
+        "trained_by": current_user.username
+    }
+
+
+@app.get("/sweep-results")
+async def get_sweep_results(
+    labeled_file: str,
+    n_splits: int = 10,
+    random_state: int = 42,
+    metric: str = "f1_score",
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Hasil sweep yang sudah di-memo untuk isi file labeled saat ini (terbaik dulu)"""
+    if metric not in sweep_utils.SWEEP_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {list(sweep_utils.SWEEP_METRICS)}")
+    _sweep_labeled_data(labeled_file, current_user, db)
+    memo = sweep_utils.load_memoized(db, sweep_utils.file_hash(labeled_file), n_splits, random_state, current_user.id)
+    ranked = sweep_utils.rank_results(
+        [sweep_utils.memo_to_result(row, current_user.id) for row in memo.values()], metric
+    )
+    return {
+        "labeled_file": labeled_file,
+        "metric": metric,
+        "total": len(ranked),
+        "results": ranked[:limit]
+    }
+
+# =========================
+# BACKGROUND JOBS
+# =========================
+
+@app.on_event("startup")
+def recover_background_jobs():
+    """Job yang terputus karena server restart ditandai failed"""
+    job_manager.recover_interrupted()
+
+
+async def _run_tracked(func, config, current_user, db):
+    """Jalankan func di threadpool (tidak blok event loop) dengan progress di progress_registry"""
+    if config.run_id and config.run_id.startswith("job-"):
+        raise HTTPException(status_code=400, detail="run_id prefix 'job-' is reserved for background jobs")
+    try:
+        tracker = progress_registry.tracker(config.run_id, owner=current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        result = await run_in_threadpool(func, config, current_user=current_user, db=db, job=tracker)
+    except BaseException as e:
+        tracker.finish("failed", str(getattr(e, "detail", e)))
+        raise
+    tracker.finish("done")
+    if isinstance(result, dict):
+        result.setdefault("run_id", tracker.run_id)
+    return result
+
+
+async def _run_or_queue(job_type, func, config, current_user, db):
+    """config.background=True → submit ke job queue, selain itu jalankan langsung (_run_tracked)"""
+    if config.background:
+        job_id = job_manager.submit(job_type, current_user.id, func, config, params=config)
+        return {
+            "status": "queued",
+            "job_id": job_id,
+            "job_type": job_type,
+            "run_id": job_run_id(job_id),
+            "status_url": f"/jobs/{job_id}"
+        }
+    return await _run_tracked(func, config, current_user, db)
+
+
+def _get_user_job(job_id: int, current_user: User, db: Session) -> BackgroundJob:
+    job = db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+    if not job or job.created_by != current_user.id:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@app.get("/jobs")
+async def list_jobs(
+    status: Optional[str] = None,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List background jobs milik user (terbaru dulu)"""
+    query = db.query(BackgroundJob).filter(BackgroundJob.created_by == current_user.id)
+    if status:
+        query = query.filter(BackgroundJob.status == status)
+    jobs = query.order_by(BackgroundJob.created_at.desc()).limit(limit).all()
+    return {
+        "total": len(jobs),
+        "jobs": [job_to_dict(job, include_result=False) for job in jobs]
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Status, stage, progress dan hasil (jika selesai) satu job"""
+    return job_to_dict(_get_user_job(job_id, current_user, db))
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Cancel job; job yang sedang berjalan berhenti di checkpoint progress berikutnya"""
+    job = _get_user_job(job_id, current_user, db)
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Job {job_id} already {job.status}")
+    job_manager.cancel(job_id)
+    db.refresh(job)
+    return job_to_dict(job, include_result=False)
+
 # =========================
 # STATISTICS ENDPOINTS
 # =========================
@@ -0,0 +1,152 @@
+# model_registry.py
+"""
+Cache in-memory untuk vectorizer TF-IDF dan model Naive Bayes yang dipakai
+endpoint prediksi, supaya pickle tidak di-load ulang di setiap request.
+
+- key = path file; entry otomatis di-load ulang jika mtime file berubah
+- LRU eviction dengan batas jumlah entry dan budget memori
+  (ukuran diestimasi dari ukuran file pickle)
+- warm_load() memuat model terbaru per approach saat server start
+"""
+
+import os
+import threading
+from collections import OrderedDict
+import joblib
+
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", "512"))
+MODEL_CACHE_MAX_ITEMS = int(os.getenv("MODEL_CACHE_MAX_ITEMS", "16"))
+DEFAULT_VECTORIZER_PATH = "models/tfidf_vectorizer.pkl"
+
+
+def extract_estimator(loaded_obj):
+    """Model sklearn dari hasil joblib.load (file training menyimpan dict {'model': ...})"""
+    if isinstance(loaded_obj, dict):
+        model = loaded_obj.get("model") or loaded_obj.get("final_model") or loaded_obj.get("classifier")
+        if model is None:
+            raise ValueError(f"Dictionary keys: {list(loaded_obj.keys())}. No 'model' key found.")
+    else:
+        model = loaded_obj
+    if not hasattr(model, "predict"):
+        raise ValueError(f"Object type: {type(model)}. Not a valid sklearn model.")
+    return model
+
+
+class ModelRegistry:
+    """Process-wide LRU cache of deserialized vectorizers/models"""
+
+    def __init__(self, max_mb=MODEL_CACHE_MAX_MB, max_items=MODEL_CACHE_MAX_ITEMS):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_items = max_items
+        self._entries = OrderedDict()  # (path, kind) -> (mtime_ns, size, obj)
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load_lock(self, key):
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def _get(self, path, kind, loader):
+        path = os.path.normpath(path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"File not found: {path}")
+        key = (path, kind)
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == mtime:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+        # satu thread yang load per file, request lain menunggu hasilnya
+        with self._load_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] == mtime:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+            obj = loader(joblib.load(path))
+            size = os.path.getsize(path)
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = (mtime, size, obj)
+                self._entries.move_to_end(key)
+                self._evict()
+            print(f"[INFO] Model registry loaded {path} ({size / (1024*1024):.1f} MB)")
+            return obj
+
+    def _evict(self):
+        total = sum(entry[1] for entry in self._entries.values())
+        # entry terbaru selalu dipertahankan walaupun melebihi budget
+        while len(self._entries) > 1 and (total > self.max_bytes or len(self._entries) > self.max_items):
+            (path, _), (_, size, _) = self._entries.popitem(last=False)
+            total -= size
+            print(f"[INFO] Model registry evicted {path}")
+
+    def get_vectorizer(self, path=DEFAULT_VECTORIZER_PATH):
+        return self._get(path, "vectorizer", lambda obj: obj)
+
+    def get_model(self, path):
+        """Estimator dari file model (dict hasil training atau model langsung)"""
+        return self._get(path, "model", extract_estimator)
+
+    def get_pair(self, training_record):
+        """(vectorizer, model) untuk satu TrainingHistory"""
+        vectorizer_path = (
+            training_record.tfidf_model.vectorizer_path
+            if training_record.tfidf_model else DEFAULT_VECTORIZER_PATH
+        )
+        return self.get_vectorizer(vectorizer_path), self.get_model(training_record.model_path)
+
+    def warm_load(self, db, approaches=("non-balancing", "balancing")):
+        """Load model terbaru per approach (+ vectorizer-nya) ke cache"""
+        from database import TrainingHistory
+        loaded = 0
+        if os.path.exists(DEFAULT_VECTORIZER_PATH):
+            self.get_vectorizer(DEFAULT_VECTORIZER_PATH)
+            loaded += 1
+        for approach in approaches:
+            record = (
+                db.query(TrainingHistory)
+                .filter(TrainingHistory.approach == approach)
+                .order_by(TrainingHistory.timestamp.desc())
+                .first()
+            )
+            if record is None:
+                continue
+            try:
+                self.get_pair(record)
+                loaded += 2
+            except Exception as e:
+                print(f"[WARN] Warm-load skipped for {approach} model {record.model_path}: {e}")
+        return loaded
+
+    def invalidate(self, path=None):
+        """Hapus satu file (atau semua jika path=None) dari cache"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+            path = os.path.normpath(path)
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": [
+                    {"path": path, "kind": kind, "size_mb": round(size / (1024*1024), 3)}
+                    for (path, kind), (_, size, _) in self._entries.items()
+                ],
+                "size_mb": round(sum(entry[1] for entry in self._entries.values()) / (1024*1024), 3),
+                "budget_mb": round(self.max_bytes / (1024*1024), 1),
+                "max_items": self.max_items,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+model_registry = ModelRegistry()
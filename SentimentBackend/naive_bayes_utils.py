@@ -1,11 +1,14 @@
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, classification_report
 from sklearn.model_selection import StratifiedKFold
 import joblib
+from joblib import Parallel, delayed
 from collections import Counter
 import os
+from balancing_utils import get_neighbor_graph, tomek_links_mask
 
 # Import balancing utilities
 try:
@@ -91,43 +94,315 @@ def load_full_data(dataset_filename=None, tfidf_matrix_filename=None):
         return None, None, None
 
 
-def train_naive_bayes_with_cv(
-    k=10, 
-    alpha=1.0, 
-    random_state=42, 
-    use_balancing=False,
-    dataset_filename=None,
-    tfidf_matrix_filename=None,
-    output_prefix="final"
-):
-    """
-    Train Naive Bayes with Cross Validation
+def _fold_header(fold_num, k, y_train, y_test):
+    return [
+        f"\n{'─'*80}",
+        f"📍 Fold {fold_num}/{k}",
+        f"{'─'*80}",
+        f"   Original train: {len(y_train):>5,} samples",
+        f"   Original test:  {len(y_test):>5,} samples"
+    ]
+
+
+def _distribution_log(title, labels, width):
+    log = [f"\n   📊 {title}:"]
+    dist = Counter(labels)
+    for label in sorted(dist.keys()):
+        pct = (dist[label] / len(labels)) * 100
+        log.append(f"      {label}: {dist[label]:>{width},} ({pct:>5.1f}%)")
+    return log
+
+
+def _evaluate_fold(fold_num, y_test, y_pred):
+    """Metrics macro satu fold. Return (acc, prec, rec, f1, log)"""
+    acc = accuracy_score(y_test, y_pred)
+    prec = precision_score(y_test, y_pred, average='macro', zero_division=0)
+    rec = recall_score(y_test, y_pred, average='macro', zero_division=0)
+    f1 = f1_score(y_test, y_pred, average='macro', zero_division=0)
     
-    Parameters:
-    - k: number of folds
-    - alpha: Laplace smoothing parameter
-    - random_state: random seed
-    - use_balancing: whether to use balancing (Tomek + RUS)
-    - dataset_filename: CSV file path (e.g., GetLabelling_20251226_112400.csv)
-    - tfidf_matrix_filename: TF-IDF matrix file (e.g., tfidf_matrix_20251226_112400.pkl)
-    - output_prefix: prefix for output model file
+    log = [
+        f"\n   ✅ Fold {fold_num} Results:",
+        f"      Accuracy : {acc:.4f} ({acc*100:>6.2f}%)",
+        f"      Precision: {prec:.4f} ({prec*100:>6.2f}%)",
+        f"      Recall   : {rec:.4f} ({rec*100:>6.2f}%)",
+        f"      F1-Score : {f1:.4f} ({f1*100:>6.2f}%)"
+    ]
+    return acc, prec, rec, f1, log
+
+
+def _fold_result(fold_num, train_size, y_test, y_pred, log, seconds, tomek_removed=0, rus_removed=0):
+    acc, prec, rec, f1, results_log = _evaluate_fold(fold_num, y_test, y_pred)
+    return {
+        "metrics": {
+            'fold': fold_num,
+            'train_size': train_size,
+            'test_size': len(y_test),
+            'tomek_removed': tomek_removed,
+            'rus_removed': rus_removed,
+            'total_removed': tomek_removed + rus_removed,
+            'balanced_train_size': train_size,
+            'accuracy': acc,
+            'precision': prec,
+            'recall': rec,
+            'f1_score': f1
+        },
+        "y_true": list(y_test),
+        "y_pred": list(y_pred),
+        "log": log + results_log,
+        "seconds": seconds
+    }
+
+
+def _fit_fold(fold_num, X_train, y_train, X_test, y_test, alpha, random_state, use_balancing, tomek_links=None):
+    """
+    Balancing (opsional), fit MultinomialNB dan evaluasi untuk slice train/test satu fold.
+    tomek_links: mask Tomek links untuk baris train (dari neighbour graph);
+    None -> TomekLinks dihitung langsung di slice train
+    Return: {"metrics", "y_true", "y_pred", "log", "seconds"}
     """
     import time
-    start_time = time.time()
+    fold_start = time.time()
     
-    approach_name = "BALANCED (Tomek + RUS)" if use_balancing else "IMBALANCED (No Balancing)"
-    print(f"\n{'='*80}")
-    print(f"📘 Naive Bayes Training - {approach_name}")
-    print(f"{'='*80}")
+    # Show train distribution BEFORE processing
+    log = _distribution_log(
+        f"Train distribution {'(IMBALANCED)' if not use_balancing else '(BEFORE balancing)'}", y_train, 5
+    )
     
-    # 1. Load data with custom filenames
+    # Apply balancing if needed
+    tomek_removed = 0
+    rus_removed = 0
+    
+    if use_balancing:
+        try:
+            # Apply Tomek Links first
+            if tomek_links is not None:
+                X_after_tomek, y_after_tomek = X_train[~tomek_links], y_train[~tomek_links]
+            else:
+                tomek = TomekLinks(sampling_strategy='all')
+                X_after_tomek, y_after_tomek = tomek.fit_resample(X_train, y_train)
+            tomek_removed = len(y_train) - len(y_after_tomek)
+            
+            # Apply RUS after Tomek
+            rus = RandomUnderSampler(random_state=random_state)
+            X_train_processed, y_train_processed = rus.fit_resample(X_after_tomek, y_after_tomek)
+            rus_removed = len(y_after_tomek) - len(y_train_processed)
+            
+            train_dist_after = Counter(y_train_processed)
+            log.append(f"      ├─ Tomek Links removed: {tomek_removed:>5} samples")
+            log.append(f"      ├─ RUS removed:         {rus_removed:>5} samples")
+            log.append(f"      └─ Total removed:       {tomek_removed + rus_removed:>5} samples")
+            log.append(f"\n   📊 Train distribution AFTER balancing:")
+            for label in sorted(train_dist_after.keys()):
+                pct = (train_dist_after[label] / len(y_train_processed)) * 100
+                log.append(f"      {label}: {train_dist_after[label]:>5} ({pct:5.1f}%)")
+            log.append(f"      Balanced train: {len(y_train_processed):>5} samples")
+            
+        except Exception as e:
+            log.append(f"      ⚠️ Balancing failed: {e}. Using original data.")
+            X_train_processed = X_train
+            y_train_processed = y_train
+            tomek_removed = 0
+            rus_removed = 0
+    else:
+        X_train_processed = X_train
+        y_train_processed = y_train
+        log.append(f"      Data tetap IMBALANCED (no balancing applied)")
+    
+    # Show test distribution (always ORIGINAL)
+    log.extend(_distribution_log("Test distribution (IMBALANCED)", y_test, 4))
+    
+    # Train model
+    model = MultinomialNB(alpha=alpha)
+    model.fit(X_train_processed, y_train_processed)
+    
+    # Predict on ORIGINAL imbalanced test data
+    y_pred = model.predict(X_test)
+    
+    return _fold_result(
+        fold_num, len(y_train_processed), y_test, y_pred, log, time.time() - fold_start,
+        tomek_removed, rus_removed
+    )
+
+
+def _fold_tomek_links(graph, X, y, train_idx):
+    """Mask Tomek links baris train fold dari neighbour graph (None jika tidak ada graph)"""
+    if graph is None:
+        return None
+    try:
+        return tomek_links_mask(graph, X, y, train_idx)
+    except Exception:
+        return None  # fallback ke TomekLinks di _fit_fold
+
+
+def _run_fold(fold_num, k, X, y, train_idx, test_idx, alpha, random_state, use_balancing, graph=None):
+    """
+    Satu fold CV: split, balancing (opsional), fit MultinomialNB, evaluasi.
+    Bisa dijalankan di worker process; log dikembalikan (tidak di-print)
+    supaya output tetap berurutan per fold.
+    Return: {"metrics", "y_true", "y_pred", "header", "log", "seconds"}
+    """
+    # Split data ORIGINAL first
+    X_train, X_test = X[train_idx], X[test_idx]
+    y_train, y_test = y[train_idx], y[test_idx]
+    
+    tomek_links = _fold_tomek_links(graph, X, y, train_idx) if use_balancing else None
+    fold = _fit_fold(fold_num, X_train, y_train, X_test, y_test, alpha, random_state, use_balancing, tomek_links)
+    fold["header"] = _fold_header(fold_num, k, y_train, y_test)
+    return fold
+
+
+# ============================================================
+# CLOSED-FORM CV (NON-BALANCING)
+# ============================================================
+# MultinomialNB cukup ditentukan oleh jumlah fitur per kelas (Y.T @ X) dan
+# jumlah sampel per kelas. Statistik tsb dihitung sekali per test fold (satu
+# perkalian sparse untuk semua fold); model train fold = total - test fold,
+# jadi tidak ada fit ulang. Semua nilai alpha dievaluasi dalam satu perkalian
+# X_test @ feature_log_prob.T per fold. Rumus sama dengan MultinomialNB.fit
+# (fit_prior=True), jadi prediksi identik dengan refit per fold.
+
+def fold_count_statistics(X, y, splits, classes):
+    """
+    Jumlah fitur dan sampel per kelas untuk setiap test fold
+    Return: (feature_counts (k, C, F), class_counts (k, C))
+    splits harus partisi k-fold (setiap baris tepat di satu test fold)
+    """
+    n_folds, n_classes = len(splits), len(classes)
+    fold_of_row = np.full(X.shape[0], -1, dtype=np.int64)
+    for fold, (_, test_idx) in enumerate(splits):
+        fold_of_row[test_idx] = fold
+    rows = np.flatnonzero(fold_of_row >= 0)
+    groups = fold_of_row[rows] * n_classes + np.searchsorted(classes, y[rows])
+    
+    indicator = sp.csr_matrix(
+        (np.ones(len(rows)), (groups, rows)),
+        shape=(n_folds * n_classes, X.shape[0])
+    )
+    feature_counts = np.asarray((indicator @ X).todense()).reshape(n_folds, n_classes, X.shape[1])
+    class_counts = np.bincount(groups, minlength=n_folds * n_classes).reshape(n_folds, n_classes).astype(np.float64)
+    return feature_counts, class_counts
+
+
+def _nb_log_probs(feature_count, class_count, alphas):
+    """(feature_log_prob (A*C, F), class_log_prior (C,)) seperti MultinomialNB untuk setiap alpha"""
+    feature_log_probs = []
+    for alpha in alphas:
+        smoothed_fc = feature_count + alpha
+        smoothed_cc = smoothed_fc.sum(axis=1)
+        feature_log_probs.append(np.log(smoothed_fc) - np.log(smoothed_cc.reshape(-1, 1)))
+    with np.errstate(divide="ignore"):
+        # kelas yang tidak ada di train fold -> prior -inf (tidak pernah diprediksi)
+        class_log_prior = np.log(class_count) - np.log(class_count.sum())
+    return np.vstack(feature_log_probs), class_log_prior
+
+
+def iter_closed_form_cv(X, y, splits, alphas=(1.0,)):
+    """
+    Prediksi CV MultinomialNB tanpa refit, untuk beberapa alpha sekaligus.
+    Yield per fold: (train_idx, test_idx, {alpha: y_pred})
+    """
+    y = np.asarray(y)
+    classes = np.unique(y)
+    alphas = list(alphas)
+    fold_fc, fold_cc = fold_count_statistics(X, y, splits, classes)
+    total_fc, total_cc = fold_fc.sum(axis=0), fold_cc.sum(axis=0)
+    
+    for fold, (train_idx, test_idx) in enumerate(splits):
+        # statistik train fold = total - test fold (clip pembulatan float)
+        feature_count = np.maximum(total_fc - fold_fc[fold], 0.0)
+        class_count = total_cc - fold_cc[fold]
+        feature_log_prob, class_log_prior = _nb_log_probs(feature_count, class_count, alphas)
+        
+        jll = np.asarray(X[test_idx] @ feature_log_prob.T).reshape(len(test_idx), len(alphas), len(classes))
+        best = (jll + class_log_prior).argmax(axis=2)
+        yield train_idx, test_idx, {alpha: classes[best[:, i]] for i, alpha in enumerate(alphas)}
+
+
+def _closed_form_folds(k, X, y, splits, alpha):
+    """Hasil per fold non-balancing (format sama dengan _run_fold) via closed-form CV"""
+    import time
+    fold_start = time.time()
+    for fold_num, (train_idx, test_idx, predictions) in enumerate(iter_closed_form_cv(X, y, splits, [alpha]), 1):
+        y_train, y_test = y[train_idx], y[test_idx]
+        log = _distribution_log("Train distribution (IMBALANCED)", y_train, 5)
+        log.append(f"      Data tetap IMBALANCED (no balancing applied)")
+        log.extend(_distribution_log("Test distribution (IMBALANCED)", y_test, 4))
+        fold = _fold_result(fold_num, len(train_idx), y_test, predictions[alpha], log, time.time() - fold_start)
+        fold["header"] = _fold_header(fold_num, k, y_train, y_test)
+        yield fold
+        fold_start = time.time()
+
+
+def _confusion(y_true, y_pred, classes):
+    n_classes = len(classes)
+    true_codes = np.searchsorted(classes, y_true)
+    pred_codes = np.searchsorted(classes, y_pred)
+    return np.bincount(true_codes * n_classes + pred_codes, minlength=n_classes ** 2).reshape(n_classes, n_classes)
+
+
+def _macro_scores(cm):
+    """accuracy + precision/recall/F1 macro (zero_division=0) dari confusion matrix, sama dengan sklearn"""
+    tp = np.diag(cm).astype(np.float64)
+    predicted, actual = cm.sum(axis=0), cm.sum(axis=1)
+    present = (predicted + actual) > 0  # label yang muncul di y_true atau y_pred
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(actual > 0, tp / actual, 0.0)
+        f1 = np.where(predicted + actual > 0, 2 * tp / (predicted + actual), 0.0)
+    return (
+        tp.sum() / cm.sum(),
+        precision[present].mean(),
+        recall[present].mean(),
+        f1[present].mean()
+    )
+
+
+def closed_form_cv(X, y, k=10, alphas=(1.0,), random_state=42, splits=None):
+    """
+    Stratified k-fold CV MultinomialNB (tanpa balancing) untuk grid alpha dalam satu pass.
+    Return: {alpha: {"accuracy", "precision", "recall", "f1_score", "std_accuracy", "fold_metrics",
+                     "confusion_matrix", "class_names"}}
+    (metrics rata-rata macro, skala 0-1; confusion matrix gabungan semua fold)
+    """
+    y = np.asarray(y).astype(str)
+    if splits is None:
+        splits = list(StratifiedKFold(n_splits=k, shuffle=True, random_state=random_state).split(X, y))
+    classes = np.unique(y)
+    fold_metrics = {alpha: [] for alpha in alphas}
+    confusion = {alpha: np.zeros((len(classes), len(classes)), dtype=np.int64) for alpha in alphas}
+    for fold_num, (train_idx, test_idx, predictions) in enumerate(iter_closed_form_cv(X, y, splits, alphas), 1):
+        for alpha, y_pred in predictions.items():
+            cm = _confusion(y[test_idx], y_pred, classes)
+            confusion[alpha] += cm
+            acc, prec, rec, f1 = _macro_scores(cm)
+            fold_metrics[alpha].append({
+                'fold': fold_num, 'accuracy': float(acc), 'precision': float(prec),
+                'recall': float(rec), 'f1_score': float(f1)
+            })
+    return {
+        alpha: {
+            "accuracy": float(np.mean([m['accuracy'] for m in folds])),
+            "precision": float(np.mean([m['precision'] for m in folds])),
+            "recall": float(np.mean([m['recall'] for m in folds])),
+            "f1_score": float(np.mean([m['f1_score'] for m in folds])),
+            "std_accuracy": float(np.std([m['accuracy'] for m in folds])),
+            "fold_metrics": folds,
+            "confusion_matrix": confusion[alpha].tolist(),
+            "class_names": [str(c) for c in classes]
+        }
+        for alpha, folds in fold_metrics.items()
+    }
+
+
+def _load_cv_data(dataset_filename, tfidf_matrix_filename):
+    """Load CSV + matrix TF-IDF dan tampilkan distribusi kelas. Return (X, y) atau (None, None)"""
     df, X, y = load_full_data(
         dataset_filename=dataset_filename,
         tfidf_matrix_filename=tfidf_matrix_filename
     )
     
     if df is None or X is None or y is None:
-        return {"error": "Failed to load data"}
+        return None, None
     
     # ✅ CRITICAL: Convert to string numpy array
     y = y.astype(str) if not isinstance(y, np.ndarray) else y
@@ -144,132 +419,43 @@ def train_naive_bayes_with_cv(
         pct = (count / len(y)) * 100
         print(f"   {label}: {count:>5,} ({pct:>5.2f}%)")
     
-    # 2. Setup CV
-    print(f"\n2️⃣ Setup:")
-    print(f"   K-Fold: {k}")
-    print(f"   Stratified: Yes")
-    print(f"   Balancing: {'❌ NONE (Baseline)' if not use_balancing else '✅ Per-Fold (Tomek + RUS)'}")
-    
-    cv = StratifiedKFold(n_splits=k, shuffle=True, random_state=random_state)
-    
-    # Setup balancing pipeline (only if use_balancing=True)
-    if use_balancing:
-        if not IMBLEARN_AVAILABLE:
-            print("\n⚠️ WARNING: imbalanced-learn not available!")
-            return {"error": "imbalanced-learn not installed"}
-    
-    # 3. Cross Validation
-    print(f"\n3️⃣ Running {k}-Fold Cross Validation...")
-    print(f"{'='*80}")
-    
-    fold_metrics = []
-    all_y_true = []
-    all_y_pred = []
-    fold_num = 1
-    
-    for train_idx, test_idx in cv.split(X, y):
-        print(f"\n{'─'*80}")
-        print(f"📍 Fold {fold_num}/{k}")
-        print(f"{'─'*80}")
-        
-        # Split data ORIGINAL first
-        X_train, X_test = X[train_idx], X[test_idx]
-        y_train, y_test = y[train_idx], y[test_idx]
-        
-        print(f"   Original train: {len(y_train):>5,} samples")
-        print(f"   Original test:  {len(y_test):>5,} samples")
-        
-        # Show train distribution BEFORE processing
-        train_dist_before = Counter(y_train)
-        print(f"\n   📊 Train distribution {'(IMBALANCED)' if not use_balancing else '(BEFORE balancing)'}:")
-        for label in sorted(train_dist_before.keys()):
-            pct = (train_dist_before[label] / len(y_train)) * 100
-            print(f"      {label}: {train_dist_before[label]:>5,} ({pct:>5.1f}%)")
-        
-        # Apply balancing if needed
-        tomek_removed = 0
-        rus_removed = 0
-        
-        if use_balancing:
-            try:
-                # Apply Tomek Links first
-                tomek = TomekLinks(sampling_strategy='all')
-                X_after_tomek, y_after_tomek = tomek.fit_resample(X_train, y_train)
-                tomek_removed = len(y_train) - len(y_after_tomek)
-                
-                # Apply RUS after Tomek
-                rus = RandomUnderSampler(random_state=random_state)
-                X_train_processed, y_train_processed = rus.fit_resample(X_after_tomek, y_after_tomek)
-                rus_removed = len(y_after_tomek) - len(y_train_processed)
-                
-                train_dist_after = Counter(y_train_processed)
-                print(f"      ├─ Tomek Links removed: {tomek_removed:>5} samples")
-                print(f"      ├─ RUS removed:         {rus_removed:>5} samples")
-                print(f"      └─ Total removed:       {tomek_removed + rus_removed:>5} samples")
-                print(f"\n   📊 Train distribution AFTER balancing:")
-                for label in sorted(train_dist_after.keys()):
-                    pct = (train_dist_after[label] / len(y_train_processed)) * 100
-                    print(f"      {label}: {train_dist_after[label]:>5} ({pct:5.1f}%)")
-                print(f"      Balanced train: {len(y_train_processed):>5} samples")
-                
-            except Exception as e:
-                print(f"      ⚠️ Balancing failed: {e}. Using original data.")
-                X_train_processed = X_train
-                y_train_processed = y_train
-                tomek_removed = 0
-                rus_removed = 0
-        else:
-            X_train_processed = X_train
-            y_train_processed = y_train
-            print(f"      Data tetap IMBALANCED (no balancing applied)")
-        
-        # Show test distribution (always ORIGINAL)
-        test_dist = Counter(y_test)
-        print(f"\n   📊 Test distribution (IMBALANCED):")
-        for label in sorted(test_dist.keys()):
-            pct = (test_dist[label] / len(y_test)) * 100
-            print(f"      {label}: {test_dist[label]:>4,} ({pct:>5.1f}%)")
-        
-        # Train model
-        model = MultinomialNB(alpha=alpha)
-        model.fit(X_train_processed, y_train_processed)
-        
-        # Predict on ORIGINAL imbalanced test data
-        y_pred = model.predict(X_test)
-        
-        # Calculate metrics
-        acc = accuracy_score(y_test, y_pred)
-        prec = precision_score(y_test, y_pred, average='macro', zero_division=0)
-        rec = recall_score(y_test, y_pred, average='macro', zero_division=0)
-        f1 = f1_score(y_test, y_pred, average='macro', zero_division=0)
-        
-        # Store metrics
-        fold_metrics.append({
-            'fold': fold_num,
-            'train_size': len(y_train_processed),
-            'test_size': len(y_test),
-            'tomek_removed': tomek_removed,
-            'rus_removed': rus_removed,
-            'total_removed': tomek_removed + rus_removed,
-            'balanced_train_size': len(y_train_processed),
-            'accuracy': acc,
-            'precision': prec,
-            'recall': rec,
-            'f1_score': f1
-        })
-        
-        # Store for overall confusion matrix
-        all_y_true.extend(y_test)
-        all_y_pred.extend(y_pred)
-        
-        print(f"\n   ✅ Fold {fold_num} Results:")
-        print(f"      Accuracy : {acc:.4f} ({acc*100:>6.2f}%)")
-        print(f"      Precision: {prec:.4f} ({prec*100:>6.2f}%)")
-        print(f"      Recall   : {rec:.4f} ({rec*100:>6.2f}%)")
-        print(f"      F1-Score : {f1:.4f} ({f1*100:>6.2f}%)")
-        
-        fold_num += 1
-    
+    return X, y
+
+
+def _load_neighbor_graph(X, tfidf_matrix_filename):
+    """Neighbour graph (cache per file matrix) untuk Tomek links; None jika gagal"""
+    try:
+        return get_neighbor_graph(X, tfidf_matrix_filename or "tfidf_matrix.pkl")
+    except Exception as e:
+        print(f"[WARN] Neighbour graph unavailable, Tomek links computed per fold: {e}")
+        return None
+
+
+def _iter_folds(fold_func, splits, n_jobs, k, X, y, *params):
+    """fold_func(fold_num, k, X, y, train_idx, test_idx, *params) per fold; hasil berurutan sesuai fold"""
+    if n_jobs == 1:
+        return (
+            fold_func(fold_num, k, X, y, train_idx, test_idx, *params)
+            for fold_num, (train_idx, test_idx) in enumerate(splits, 1)
+        )
+    # fold paralel di proses terpisah; array CSR besar di-memmap (read-only), tidak dicopy per fold
+    print(f"   Parallel folds: n_jobs={n_jobs}")
+    return Parallel(n_jobs=n_jobs, max_nbytes="1M", return_as="generator")(
+        delayed(fold_func)(fold_num, k, X, y, train_idx, test_idx, *params)
+        for fold_num, (train_idx, test_idx) in enumerate(splits, 1)
+    )
+
+
+def _finalize_approach(
+    X, y, k, alpha, random_state, use_balancing,
+    fold_metrics, all_y_true, all_y_pred,
+    dataset_filename, tfidf_matrix_filename, output_prefix, approach_name,
+    graph=None
+):
+    """
+    Ringkasan CV, training model final (full data), simpan model dan confusion matrix.
+    Return dict hasil (tanpa training_time_seconds)
+    """
     # 4. Summary
     print(f"\n{'='*80}")
     print(f"📊 CROSS VALIDATION SUMMARY")
@@ -295,8 +481,12 @@ def train_naive_bayes_with_cv(
     if use_balancing:
         print(f"\n⚙️ Applying balancing to full dataset...")
         try:
-            tomek = TomekLinks(sampling_strategy='all')
-            X_after_tomek, y_after_tomek = tomek.fit_resample(X, y)
+            tomek_links = _fold_tomek_links(graph, X, y, np.arange(len(y)))
+            if tomek_links is not None:
+                X_after_tomek, y_after_tomek = X[~tomek_links], y[~tomek_links]
+            else:
+                tomek = TomekLinks(sampling_strategy='all')
+                X_after_tomek, y_after_tomek = tomek.fit_resample(X, y)
             
             rus = RandomUnderSampler(random_state=random_state)
             X_final, y_final = rus.fit_resample(X_after_tomek, y_after_tomek)
@@ -363,18 +553,6 @@ def train_naive_bayes_with_cv(
     print(f"   Accuracy from CM: {cm_accuracy:.4f} ({cm_accuracy*100:>6.2f}%)")
     print(f"   Mean CV Accuracy: {mean_acc:.4f} ({mean_acc*100:>6.2f}%)")
     
-    # Calculate training time
-    training_time = time.time() - start_time
-    
-    print(f"\n{'='*80}")
-    print(f"✅ TRAINING COMPLETED")
-    print(f"{'='*80}")
-    print(f"   Total time: {training_time:.2f} seconds")
-    print(f"   Total samples: {len(y)}")
-    print(f"   Mean accuracy: {mean_acc*100:.2f}%")
-    print(f"{'='*80}\n")
-    
-    # Return statement
     return {
         "status": "success",
         "message": f"Training completed - {approach_name}",
@@ -398,6 +576,227 @@ def train_naive_bayes_with_cv(
             "mean_accuracy": mean_acc,
             "std_accuracy": std_acc
         },
+        "data_info": {
+            "total_samples": len(y),
+        }
+    }
+
+
+def train_naive_bayes_with_cv(
+    k=10, 
+    alpha=1.0, 
+    random_state=42, 
+    use_balancing=False,
+    dataset_filename=None,
+    tfidf_matrix_filename=None,
+    output_prefix="final",
+    progress_callback=None,
+    n_jobs=1
+):
+    """
+    Train Naive Bayes with Cross Validation
+    
+    Parameters:
+    - k: number of folds
+    - alpha: Laplace smoothing parameter
+    - random_state: random seed
+    - use_balancing: whether to use balancing (Tomek + RUS)
+    - dataset_filename: CSV file path (e.g., GetLabelling_20251226_112400.csv)
+    - tfidf_matrix_filename: TF-IDF matrix file (e.g., tfidf_matrix_20251226_112400.pkl)
+    - output_prefix: prefix for output model file
+    - progress_callback: called as progress_callback(folds_done, k) after each fold
+    - n_jobs: folds run in parallel (joblib processes); 1 = sequential, -1 = all cores
+    """
+    import time
+    start_time = time.time()
+    
+    approach_name = "BALANCED (Tomek + RUS)" if use_balancing else "IMBALANCED (No Balancing)"
+    print(f"\n{'='*80}")
+    print(f"📘 Naive Bayes Training - {approach_name}")
+    print(f"{'='*80}")
+    
+    # 1. Load data with custom filenames
+    X, y = _load_cv_data(dataset_filename, tfidf_matrix_filename)
+    if X is None:
+        return {"error": "Failed to load data"}
+    
+    # 2. Setup CV
+    print(f"\n2️⃣ Setup:")
+    print(f"   K-Fold: {k}")
+    print(f"   Stratified: Yes")
+    print(f"   Balancing: {'❌ NONE (Baseline)' if not use_balancing else '✅ Per-Fold (Tomek + RUS)'}")
+    
+    cv = StratifiedKFold(n_splits=k, shuffle=True, random_state=random_state)
+    
+    # Setup balancing pipeline (only if use_balancing=True)
+    if use_balancing:
+        if not IMBLEARN_AVAILABLE:
+            print("\n⚠️ WARNING: imbalanced-learn not available!")
+            return {"error": "imbalanced-learn not installed"}
+    
+    # 3. Cross Validation
+    print(f"\n3️⃣ Running {k}-Fold Cross Validation...")
+    print(f"{'='*80}")
+    
+    fold_metrics = []
+    all_y_true = []
+    all_y_pred = []
+    
+    # neighbour graph sekali per matrix TF-IDF; Tomek links tiap fold diturunkan dari graph ini
+    graph = _load_neighbor_graph(X, tfidf_matrix_filename) if use_balancing else None
+    
+    splits = list(cv.split(X, y))
+    if use_balancing:
+        fold_results = _iter_folds(_run_fold, splits, n_jobs, k, X, y, alpha, random_state, use_balancing, graph)
+    else:
+        # tanpa balancing: closed-form dari statistik per fold, tanpa refit per fold
+        fold_results = _closed_form_folds(k, X, y, splits, alpha)
+    
+    # hasil diproses sesuai urutan fold -> metrics, prediksi dan log deterministik
+    for fold_num, fold in enumerate(fold_results, 1):
+        print("\n".join(fold["header"] + fold["log"]))
+        fold_metrics.append(fold["metrics"])
+        all_y_true.extend(fold["y_true"])
+        all_y_pred.extend(fold["y_pred"])
+        
+        if progress_callback is not None:
+            progress_callback(fold_num, k)
+
+    result = _finalize_approach(
+        X, y, k, alpha, random_state, use_balancing,
+        fold_metrics, all_y_true, all_y_pred,
+        dataset_filename, tfidf_matrix_filename, output_prefix, approach_name,
+        graph
+    )
+    
+    # Calculate training time
+    training_time = time.time() - start_time
+    
+    print(f"\n{'='*80}")
+    print(f"✅ TRAINING COMPLETED")
+    print(f"{'='*80}")
+    print(f"   Total time: {training_time:.2f} seconds")
+    print(f"   Total samples: {len(y)}")
+    print(f"   Mean accuracy: {result['cv_performance']['mean_accuracy']*100:.2f}%")
+    print(f"{'='*80}\n")
+    
+    result["training_time_seconds"] = training_time
+    return result
+
+
+def train_both_approaches_with_cv(
+    k=10,
+    alpha=1.0,
+    random_state=42,
+    dataset_filename=None,
+    tfidf_matrix_filename=None,
+    output_prefix="final",
+    progress_callback=None,
+    n_jobs=1
+):
+    """
+    Train Naive Bayes non-balancing DAN balancing dalam satu pass CV:
+    data di-load sekali dan split StratifiedKFold dihitung sekali untuk kedua
+    approach. Non-balancing memakai closed-form CV (tanpa refit per fold),
+    balancing fit per fold dengan Tomek links dari neighbour graph.
+    Hasil per approach sama dengan dua panggilan train_naive_bayes_with_cv.
+    
+    Parameters: sama dengan train_naive_bayes_with_cv (tanpa use_balancing)
+    - progress_callback: called as progress_callback(folds_done, k) after each fold
+    
+    Return: {"status", "non_balancing", "balancing", "data_info", "training_time_seconds"}
+    training_time_seconds per approach = waktu fold + model final approach tsb
+    """
+    import time
+    start_time = time.time()
+    
+    print(f"\n{'='*80}")
+    print(f"📘 Naive Bayes Training - NON-BALANCING + BALANCING (single pass)")
+    print(f"{'='*80}")
+    
+    if not IMBLEARN_AVAILABLE:
+        print("\n⚠️ WARNING: imbalanced-learn not available!")
+        return {"error": "imbalanced-learn not installed"}
+    
+    # 1. Load data sekali untuk kedua approach
+    X, y = _load_cv_data(dataset_filename, tfidf_matrix_filename)
+    if X is None:
+        return {"error": "Failed to load data"}
+    
+    # 2. Setup CV (split yang sama untuk kedua approach)
+    print(f"\n2️⃣ Setup:")
+    print(f"   K-Fold: {k}")
+    print(f"   Stratified: Yes")
+    print(f"   Approaches: ❌ NONE (Baseline) + ✅ Per-Fold (Tomek + RUS)")
+    
+    cv = StratifiedKFold(n_splits=k, shuffle=True, random_state=random_state)
+    splits = list(cv.split(X, y))
+    
+    # 3. Cross Validation
+    print(f"\n3️⃣ Running {k}-Fold Cross Validation (both approaches)...")
+    print(f"{'='*80}")
+    
+    approaches = {
+        "non-balancing": {"use_balancing": False, "name": "IMBALANCED (No Balancing)"},
+        "balancing": {"use_balancing": True, "name": "BALANCED (Tomek + RUS)"}
+    }
+    for state in approaches.values():
+        state.update(fold_metrics=[], y_true=[], y_pred=[], seconds=0.0)
+    
+    # neighbour graph sekali per matrix TF-IDF; Tomek links tiap fold diturunkan dari graph ini
+    graph = _load_neighbor_graph(X, tfidf_matrix_filename)
+    
+    non_balanced_folds = _closed_form_folds(k, X, y, splits, alpha)
+    balanced_folds = _iter_folds(_run_fold, splits, n_jobs, k, X, y, alpha, random_state, True, graph)
+    
+    for fold_num, (non_balanced, balanced) in enumerate(zip(non_balanced_folds, balanced_folds), 1):
+        print("\n".join(
+            non_balanced["header"]
+            + ["\n   ▶ NON-BALANCING"] + non_balanced["log"]
+            + ["\n   ▶ BALANCING"] + balanced["log"]
+        ))
+        for state, fold in ((approaches["non-balancing"], non_balanced), (approaches["balancing"], balanced)):
+            state["fold_metrics"].append(fold["metrics"])
+            state["y_true"].extend(fold["y_true"])
+            state["y_pred"].extend(fold["y_pred"])
+            state["seconds"] += fold["seconds"]
+        
+        if progress_callback is not None:
+            progress_callback(fold_num, k)
+    
+    # 4-6. Summary, model final dan confusion matrix per approach
+    results = {}
+    for approach, state in approaches.items():
+        print(f"\n{'='*80}")
+        print(f"📘 {state['name']}")
+        print(f"{'='*80}")
+        
+        final_start = time.time()
+        result = _finalize_approach(
+            X, y, k, alpha, random_state, state["use_balancing"],
+            state["fold_metrics"], state["y_true"], state["y_pred"],
+            dataset_filename, tfidf_matrix_filename, output_prefix, state["name"],
+            graph
+        )
+        result["training_time_seconds"] = state["seconds"] + (time.time() - final_start)
+        results[approach] = result
+    
+    training_time = time.time() - start_time
+    
+    print(f"\n{'='*80}")
+    print(f"✅ TRAINING COMPLETED (both approaches)")
+    print(f"{'='*80}")
+    print(f"   Total time: {training_time:.2f} seconds")
+    print(f"   Total samples: {len(y)}")
+    for approach, result in results.items():
+        print(f"   Mean accuracy ({approach}): {result['cv_performance']['mean_accuracy']*100:.2f}%")
+    print(f"{'='*80}\n")
+    
+    return {
+        "status": "success",
+        "non_balancing": results["non-balancing"],
+        "balancing": results["balancing"],
+        "k_folds": k,
         "data_info": {
             "total_samples": len(y),
         },
@@ -0,0 +1,81 @@
+# prediction_utils.py
+"""
+Prediksi batch: banyak teks sekaligus dengan satu transform TF-IDF dan satu
+predict_proba per chunk (operasi matriks sparse), bukan satu request per teks.
+
+Preprocessing memakai preprocess_series (pipeline yang sama dengan training,
+kolom finalText); translasi dimatikan secara default supaya tidak ada
+request jaringan saat inferensi.
+"""
+
+import numpy as np
+import pandas as pd
+
+from PreProcessing import preprocess_series
+
+# Jumlah teks per chunk (preprocess + transform + predict_proba)
+PREDICT_CHUNK_SIZE = 5000
+
+# Urutan kolom teks yang dicari di file dataset
+RAW_TEXT_COLUMNS = ["comment", "text", "Comment"]
+PROCESSED_TEXT_COLUMNS = ["finalText", "negationHandled", "Clean_Comment", "cleaned_text", "processed_text"]
+
+
+def detect_text_column(columns, preprocess=True):
+    """Kolom teks mentah (preprocess=True) atau kolom hasil preprocessing (preprocess=False)"""
+    candidates = RAW_TEXT_COLUMNS + PROCESSED_TEXT_COLUMNS if preprocess else PROCESSED_TEXT_COLUMNS + RAW_TEXT_COLUMNS
+    for column in candidates:
+        if column in columns:
+            return column
+    return None
+
+
+def _predict_chunk(texts: pd.Series, vectorizer, model, preprocess, translate, offset):
+    texts = texts.fillna("").astype(str).reset_index(drop=True)
+    if preprocess:
+        processed = preprocess_series(texts, skip_translation=not translate, trace_rows=0)["finalText"]
+    else:
+        processed = texts
+    X = vectorizer.transform(processed)
+    proba = model.predict_proba(X)
+    best = proba.argmax(axis=1)  # sama dengan model.predict untuk MultinomialNB
+    classes = [str(c) for c in model.classes_]
+    confidence = proba[np.arange(len(best)), best]
+    return [
+        {
+            "index": offset + i,
+            "text": text,
+            "preprocessed_text": processed_text,
+            "predicted_sentiment": classes[label],
+            "confidence": round(float(conf), 4),
+            "probabilities": {cls: round(float(p), 4) for cls, p in zip(classes, row)}
+        }
+        for i, (text, processed_text, label, conf, row)
+        in enumerate(zip(texts, processed, best, confidence, proba))
+    ]
+
+
+def iter_predictions(texts, vectorizer, model, preprocess=True, translate=False, chunk_size=PREDICT_CHUNK_SIZE):
+    """Yield list of prediction records per chunk.
+    texts: list / Series, atau iterable of Series (mis. pd.read_csv(..., chunksize=...))
+    """
+    if isinstance(texts, (list, tuple, pd.Series)):
+        series = pd.Series(list(texts), dtype=object)
+        chunks = (series.iloc[i:i + chunk_size] for i in range(0, len(series), chunk_size))
+    else:
+        chunks = texts
+    offset = 0
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        yield _predict_chunk(chunk, vectorizer, model, preprocess, translate, offset)
+        offset += len(chunk)
+
+
+def predict_texts(texts, vectorizer, model, preprocess=True, translate=False, chunk_size=PREDICT_CHUNK_SIZE):
+    """Prediksi semua teks; return list of records (urutan sama dengan input)"""
+    results = []
+    for records in iter_predictions(texts, vectorizer, model, preprocess, translate, chunk_size):
+        results.extend(records)
+    return results
+
@@ -0,0 +1,199 @@
+# progress_utils.py
+"""
+Registry progress per run (crawl, preprocess, label, TF-IDF, CV fold).
+
+Menggantikan dict global `progress_state`: setiap run punya run_id sendiri,
+jadi beberapa run yang berjalan bersamaan tidak saling menimpa. Per run
+dicatat stage aktif, baris selesai / total, throughput, ETA dan riwayat stage.
+
+Semua update lewat satu lock (aman antar thread). Worker ProcessPoolExecutor
+tidak menulis ke registry langsung: proses utama yang melaporkan progress
+setiap chunk selesai, jadi registry cukup hidup di proses API.
+
+Run yang dimulai dari endpoint mencatat owner (user id): snapshot hanya
+diberikan ke owner-nya, dan run_id yang masih berjalan / milik user lain
+tidak bisa dipakai ulang.
+"""
+
+import time
+import uuid
+import threading
+
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+# Jumlah run selesai yang disimpan untuk di-query ulang
+MAX_FINISHED_RUNS = 200
+
+
+class ProgressRegistry:
+    """Thread-safe store of progress snapshots keyed by run_id"""
+
+    def __init__(self, max_finished=MAX_FINISHED_RUNS):
+        self.max_finished = max_finished
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_run_id():
+        return uuid.uuid4().hex[:12]
+
+    def _new_run(self, run_id, now, owner=None):
+        return {
+            "run_id": run_id,
+            "owner": owner,
+            "status": "running",
+            "stage": None,
+            "current": 0,
+            "total": 0,
+            "message": None,
+            "started": now,
+            "stage_started": now,
+            "stage_closed": False,
+            "updated": now,
+            "stages": [],
+            "version": 0
+        }
+
+    def start(self, run_id=None, stage=None, total=0, owner=None):
+        """Daftarkan run baru (run_id lama milik owner yang sama di-reset). Return run_id.
+        ValueError jika run_id masih berjalan atau milik owner lain."""
+        run_id = run_id or self.new_run_id()
+        now = time.time()
+        with self._lock:
+            existing = self._runs.get(run_id)
+            if existing is not None and (existing["status"] == "running" or existing["owner"] != owner):
+                raise ValueError(f"run_id already in use: {run_id}")
+            run = self._new_run(run_id, now, owner)
+            run["stage"] = stage
+            run["total"] = total or 0
+            self._runs[run_id] = run
+            self._prune()
+        return run_id
+
+    def update(self, run_id, stage=None, current=None, total=None, message=None):
+        """Update progress run; stage baru me-reset hitungan rate/ETA"""
+        now = time.time()
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                run = self._runs[run_id] = self._new_run(run_id, now)
+            if stage is not None and stage != run["stage"]:
+                self._close_stage(run, now)
+                run["stage"] = stage
+                run["stage_started"] = now
+                run["stage_closed"] = False
+                run["current"] = 0
+                run["total"] = 0
+            if current is not None:
+                run["current"] = current
+            if total is not None:
+                run["total"] = total
+            if message is not None:
+                run["message"] = message
+            run["updated"] = now
+            run["version"] += 1
+
+    def finish(self, run_id, status="done", message=None):
+        now = time.time()
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return
+            self._close_stage(run, now)
+            run["status"] = status
+            if message is not None:
+                run["message"] = message
+            if status == "done" and run["total"]:
+                run["current"] = run["total"]
+            run["updated"] = now
+            run["version"] += 1
+            self._prune()
+
+    @staticmethod
+    def _close_stage(run, now):
+        # catat durasi stage aktif ke riwayat (sekali per stage)
+        if run["stage"] is None or run["stage_closed"]:
+            return
+        run["stages"].append({
+            "stage": run["stage"],
+            "current": run["current"],
+            "total": run["total"],
+            "seconds": round(now - run["stage_started"], 3)
+        })
+        run["stage_closed"] = True
+
+    def _prune(self):
+        finished = [run for run in self._runs.values() if run["status"] in FINISHED_STATUSES]
+        if len(finished) <= self.max_finished:
+            return
+        finished.sort(key=lambda run: run["updated"])
+        for run in finished[:len(finished) - self.max_finished]:
+            del self._runs[run["run_id"]]
+
+    @staticmethod
+    def _snapshot(run):
+        now = time.time()
+        end = now if run["status"] == "running" else run["updated"]
+        stage_elapsed = max(end - run["stage_started"], 1e-9)
+        current, total = run["current"], run["total"]
+        rate = current / stage_elapsed if current else 0.0
+        eta = (total - current) / rate if rate > 0 and total > current else (0.0 if total else None)
+        return {
+            "run_id": run["run_id"],
+            "status": run["status"],
+            "stage": run["stage"],
+            "current": current,
+            "total": total,
+            "percentage": round(current * 100 / total, 2) if total else (100.0 if run["status"] == "done" else 0.0),
+            "rate_per_sec": round(rate, 2),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "elapsed_seconds": round(end - run["started"], 3),
+            "stage_elapsed_seconds": round(stage_elapsed, 3),
+            "message": run["message"],
+            "stages": list(run["stages"]),
+            "version": run["version"]
+        }
+
+    def get(self, run_id, owner=None):
+        """Snapshot satu run (None jika tidak ada). owner diisi -> None untuk run milik user lain"""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None or (owner is not None and run["owner"] != owner):
+                return None
+            return self._snapshot(run)
+
+    def latest(self, stage=None):
+        """Snapshot run yang paling baru di-update (opsional: hanya stage tertentu)"""
+        with self._lock:
+            runs = [run for run in self._runs.values() if stage is None or run["stage"] == stage]
+            if not runs:
+                return None
+            return self._snapshot(max(runs, key=lambda run: run["updated"]))
+
+    def callback(self, run_id, stage):
+        """progress_callback(current, total) untuk fungsi pipeline"""
+        return lambda current, total: self.update(run_id, stage, current, total)
+
+    def tracker(self, run_id=None, owner=None):
+        return ProgressTracker(self, run_id, owner)
+
+
+class ProgressTracker:
+    """Handle progress untuk satu run (interface sama dengan JobContext)"""
+
+    def __init__(self, registry, run_id=None, owner=None):
+        self.registry = registry
+        self.run_id = registry.start(run_id, owner=owner)
+
+    def update(self, stage=None, current=None, total=None, message=None, force=False):
+        self.registry.update(self.run_id, stage, current, total, message)
+
+    def callback(self, stage):
+        """progress_callback(current, total) untuk fungsi pipeline"""
+        return lambda current, total: self.update(stage, current, total)
+
+    def finish(self, status="done", message=None):
+        self.registry.finish(self.run_id, status, message)
+
+
+progress_registry = ProgressRegistry()
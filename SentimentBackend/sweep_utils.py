@@ -0,0 +1,414 @@
+# sweep_utils.py
+"""
+Hyperparameter sweep Naive Bayes + TF-IDF: alpha, max_features, ngram_range,
+min_df dan max_df.
+
+- Tokenisasi (CountVectorizer) hanya sekali per ngram_range. Matrix TF-IDF untuk
+  setiap kombinasi min_df/max_df/max_features diturunkan dari matrix count tsb
+  (seleksi fitur sama dengan TfidfVectorizer), lalu dipakai ulang untuk semua alpha.
+- CV memakai closed_form_cv (non-balancing): semua alpha dievaluasi dalam satu pass.
+- Konfigurasi vectorizer dievaluasi paralel (joblib processes).
+- Hasil (config -> metrics) di-memo di tabel sweep_results per isi dataset
+  (SHA-1), jadi konfigurasi yang sudah pernah dievaluasi tidak dihitung ulang.
+  Metrics dipakai bersama lintas user; training_history_id hanya milik
+  pembuat baris.
+"""
+
+import os
+import re
+import json
+import hashlib
+import itertools
+from numbers import Integral
+
+import numpy as np
+import pandas as pd
+import joblib
+from joblib import Parallel, delayed
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer, TfidfTransformer
+from sklearn.model_selection import StratifiedKFold
+from sklearn.naive_bayes import MultinomialNB
+
+from naive_bayes_utils import closed_form_cv
+
+# Parameter TfidfVectorizer yang tetap (sama dengan endpoint /tfidf)
+TFIDF_BASE_PARAMS = {"lowercase": True, "strip_accents": "unicode"}
+
+# Batas jumlah konfigurasi (alpha x vectorizer) per sweep
+SWEEP_MAX_CONFIGS = 1000
+
+SWEEP_METRICS = ("accuracy", "precision", "recall", "f1_score")
+
+# output_prefix jadi bagian nama file di models/ (tanpa path)
+OUTPUT_PREFIX_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+
+# ============================================================
+# DATASET & GRID
+# ============================================================
+
+def file_hash(path):
+    """SHA-1 isi file (key memo sweep; berubah jika dataset berubah)"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_labeled_texts(path):
+    """
+    Teks + label dari file labeled (pembersihan sama dengan /tfidf, file tidak ditimpa).
+    Return: {"texts", "labels", "text_column", "label_column"} atau {"error": ...}
+    """
+    # import lokal: worker sweep tidak perlu memuat modul preprocessing
+    from prediction_utils import detect_text_column
+    df = pd.read_csv(path)
+    text_column = detect_text_column(df.columns, preprocess=False)
+    if text_column is None:
+        return {"error": f"No valid text column found. Available: {df.columns.tolist()}"}
+    label_column = next((col for col in ["sentiment", "Label", "label"] if col in df.columns), None)
+    if label_column is None:
+        return {"error": f"No label column found. Available: {df.columns.tolist()}"}
+
+    df = df.dropna(subset=[text_column])
+    df[text_column] = df[text_column].astype(str).str.strip()
+    df = df[(df[text_column] != '') & (df[text_column] != 'nan')]
+    df = df.dropna(subset=[label_column])
+    if len(df) == 0:
+        return {"error": "No valid data after cleaning. All text entries are empty or NaN."}
+
+    return {
+        "texts": df[text_column].tolist(),
+        "labels": df[label_column].astype(str).to_numpy(),
+        "text_column": text_column,
+        "label_column": label_column
+    }
+
+
+def vectorizer_params(config):
+    """kwargs TfidfVectorizer untuk satu konfigurasi sweep"""
+    return {
+        **TFIDF_BASE_PARAMS,
+        "max_features": config["max_features"],
+        "ngram_range": tuple(config["ngram_range"]),
+        "min_df": config["min_df"],
+        "max_df": config["max_df"]
+    }
+
+
+def config_key(config):
+    """JSON kanonik satu konfigurasi (int vs float min_df/max_df tetap dibedakan, seperti sklearn)"""
+    return json.dumps({
+        "alpha": float(config["alpha"]),
+        "max_features": config["max_features"],
+        "ngram_range": list(config["ngram_range"]),
+        "min_df": config["min_df"],
+        "max_df": config["max_df"]
+    }, sort_keys=True)
+
+
+def build_grid(alphas, max_features, ngram_ranges, min_dfs, max_dfs):
+    """
+    Grid konfigurasi vectorizer (tanpa alpha) dan daftar alpha.
+    Raise ValueError jika grid tidak valid.
+    """
+    alphas = sorted({float(alpha) for alpha in alphas})
+    if not alphas or any(alpha < 0 for alpha in alphas):
+        raise ValueError("alphas must be a non-empty list of values >= 0")
+    for low, high in ngram_ranges:
+        if low < 1 or high < low:
+            raise ValueError(f"Invalid ngram_range: ({low}, {high})")
+
+    vectorizer_configs = []
+    for features, ngram, min_df, max_df in itertools.product(max_features, ngram_ranges, min_dfs, max_dfs):
+        config = {"max_features": features, "ngram_range": list(ngram), "min_df": min_df, "max_df": max_df}
+        if config not in vectorizer_configs:
+            vectorizer_configs.append(config)
+    if not vectorizer_configs:
+        raise ValueError("Empty TF-IDF grid")
+
+    total = len(vectorizer_configs) * len(alphas)
+    if total > SWEEP_MAX_CONFIGS:
+        raise ValueError(f"Grid has {total} configurations (max {SWEEP_MAX_CONFIGS})")
+    return vectorizer_configs, alphas
+
+
+# ============================================================
+# CACHED VECTORIZATION
+# ============================================================
+
+def count_matrix(texts, ngram_range):
+    """Matrix count (fitur urut alfabet, tanpa seleksi) untuk satu ngram_range"""
+    vectorizer = CountVectorizer(ngram_range=tuple(ngram_range), **TFIDF_BASE_PARAMS)
+    return vectorizer.fit_transform(texts)
+
+
+def tfidf_from_counts(counts, min_df, max_df, max_features):
+    """
+    Matrix TF-IDF dari matrix count, dengan seleksi fitur yang sama dengan
+    TfidfVectorizer(min_df, max_df, max_features). Raise ValueError seperti sklearn.
+    """
+    n_docs = counts.shape[0]
+    max_doc_count = max_df if isinstance(max_df, Integral) else max_df * n_docs
+    min_doc_count = min_df if isinstance(min_df, Integral) else min_df * n_docs
+    if max_doc_count < min_doc_count:
+        raise ValueError("max_df corresponds to < documents than min_df")
+
+    dfs = np.bincount(counts.indices, minlength=counts.shape[1])
+    mask = (dfs <= max_doc_count) & (dfs >= min_doc_count)
+    if max_features is not None and mask.sum() > max_features:
+        tfs = np.asarray(counts.sum(axis=0)).ravel()
+        top = (-tfs[mask]).argsort()[:max_features]
+        limited = np.zeros(len(dfs), dtype=bool)
+        limited[np.where(mask)[0][top]] = True
+        mask = limited
+    kept = np.where(mask)[0]
+    if len(kept) == 0:
+        raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+    return TfidfTransformer().fit_transform(counts[:, kept])
+
+
+def _evaluate_vectorizer_config(counts, y, vectorizer_config, alphas, splits):
+    """CV semua alpha untuk satu konfigurasi vectorizer. Return list hasil per alpha"""
+    try:
+        X = tfidf_from_counts(
+            counts, vectorizer_config["min_df"], vectorizer_config["max_df"], vectorizer_config["max_features"]
+        )
+    except ValueError as e:
+        return [{"config": {**vectorizer_config, "alpha": alpha}, "error": str(e)} for alpha in alphas]
+
+    scores = closed_form_cv(X, y, alphas=alphas, splits=splits)
+    return [
+        {
+            "config": {**vectorizer_config, "alpha": alpha},
+            "accuracy": scores[alpha]["accuracy"],
+            "precision": scores[alpha]["precision"],
+            "recall": scores[alpha]["recall"],
+            "f1_score": scores[alpha]["f1_score"],
+            "std_accuracy": scores[alpha]["std_accuracy"],
+            "n_features": X.shape[1]
+        }
+        for alpha in alphas
+    ]
+
+
+def pending_configs(vectorizer_configs, alphas, skip_keys=()):
+    """[(vectorizer_config, alpha yang belum di-memo)] -- satu task sweep per item"""
+    skip_keys = set(skip_keys)
+    pending = []
+    for vectorizer_config in vectorizer_configs:
+        todo = [alpha for alpha in alphas if config_key({**vectorizer_config, "alpha": alpha}) not in skip_keys]
+        if todo:
+            pending.append((vectorizer_config, todo))
+    return pending
+
+
+def run_sweep(
+    texts,
+    labels,
+    vectorizer_configs,
+    alphas,
+    n_splits=10,
+    random_state=42,
+    n_jobs=1,
+    skip_keys=(),
+    progress_callback=None
+):
+    """
+    Evaluasi grid (vectorizer_configs x alphas) dengan stratified k-fold closed-form CV.
+
+    Parameters:
+    - skip_keys: config_key yang sudah ada di memo (tidak dihitung ulang)
+    - n_jobs: paralel per konfigurasi vectorizer (joblib processes); 1 = berurutan
+    - progress_callback: called as progress_callback(configs_done, total_configs),
+      total_configs = len(pending_configs(...)) (konfigurasi vectorizer yang belum di-memo)
+
+    Return: list hasil {"config", metrics..., "n_features"} atau {"config", "error"}
+    """
+    y = np.asarray(labels).astype(str)
+    pending = pending_configs(vectorizer_configs, alphas, skip_keys)
+    if not pending:
+        return []
+
+    splits = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(np.zeros(len(y)), y))
+    ngram_ranges = sorted({tuple(vectorizer_config["ngram_range"]) for vectorizer_config, _ in pending})
+    print(f"[INFO] Sweep: {len(pending)} TF-IDF config(s), {len(ngram_ranges)} tokenization(s), n_jobs={n_jobs}")
+
+    # 1. Tokenisasi sekali per ngram_range
+    if n_jobs == 1:
+        matrices = [count_matrix(texts, ngram) for ngram in ngram_ranges]
+    else:
+        matrices = Parallel(n_jobs=n_jobs)(delayed(count_matrix)(texts, ngram) for ngram in ngram_ranges)
+    counts = dict(zip(ngram_ranges, matrices))
+
+    # 2. Seleksi fitur + TF-IDF + CV semua alpha per konfigurasi vectorizer
+    tasks = [
+        (counts[tuple(vectorizer_config["ngram_range"])], y, vectorizer_config, todo, splits)
+        for vectorizer_config, todo in pending
+    ]
+    if n_jobs == 1:
+        evaluated = (_evaluate_vectorizer_config(*task) for task in tasks)
+    else:
+        # matrix count besar di-memmap (read-only), tidak dicopy per task
+        evaluated = Parallel(n_jobs=n_jobs, max_nbytes="1M", return_as="generator")(
+            delayed(_evaluate_vectorizer_config)(*task) for task in tasks
+        )
+
+    results = []
+    for done, task_results in enumerate(evaluated, 1):
+        results.extend(task_results)
+        if progress_callback is not None:
+            progress_callback(done, len(tasks))
+    return results
+
+
+def rank_results(results, metric="f1_score"):
+    """Hasil valid diurutkan dari yang terbaik (metric, lalu accuracy)"""
+    valid = [result for result in results if "error" not in result]
+    return sorted(valid, key=lambda result: (result[metric], result["accuracy"]), reverse=True)
+
+
+# ============================================================
+# BEST MODEL
+# ============================================================
+
+def train_best_config(texts, labels, config, n_splits=10, random_state=42, output_prefix="sweep", timestamp=None):
+    """
+    Fit TfidfVectorizer + MultinomialNB untuk konfigurasi terbaik di seluruh data,
+    simpan vectorizer, matrix dan model (format sama dengan train_naive_bayes_with_cv).
+    Return: paths, shape matrix, dan hasil CV konfigurasi tsb (termasuk confusion matrix)
+    """
+    from datetime import datetime
+    if not OUTPUT_PREFIX_PATTERN.fullmatch(output_prefix):
+        raise ValueError("output_prefix may only contain letters, digits, '_' and '-'")
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M%S')
+    y = np.asarray(labels).astype(str)
+    alpha = float(config["alpha"])
+
+    vectorizer = TfidfVectorizer(**vectorizer_params(config))
+    X = vectorizer.fit_transform(texts)
+    cv = closed_form_cv(X, y, k=n_splits, alphas=[alpha], random_state=random_state)[alpha]
+    model = MultinomialNB(alpha=alpha).fit(X, y)
+
+    os.makedirs('models', exist_ok=True)
+    vectorizer_path = f"models/tfidf_vectorizer_{output_prefix}_{timestamp}.pkl"
+    matrix_path = f"tfidf_matrix_{output_prefix}_{timestamp}.pkl"
+    model_path = f"models/{output_prefix}_nb_non_balanced_{timestamp}.pkl"
+    joblib.dump(vectorizer, vectorizer_path)
+    joblib.dump(X, matrix_path)
+    joblib.dump({
+        'model': model,
+        'approach': "non_balanced",
+        'k_folds': n_splits,
+        'alpha': alpha,
+        'use_balancing': False,
+        'tfidf_params': {key: config[key] for key in ("max_features", "ngram_range", "min_df", "max_df")},
+        'vectorizer_filename': vectorizer_path,
+        'tfidf_matrix_filename': matrix_path,
+        'timestamp': timestamp,
+        'metrics': {metric: cv[metric] * 100 for metric in SWEEP_METRICS}
+    }, model_path)
+    print(f"[INFO] Sweep best model saved: {model_path}")
+
+    return {
+        "vectorizer_path": vectorizer_path,
+        "matrix_path": matrix_path,
+        "model_path": model_path,
+        "matrix_shape": list(X.shape),
+        "vocabulary_size": len(vectorizer.vocabulary_),
+        "cv": cv
+    }
+
+
+# ============================================================
+# MEMO (tabel sweep_results)
+# ============================================================
+
+def load_memoized(db, dataset_hash, n_splits, random_state, user_id):
+    """{config_key: SweepResult} untuk dataset + setup CV yang sama.
+    Per config, baris milik user_id didahulukan (baris terbaru milik user lain
+    jika user belum punya).
+    """
+    from database import SweepResult
+    rows = (
+        db.query(SweepResult)
+        .filter(
+            SweepResult.dataset_hash == dataset_hash,
+            SweepResult.n_splits == n_splits,
+            SweepResult.random_state == random_state
+        )
+        .order_by(SweepResult.created_at.asc())
+        .all()
+    )
+    memo = {}
+    for row in rows:
+        current = memo.get(row.config_key)
+        if current is None or current.created_by != user_id or row.created_by == user_id:
+            memo[row.config_key] = row
+    return memo
+
+
+def save_results(db, results, dataset_hash, dataset_name, n_splits, random_state, user_id):
+    """Simpan hasil valid ke sweep_results. Return {config_key: SweepResult}"""
+    from database import SweepResult
+    rows = {}
+    for result in results:
+        if "error" in result:
+            continue
+        key = config_key(result["config"])
+        rows[key] = SweepResult(
+            dataset_hash=dataset_hash,
+            dataset_name=dataset_name,
+            config_key=key,
+            n_splits=n_splits,
+            random_state=random_state,
+            accuracy=result["accuracy"],
+            precision_score=result["precision"],
+            recall_score=result["recall"],
+            f1_score=result["f1_score"],
+            std_accuracy=result["std_accuracy"],
+            n_features=result["n_features"],
+            created_by=user_id
+        )
+        db.add(rows[key])
+    db.commit()
+    return rows
+
+
+def own_result(db, row, user_id):
+    """Baris SweepResult milik user_id untuk config yang sama (disalin jika milik user lain)"""
+    from database import SweepResult
+    if row.created_by == user_id:
+        return row
+    copy = SweepResult(
+        dataset_hash=row.dataset_hash,
+        dataset_name=row.dataset_name,
+        config_key=row.config_key,
+        n_splits=row.n_splits,
+        random_state=row.random_state,
+        accuracy=row.accuracy,
+        precision_score=row.precision_score,
+        recall_score=row.recall_score,
+        f1_score=row.f1_score,
+        std_accuracy=row.std_accuracy,
+        n_features=row.n_features,
+        created_by=user_id
+    )
+    db.add(copy)
+    return copy
+
+
+def memo_to_result(row, user_id):
+    """SweepResult -> dict hasil (format sama dengan run_sweep);
+    training_history_id hanya untuk baris milik user_id"""
+    return {
+        "config": json.loads(row.config_key),
+        "accuracy": row.accuracy,
+        "precision": row.precision_score,
+        "recall": row.recall_score,
+        "f1_score": row.f1_score,
+        "std_accuracy": row.std_accuracy,
+        "n_features": row.n_features,
+        "training_history_id": row.training_history_id if row.created_by == user_id else None
+    }
@@ -0,0 +1,26 @@
+# conftest.py
+"""
+Test berjalan di direktori sementara: modul backend membaca kamus (Positive.csv,
+Negative.csv, typo_dict.json) dari working directory dan membuat file cache
+(translation_cache.db, preprocess_cache.db) saat import, jadi direktori
+repo tidak ikut berubah.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILES = ("Positive.csv", "Negative.csv", "typo_dict.json")
+
+WORK_DIR = tempfile.mkdtemp(prefix="sentiment_tests_")
+for name in DATA_FILES:
+    if os.path.exists(os.path.join(BACKEND_DIR, name)):
+        shutil.copy(os.path.join(BACKEND_DIR, name), WORK_DIR)
+os.chdir(WORK_DIR)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(WORK_DIR, 'test.db')}")
+os.environ.setdefault("MODEL_WARM_LOAD", "0")
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
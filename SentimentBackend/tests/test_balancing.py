@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from balancing_utils import apply_tomek_links, build_neighbor_graph, tomek_links_mask
+
+TomekLinks = pytest.importorskip("imblearn.under_sampling").TomekLinks
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    # jarak acak (tanpa tie) + kelas yang saling tumpang tindih -> banyak Tomek link
+    X = sp.csr_matrix(rng.random((300, 8)))
+    y = rng.choice(["Negatif", "Netral", "Positif"], size=300)
+    return X, y
+
+
+def imblearn_mask(X, y, rows):
+    sampler = TomekLinks(sampling_strategy="all")
+    sampler.fit_resample(X[rows], y[rows])
+    mask = np.ones(len(rows), dtype=bool)
+    mask[sampler.sample_indices_] = False
+    return mask
+
+
+@pytest.mark.parametrize("n_neighbors", [10, 2])  # K kecil: sebagian baris lewat fallback brute force
+def test_tomek_mask_matches_imblearn_on_subsets(data, n_neighbors):
+    X, y = data
+    graph = build_neighbor_graph(X, n_neighbors=n_neighbors, method="exact")
+    rng = np.random.default_rng(1)
+    subsets = [np.arange(X.shape[0])] + [
+        rng.choice(X.shape[0], size=size, replace=False) for size in (240, 150, 30)
+    ]
+    for rows in subsets:
+        mask = tomek_links_mask(graph, X, y, rows)
+        assert mask.any()
+        np.testing.assert_array_equal(mask, imblearn_mask(X, y, rows))
+
+
+def test_apply_tomek_links_matches_fit_resample(data):
+    X, y = data
+    graph = build_neighbor_graph(X, n_neighbors=5, method="exact")
+    rows = np.random.default_rng(2).choice(X.shape[0], size=200, replace=False)
+    X_res, y_res = apply_tomek_links(X, y, graph, rows)
+    X_ref, y_ref = TomekLinks(sampling_strategy="all").fit_resample(X[rows], y[rows])
+    assert (X_res != X_ref).nnz == 0
+    np.testing.assert_array_equal(y_res, y_ref)
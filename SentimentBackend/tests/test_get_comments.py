@@ -0,0 +1,133 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import get_comments
+from get_comments import FakeYouTubeClient
+
+
+def snippet(i, day=1):
+    return {
+        "textDisplay": f"komentar {i}",
+        "authorDisplayName": "user",
+        "likeCount": 0,
+        "publishedAt": f"2024-01-{day:02d}T00:00:{i % 60:02d}Z"
+    }
+
+
+class HiddenRepliesClient(FakeYouTubeClient):
+    """totalReplyCount ikut menghitung reply terhapus/ditahan yang tidak dikembalikan API"""
+
+    HIDDEN = 5
+
+    def _list_threads(self, **kwargs):
+        response = super()._list_threads(**kwargs)
+        for item in response["items"]:
+            item["snippet"]["totalReplyCount"] += self.HIDDEN
+        return response
+
+
+VIDEOS = {
+    "vid1": [(snippet(i), [snippet(100 + i)] if i % 3 == 0 else []) for i in range(25)],
+    "vid2": [(snippet(50 + i), []) for i in range(7)],
+}
+URLS = ["https://www.youtube.com/watch?v=vid1", "https://www.youtube.com/watch?v=vid2"]
+
+
+class FlakyClient(FakeYouTubeClient):
+    """Gagal setelah `fail_after` request commentThreads (simulasi quota habis di tengah crawl)"""
+
+    def __init__(self, videos, fail_after, page_size=10):
+        super().__init__(videos, page_size=page_size)
+        self.fail_after = fail_after
+
+    def _list_threads(self, **kwargs):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise RuntimeError("quotaExceeded")
+        return super()._list_threads(**kwargs)
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_crawl_stops_on_fetched_comments_not_reply_count(parallel):
+    total = sum(1 + len(replies) for _, replies in VIDEOS["vid1"])
+    clients = get_comments._ClientPool(lambda: HiddenRepliesClient(VIDEOS, page_size=10))
+    executor = ThreadPoolExecutor(max_workers=4) if parallel else None
+    pages = list(get_comments._iter_video_pages(URLS[0], 30, clients, None, executor))
+    if executor:
+        executor.shutdown()
+    comments = [comment for page, _ in pages for comment in page]
+    assert len(comments) == 30 < total
+    assert pages[-1][1] is None
+    assert [c["id"] for c in comments] == list(range(1, 31))
+
+    pages = list(get_comments._iter_video_pages(URLS[0], 1000, clients, None, None))
+    assert sum(len(page) for page, _ in pages) == total
+
+
+def test_streaming_crawl_resumes_only_for_its_owner(tmp_path):
+    output = str(tmp_path / "GetComments_test.csv")
+    expected = sum(1 + len(replies) for _, replies in VIDEOS["vid1"]) + len(VIDEOS["vid2"])
+
+    result = get_comments.crawl_comments_streaming(
+        URLS, output, 1000, client_factory=lambda: FlakyClient(VIDEOS, fail_after=2), owner=1
+    )
+    assert not result["complete"] and 0 < result["count"] < expected
+    assert os.path.exists(output + get_comments.CHECKPOINT_SUFFIX)
+
+    with pytest.raises(PermissionError):
+        get_comments.crawl_comments_streaming(
+            URLS, output, 1000, client_factory=lambda: FakeYouTubeClient(VIDEOS, page_size=10), owner=2
+        )
+
+    result = get_comments.crawl_comments_streaming(
+        URLS, output, 1000, client_factory=lambda: FakeYouTubeClient(VIDEOS, page_size=10), owner=1
+    )
+    assert result["resumed"] and result["complete"]
+    df = pd.read_csv(output)
+    assert len(df) == result["count"] == expected
+    # id berurutan per video: tidak ada halaman yang hilang atau dobel setelah resume
+    vid1 = expected - len(VIDEOS["vid2"])
+    assert df["id"].tolist() == list(range(1, vid1 + 1)) + list(range(1, len(VIDEOS["vid2"]) + 1))
+    assert not os.path.exists(output + get_comments.CHECKPOINT_SUFFIX)
+
+
+def test_streaming_crawl_refuses_to_truncate_existing_file(tmp_path):
+    output = str(tmp_path / "GetComments_existing.csv")
+    pd.DataFrame({"comment": ["jangan ditimpa"]}).to_csv(output, index=False)
+
+    with pytest.raises(FileExistsError):
+        get_comments.crawl_comments_streaming(
+            URLS, output, 10, client_factory=lambda: FakeYouTubeClient(VIDEOS), owner=1
+        )
+    assert pd.read_csv(output)["comment"].tolist() == ["jangan ditimpa"]
+
+    result = get_comments.crawl_comments_streaming(
+        URLS, output, 10, client_factory=lambda: FakeYouTubeClient(VIDEOS), owner=1, overwrite=True
+    )
+    assert len(pd.read_csv(output)) == result["count"] == 17
+
+
+def test_update_comments_file_keeps_comment_id_for_old_files(tmp_path):
+    path = str(tmp_path / "GetComments_old.csv")
+    url = "https://www.youtube.com/watch?v=vid3"
+    # file lama: crawl sebelum kolom comment_id ada
+    old = pd.DataFrame([
+        {"video_id": "vid3", "video_url": url, "id": i + 1, "comment": f"komentar {i}", "author": "user",
+         "likes": 0, "timestamp": snippet(i)["publishedAt"], "is_reply": False, "parent_id": None}
+        for i in range(3)
+    ])
+    old.to_csv(path, index=False)
+    # urutan API: thread terbaru dulu
+    videos = {"vid3": [(snippet(10 + i, day=2), []) for i in range(2)] + [(snippet(i), []) for i in range(3)]}
+
+    result = get_comments.update_comments_file(path, client_factory=lambda: FakeYouTubeClient(videos))
+
+    df = pd.read_csv(path)
+    assert result["new_count"] == 2 and len(df) == result["total"] == 5
+    assert "comment_id" in df.columns
+    assert df["comment_id"].iloc[:3].isna().all()
+    assert df["comment_id"].iloc[3:].tolist() == ["vid3.0", "vid3.1"]
+    assert df["id"].tolist() == [1, 2, 3, 4, 5]
+    assert df["comment"].iloc[:3].tolist() == old["comment"].tolist()
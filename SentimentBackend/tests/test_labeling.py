@@ -0,0 +1,42 @@
+import random
+
+import pandas as pd
+
+import label_utils
+from label_utils import LexiconMatcher
+
+
+def baseline_scores(text, positive, negative):
+    """Loop lama label_text: setiap entri lexicon dihitung sekali jika substring teks"""
+    return sum(1 for word in positive if word in text), sum(1 for word in negative if word in text)
+
+
+def test_aho_corasick_matches_substring_loop_on_overlapping_lexicon():
+    # pola tumpang tindih, prefix/suffix satu sama lain, dan entri duplikat
+    positive = ["he", "she", "his", "hers", "bagus", "bag", "us", "he", "aaa"]
+    negative = ["hers", "rs", "s", "gus", "aa", "a"]
+    matcher = LexiconMatcher(positive, negative)
+    rng = random.Random(0)
+    texts = ["", "ushers", "bagus sekali", "aaaa"] + [
+        "".join(rng.choice("abeghirsu ") for _ in range(rng.randint(0, 30))) for _ in range(3000)
+    ]
+    for text in texts:
+        assert matcher.score(text) == baseline_scores(text, positive, negative), repr(text)
+
+
+def test_labels_match_baseline_with_repo_lexicon():
+    assert label_utils.positive_words and label_utils.negative_words
+    rng = random.Random(1)
+    words = label_utils.positive_words[:300] + label_utils.negative_words[:300] + ["video", "ini", "yang"]
+    texts = [" ".join(rng.choice(words) for _ in range(rng.randint(0, 8))) for _ in range(500)]
+    texts += ["", "TIDAK BAGUS", None]
+
+    expected = []
+    for text in texts:
+        lowered = "" if text is None else text.lower()
+        pos, neg = baseline_scores(lowered, label_utils.positive_words, label_utils.negative_words)
+        expected.append(label_utils._sentiment_from_scores(pos, neg))
+
+    assert [label_utils.label_text(text) for text in texts] == expected
+    labels = label_utils.label_texts(pd.Series(texts))
+    assert list(zip(labels["sentiment"], labels["confidence"])) == expected
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+from sklearn.model_selection import StratifiedKFold
+from sklearn.naive_bayes import MultinomialNB
+
+from naive_bayes_utils import closed_form_cv, iter_closed_form_cv
+
+ALPHAS = [0.1, 0.5, 1.0, 2.0]
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = sp.random(240, 60, density=0.15, format="lil", random_state=1)
+    y = rng.choice(["Negatif", "Netral", "Positif"], size=240, p=[0.5, 0.3, 0.2])
+    # fitur yang berkorelasi dengan kelas supaya prediksi tidak konstan
+    for column, label in enumerate(["Negatif", "Netral", "Positif"]):
+        X[np.flatnonzero(y == label), column] = 1.0
+    splits = list(StratifiedKFold(n_splits=5, shuffle=True, random_state=42).split(X, y))
+    return X.tocsr(), y, splits
+
+
+def test_closed_form_predictions_match_multinomialnb_refit(data):
+    X, y, splits = data
+    for train_idx, test_idx, predictions in iter_closed_form_cv(X, y, splits, ALPHAS):
+        for alpha in ALPHAS:
+            refit = MultinomialNB(alpha=alpha).fit(X[train_idx], y[train_idx]).predict(X[test_idx])
+            np.testing.assert_array_equal(predictions[alpha], refit)
+
+
+def test_closed_form_metrics_match_sklearn(data):
+    X, y, splits = data
+    results = closed_form_cv(X, y, alphas=ALPHAS, splits=splits)
+    for alpha in ALPHAS:
+        folds = []
+        for train_idx, test_idx in splits:
+            y_pred = MultinomialNB(alpha=alpha).fit(X[train_idx], y[train_idx]).predict(X[test_idx])
+            precision, recall, f1, _ = precision_recall_fscore_support(
+                y[test_idx], y_pred, average="macro", zero_division=0
+            )
+            folds.append((accuracy_score(y[test_idx], y_pred), precision, recall, f1))
+        expected = np.mean(folds, axis=0)
+        result = results[alpha]
+        assert [result[m] for m in ("accuracy", "precision", "recall", "f1_score")] == pytest.approx(expected)
@@ -0,0 +1,135 @@
+import random
+import re
+import string
+
+import pandas as pd
+import pytest
+
+import PreProcessing
+from translation_utils import StubTranslateBackend
+
+
+COMMENTS = [
+    "Videonya bagus banget, mantap sekali",
+    "this video is really good and helpful",
+    "ok",
+    "",
+    "this video is really good and helpful",
+    "pemerintah harus tegas soal ini",
+    "I do not like the ending of this movie",
+    "Videonya bagus banget, mantap sekali",
+]
+
+
+# clean_text sebelum regex digabung: satu re.sub per langkah, urutan lama
+BASELINE_EMOJI = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"
+    "\U0001F300-\U0001F5FF"
+    "\U0001F680-\U0001F6FF"
+    "\U0001F700-\U0001F77F"
+    "\U0001F780-\U0001F7FF"
+    "\U0001F800-\U0001F8FF"
+    "\U0001F900-\U0001F9FF"
+    "\U0001FA00-\U0001FA6F"
+    "\U0001FA70-\U0001FAFF"
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "]+",
+    flags=re.UNICODE
+)
+
+
+def baseline_clean_text(text):
+    text = str(text).lower()
+    text = re.sub(r"http\S+|www\.\S+", "", text)
+    text = re.sub(r"@\w+", "", text)
+    text = text.translate(str.maketrans("", "", string.punctuation))
+    text = re.sub(r"\d+", "", text)
+    text = BASELINE_EMOJI.sub(r"", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return re.sub(r'([a-zA-Z])\1{1,}\b', r'\1', text)
+
+
+CLEAN_CASES = [
+    "Bagusss BANGET!!! 😍😍 https://youtu.be/abc?t=1 @user_1",
+    "cek www.example.com/path,ok? @@double @http://x.y",
+    "harga 15.000,- (diskon 50%)   mantappp\tjiwaaa\n",
+    "user@mail.com email@ www.",
+    "ａｂｃ ¡hola! café ✂ ✅ Ⓜ 中文 🤣🤣",
+    "http",
+    "@",
+    "",
+]
+
+
+def random_comment(rng):
+    pieces = [
+        "bagus", "sekaliii", "@budi", "@http", "https://t.co/x", "www.x.id", "123", "4.5",
+        "😀", "✅", "!!", "...", "#viral", "kerennn", "\t", "\n", "  ", "a", "é", "中",
+    ]
+    return "".join(rng.choice(pieces + list(string.punctuation)) for _ in range(rng.randint(0, 12)))
+
+
+def test_fused_clean_text_matches_separate_passes():
+    rng = random.Random(0)
+    cases = CLEAN_CASES + [random_comment(rng) for _ in range(2000)]
+    for text in cases:
+        assert PreProcessing.clean_text(text) == baseline_clean_text(text), repr(text)
+    series = PreProcessing.clean_text_series(pd.Series(cases))
+    assert series.tolist() == [baseline_clean_text(text) for text in cases]
+
+
+@pytest.fixture
+def comments_csv(tmp_path):
+    path = tmp_path / "GetComments_test.csv"
+    pd.DataFrame({"comment": COMMENTS}).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def stub_translation():
+    PreProcessing.set_translation_backend(StubTranslateBackend(func=str.upper))
+    yield
+
+
+@pytest.mark.parametrize("mode", [
+    {},
+    {"vectorized": True},
+    {"use_processes": True},
+])
+def test_language_tiers_count_each_row_once(comments_csv, tmp_path, mode):
+    PreProcessing.lang_detection_cache.clear()
+    for run in range(2):  # run kedua: semua teks sudah ada di cache deteksi bahasa
+        result = PreProcessing.preprocess_comments_large(
+            comments_csv, str(tmp_path / f"out_{run}.csv"),
+            num_workers=2, record_cache_path=None, stem_cache_path=None, **mode
+        )
+        assert sum(result["language_tiers"].values()) == len(COMMENTS)
+    assert result["language_tiers"]["cache"] + result["language_tiers"]["short"] == len(COMMENTS)
+
+
+def test_record_cache_skips_failed_rows_but_keeps_empty_results(tmp_path, monkeypatch):
+    cache = PreProcessing.RecordCache(str(tmp_path / "records.db"))
+    empty = PreProcessing.process_single_comment({"id": 1, "comment": "!!! ???"}, 0, skip_translation=True)
+    assert empty["finalText"] == "" and not empty.get("error")
+
+    def broken(text):
+        raise RuntimeError("transient failure")
+
+    monkeypatch.setattr(PreProcessing, "clean_text", broken)
+    failed = PreProcessing.process_single_comment({"id": 2, "comment": "bagus"}, 1, skip_translation=True)
+    assert failed["error"] is True
+
+    assert cache.store([("empty", empty), ("failed", failed)]) == 1
+    assert set(cache.records.get_many({"empty", "failed"})) == {"empty"}
+
+
+def test_preprocess_series_matches_process_single_comment():
+    comments = COMMENTS + CLEAN_CASES + [None, "   ", "tidak bagus dan tidak suka"]
+    frame = PreProcessing.preprocess_series(pd.Series(comments), trace_rows=0)
+    for index, comment in enumerate(comments):
+        single = PreProcessing.process_single_comment(
+            {"id": index + 1, "comment": "" if comment is None else comment}, index, trace=False
+        )
+        assert frame.iloc[index].to_dict() == single, repr(comment)
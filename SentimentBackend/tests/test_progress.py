@@ -0,0 +1,63 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from progress_utils import ProgressRegistry
+
+
+def test_registry_rejects_active_or_foreign_run_id():
+    registry = ProgressRegistry()
+    registry.start("run-1", owner=1)
+
+    with pytest.raises(ValueError):
+        registry.start("run-1", owner=1)  # masih berjalan
+    registry.finish("run-1")
+    with pytest.raises(ValueError):
+        registry.start("run-1", owner=2)  # milik user lain
+    assert registry.get("run-1", owner=1)["status"] == "done"
+
+    registry.start("run-1", owner=1)  # owner sama boleh pakai ulang run yang selesai
+    assert registry.get("run-1", owner=1)["status"] == "running"
+    assert registry.get("run-1", owner=2) is None
+
+
+@pytest.fixture
+def api(monkeypatch):
+    import main
+    from database import SessionLocal, User
+
+    db = SessionLocal()
+    users = [User(username=f"progress_{name}_{uuid.uuid4().hex[:8]}", hashed_password="x") for name in ("owner", "other")]
+    db.add_all(users)
+    db.commit()
+    current = {"user": users[0]}
+    main.app.dependency_overrides[main.get_current_user] = lambda: current["user"]
+    monkeypatch.setattr(main, "PROGRESS_WAIT_SECONDS", 0)
+    yield main, TestClient(main.app), users, current
+    main.app.dependency_overrides.clear()
+    db.close()
+
+
+def test_progress_endpoints_only_show_own_runs(api):
+    main, client, (owner, other), current = api
+    tracker = main.progress_registry.tracker("crawl-abc", owner=owner.id)
+    tracker.update("crawl", 5, 10)
+    tracker.finish()
+
+    assert client.get("/progress/crawl-abc").json()["current"] == 10
+    assert '"status": "done"' in client.get("/progress/crawl-abc/stream").text
+
+    current["user"] = other
+    assert client.get("/progress/crawl-abc").status_code == 404
+    assert client.get("/progress/crawl-abc/stream").text.startswith("event: error")
+
+
+def test_run_tracked_rejects_run_id_in_use(api):
+    main, client, (owner, other), current = api
+    main.progress_registry.tracker("busy-run", owner=owner.id)
+    response = client.post("/get-comments", json={"video_url": "https://www.youtube.com/watch?v=x", "run_id": "busy-run"})
+    assert response.status_code == 409
+
+    response = client.post("/get-comments", json={"video_url": "https://www.youtube.com/watch?v=x", "run_id": "job-1"})
+    assert response.status_code == 400
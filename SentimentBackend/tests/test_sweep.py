@@ -0,0 +1,32 @@
+import pytest
+
+import sweep_utils
+
+TEXTS = [
+    "bagus sekali videonya", "keren mantap bagus", "suka banget kontennya", "mantap jiwa keren",
+    "jelek banget videonya", "buruk sekali kontennya", "tidak suka jelek", "parah buruk banget",
+] * 3
+LABELS = (["positif"] * 4 + ["negatif"] * 4) * 3
+
+
+def test_sweep_progress_total_counts_only_pending_configs():
+    vectorizer_configs, alphas = sweep_utils.build_grid([0.5, 1.0], [None], [(1, 1), (1, 2)], [1], [1.0])
+    cached = [sweep_utils.config_key({**vectorizer_configs[0], "alpha": alpha}) for alpha in alphas]
+    pending = sweep_utils.pending_configs(vectorizer_configs, alphas, cached)
+    calls = []
+
+    results = sweep_utils.run_sweep(
+        TEXTS, LABELS, vectorizer_configs, alphas, n_splits=3, n_jobs=1,
+        skip_keys=cached, progress_callback=lambda done, total: calls.append((done, total))
+    )
+
+    assert len(pending) == 1 < len(vectorizer_configs)
+    assert calls == [(1, len(pending))]
+    assert len(results) == len(alphas)
+
+
+@pytest.mark.parametrize("prefix", ["../escape", "models/x", "a b", ""])
+def test_train_best_config_rejects_unsafe_prefix(prefix):
+    config = {"alpha": 1.0, "max_features": None, "ngram_range": (1, 1), "min_df": 1, "max_df": 1.0}
+    with pytest.raises(ValueError):
+        sweep_utils.train_best_config(TEXTS, LABELS, config, n_splits=3, output_prefix=prefix)
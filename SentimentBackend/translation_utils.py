@@ -0,0 +1,147 @@
+# translation_utils.py
+"""
+Tahap translasi batch untuk preprocessing:
+- dedup teks di seluruh dataset
+- request dikirim per batch lewat backend yang bisa diganti (Google / stub lokal)
+- concurrency dibatasi (ThreadPoolExecutor) + retry dengan exponential backoff
+- hasil disimpan di key-value store on-disk (key = SHA-256 teks penuh),
+  jadi teks yang sudah pernah diterjemahkan tidak diterjemahkan ulang
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from deep_translator import GoogleTranslator
+
+from kv_store import text_hash
+
+# Batas karakter per request Google Translate (limit 5000, sisakan margin)
+GOOGLE_MAX_CHARS = 4500
+BATCH_SEPARATOR = "\n"
+
+
+# ========================================
+# BACKENDS
+# ========================================
+class GoogleTranslateBackend:
+    """Google Translate via deep_translator.
+
+    Beberapa teks digabung dengan newline dalam satu request (teks hasil
+    clean_text tidak mengandung newline). Jika jumlah baris hasil tidak cocok,
+    batch tersebut diterjemahkan satu per satu.
+    """
+
+    def __init__(self, source="en", target="id", max_chars=GOOGLE_MAX_CHARS):
+        self.source = source
+        self.target = target
+        self.max_chars = max_chars
+        self._translator = GoogleTranslator(source=source, target=target)
+
+    def _pack(self, texts):
+        # Kelompokkan teks jadi request <= max_chars
+        packs, current, size = [], [], 0
+        for text in texts:
+            extra = len(text) + len(BATCH_SEPARATOR)
+            if current and size + extra > self.max_chars:
+                packs.append(current)
+                current, size = [], 0
+            current.append(text)
+            size += extra
+        if current:
+            packs.append(current)
+        return packs
+
+    def translate_batch(self, texts):
+        results = []
+        for pack in self._pack(texts):
+            if len(pack) == 1:
+                results.append(self._translator.translate(pack[0]) or pack[0])
+                continue
+            translated = self._translator.translate(BATCH_SEPARATOR.join(pack)) or ""
+            lines = translated.split(BATCH_SEPARATOR)
+            if len(lines) == len(pack):
+                results.extend(line.strip() or text for line, text in zip(lines, pack))
+            else:
+                print(f"[WARN] Batch translation returned {len(lines)} lines for {len(pack)} texts, falling back per text")
+                results.extend(self._translator.translate(text) or text for text in pack)
+        return results
+
+
+class StubTranslateBackend:
+    """Backend lokal (offline / testing). Pakai mapping dict atau fungsi."""
+
+    def __init__(self, mapping=None, func=None):
+        self.mapping = mapping or {}
+        self.func = func
+        self.calls = 0
+        self.texts_seen = 0
+
+    def translate_batch(self, texts):
+        self.calls += 1
+        self.texts_seen += len(texts)
+        if self.func is not None:
+            return [self.func(text) for text in texts]
+        return [self.mapping.get(text, text) for text in texts]
+
+
+# ========================================
+# TRANSLATION STAGE
+# ========================================
+def _translate_with_retry(backend, batch, retries, backoff):
+    """Translate one batch, retrying with exponential backoff. None = gagal total."""
+    for attempt in range(retries + 1):
+        try:
+            result = backend.translate_batch(batch)
+            if len(result) != len(batch):
+                raise ValueError(f"backend returned {len(result)} results for {len(batch)} texts")
+            return result
+        except Exception as e:
+            if attempt == retries:
+                print(f"[WARN] Translation batch failed after {retries + 1} attempts: {e}")
+                return None
+            wait = backoff * (2 ** attempt)
+            print(f"[WARN] Translation batch failed ({e}), retry in {wait:.1f}s")
+            time.sleep(wait)
+
+
+def translate_texts(texts, backend, store=None, batch_size=50, max_workers=4, retries=3, backoff=1.0):
+    """Translate many texts; returns ({text: translated}, stats).
+
+    Teks kosong dan duplikat di-skip, teks yang sudah ada di `store` tidak
+    dikirim ke backend. Batch yang gagal setelah semua retry dikembalikan
+    apa adanya dan TIDAK disimpan (supaya dicoba lagi di run berikutnya).
+    """
+    unique = [text for text in dict.fromkeys(texts) if text and str(text).strip()]
+    stats = {"unique": len(unique), "cached": 0, "translated": 0, "failed": 0, "batches": 0, "failed_texts": []}
+    if not unique:
+        return {}, stats
+
+    keys = {text: text_hash(text) for text in unique}
+    stored = store.get_many(keys.values()) if store is not None else {}
+    mapping = {text: stored[key] for text, key in keys.items() if key in stored}
+    stats["cached"] = len(mapping)
+
+    pending = [text for text in unique if text not in mapping]
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    stats["batches"] = len(batches)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(_translate_with_retry, backend, batch, retries, backoff): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            result = future.result()
+            if result is None:
+                stats["failed"] += len(batch)
+                stats["failed_texts"].extend(batch)
+                mapping.update((text, text) for text in batch)
+                continue
+            translated = dict(zip(batch, result))
+            mapping.update(translated)
+            stats["translated"] += len(batch)
+            if store is not None:
+                # simpan per batch: progress tidak hilang kalau run berhenti di tengah
+                store.put_many((keys[text], value) for text, value in translated.items())
+
+    return mapping, stats